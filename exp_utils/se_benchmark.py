@@ -0,0 +1,96 @@
+import argparse
+import os
+import sys
+import time
+
+import pandas as pd
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+sys.setrecursionlimit(100000)
+
+import global_params
+import symbolic_execution.ir_se as ir_se
+from symbolic_execution.ir_basic_blocks import construct_cfg, load_csv_map
+from semantic_parser.graph_analyzer import FundTransferGraph, StateDependencyGraph
+
+
+# measure the throughput (executed statements/second) of the symbolic executor
+# on an already decompiled contract, e.g. ./gigahorse-toolchain/.temp/<addr>/out/
+# all public functions are executed without any semantic targets, so the numbers
+# reflect the engine itself instead of the detectors or the on-chain queries
+def build_inputs(facts_path):
+    blocks, functions, tac_block_function = construct_cfg(facts_path)
+    func_map = {
+        selector: func
+        for func, selector in load_csv_map(facts_path + "PublicFunction.csv").items()
+    }
+    fund_transfer_graph = FundTransferGraph(
+        pd.DataFrame(columns=["callStmt", "recipient", "amount", "funcSign"]),
+        pd.DataFrame(columns=["callStmt", "funcSign"]),
+    )
+    empty = pd.DataFrame(columns=[0, 1])
+    state_dependency_graph = StateDependencyGraph(
+        empty, empty, empty, empty, empty, empty, empty
+    )
+    return {
+        "total_func": len(func_map),
+        "analyzed_func": len(func_map),
+        "block_num": len(blocks),
+        "blocks": blocks,
+        "functions": functions,
+        "path": facts_path,
+        "dasm_path": "",
+        "tac_block_function": tac_block_function,
+        "funcs_to_be_checked": list(func_map.keys()),
+        "func_map": func_map,
+        "fund_transfer_graph": fund_transfer_graph,
+        "state_dependency_graph": state_dependency_graph,
+    }
+
+
+def benchmark(facts_path, rounds):
+    executed = [0]
+    sym_exec_ins = ir_se.SEEngine.sym_exec_ins
+
+    def counting_sym_exec_ins(*args, **kwargs):
+        executed[0] += 1
+        return sym_exec_ins(*args, **kwargs)
+
+    ir_se.SEEngine.sym_exec_ins = counting_sym_exec_ins
+    elapsed = 0.0
+    engine = None
+    try:
+        for _ in range(rounds):
+            # blocks are annotated during SE, always start from a fresh cfg
+            engine = ir_se.SEEngine(build_inputs(facts_path), None)
+            start = time.time()
+            engine.run()
+            elapsed += time.time() - start
+    finally:
+        ir_se.SEEngine.sym_exec_ins = sym_exec_ins
+    return executed[0], elapsed, engine
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("facts_path", help="gigahorse output directory of a contract")
+    parser.add_argument("-r", "--rounds", type=int, default=3)
+    args = parser.parse_args()
+    facts_path = os.path.join(args.facts_path, "")
+    # without targets every path would be pruned, and the rounds after the first
+    # would read the findings back from the result cache instead of executing
+    global_params.PRUNE_PATHS = 0
+    global_params.RESULT_CACHE = ""
+
+    statements, elapsed, engine = benchmark(facts_path, args.rounds)
+    print(f"executed statements: {statements}")
+    print(f"SE time: {elapsed:.3f}s")
+    print(f"statements/second: {statements / elapsed:.1f}")
+    if engine.query_cache is not None:
+        print(f"solver query cache: {engine.query_cache.stats()}")
+    if engine.simplify_cache is not None:
+        print(f"simplify cache: {engine.simplify_cache.stats()}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,112 @@
+import argparse
+import os
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+import global_params
+from symbolic_execution.ir_se import Parameter
+from symbolic_execution.memory import EVMMemory
+from symbolic_execution.persistent import PersistentDict, PersistentList
+from symbolic_execution.utils import custom_deepcopy
+
+
+# microbenchmark of the path state forking in sym_exec_block
+# a single path of DEPTH_LIMIT blocks is executed, every block writes a few
+# variables, memory and storage slots and then forks the state for its successor,
+# all the ancestors stay alive like in the recursive DFS
+class DeepcopyParameter(Parameter):
+    # the former Parameter.copy
+    def copy(self):
+        return DeepcopyParameter(**custom_deepcopy(self.__dict__))
+
+
+def store_word(memory, address, value):
+    # the former word dict and byte list of MSTORE
+    if isinstance(memory, EVMMemory):
+        memory.store(address, value)
+        return
+    mem, data = memory["mem"], memory["memory"]
+    data.extend([0] * (address + 32 - len(data)))
+    data[address : address + 32] = value.to_bytes(32, "big")
+    mem[address] = value
+
+
+def init_params(param_cls, persistent, initial_vars):
+    if persistent:
+        path_conditions_and_vars = PersistentDict({"path_condition": PersistentList()})
+        global_state = PersistentDict(
+            {"Ia": PersistentDict(), "balance": PersistentDict()}
+        )
+        var_to_source = PersistentDict()
+        memory, visited = EVMMemory(), PersistentList()
+    else:
+        path_conditions_and_vars = {"path_condition": []}
+        global_state = {"Ia": {}, "balance": {}}
+        var_to_source = {}
+        memory, visited = {"mem": {}, "memory": []}, []
+    for i in range(initial_vars):
+        var_to_source["v%x" % i] = i
+        path_conditions_and_vars["some_var_%d" % i] = i
+    return param_cls(
+        var_to_source=var_to_source,
+        global_state=global_state,
+        path_conditions_and_vars=path_conditions_and_vars,
+        memory=memory,
+        visited=visited,
+    )
+
+
+def run_path(params, depth, writes):
+    path = [params]
+    for block in range(depth):
+        for i in range(writes):
+            var = "b%d_%d" % (block, i)
+            params.var_to_source[var] = params.var_to_source.get("v%x" % i, 0) + i
+        store_word(params.memory, block * 32, block)
+        params.global_state["Ia"][block % 16] = block
+        params.path_conditions_and_vars["path_condition"].append(block)
+        params.visited.append(block)
+        params = params.copy()
+        path.append(params)
+    return path
+
+
+def measure(param_cls, persistent, depth, writes, initial_vars):
+    params = init_params(param_cls, persistent, initial_vars)
+    tracemalloc.start()
+    start = time.time()
+    path = run_path(params, depth, writes)
+    elapsed = time.time() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return elapsed, peak, path
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("-d", "--depth", type=int, default=global_params.DEPTH_LIMIT)
+    parser.add_argument("-w", "--writes", type=int, default=20)
+    parser.add_argument("-i", "--initial-vars", type=int, default=1000)
+    args = parser.parse_args()
+
+    for name, param_cls, persistent in (
+        ("deepcopy", DeepcopyParameter, False),
+        ("persistent", Parameter, True),
+    ):
+        elapsed, peak, path = measure(
+            param_cls, persistent, args.depth, args.writes, args.initial_vars
+        )
+        assert (
+            len(path[-1].var_to_source) == args.initial_vars + args.depth * args.writes
+        )
+        print(
+            f"{name}: depth {args.depth}, {elapsed * 1000:.1f}ms, "
+            f"peak memory {peak / 1024 / 1024:.1f}MB"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -22,11 +22,42 @@ DEBUG_MODE = 0
 # Timeout for z3 in ms
 TIMEOUT = 100
 
+# directory of the findings per function kept across runs, keyed by the runtime
+# bytecode hash so the clones of a contract share them, "" to always analyze,
+# e.g. "./gigahorse-toolchain/.temp/results/"
+RESULT_CACHE = ""
+
+# also reuse the findings of the functions with the same code in other contracts,
+# by a fingerprint of their statements, in the RESULT_CACHE directory,
+# see symbolic_execution.function_index
+FUNCTION_INDEX = 0
+
+# number of z3 results of identical or implied queries reused in a contract,
+# 0 to always call the solver
+QUERY_CACHE = 4096
+
+# race solver configurations on the queries left unknown by the TIMEOUT,
+# see symbolic_execution.portfolio
+PORTFOLIO = 1
+
+# timeout of each configuration of a portfolio race (in ms)
+PORTFOLIO_TIMEOUT = 2000
+
+# number of simplified expressions memoized per contract, 0 to always call z3 simplify
+SIMPLIFY_CACHE = 4096
+
+# apply summaries of the pure private functions (e.g. SafeMath) at their call sites
+FUNCTION_SUMMARIES = 1
+
+# only send the path constraints sharing variables with a query to z3
+CONSTRAINT_SLICING = 1
+
 # Set this flag to 2 if we want to do evm real value unit test
 # Set this flag to 3 if we want to do evm symbolic unit test
 UNIT_TEST = 0
 
 # timeout to run symbolic execution (in secs)
+# the budget of a contract, shared by its targeted functions, 0 for no limit
 GLOBAL_TIMEOUT = 60
 
 # timeout to run symbolic execution (in secs) for testing
@@ -41,15 +72,56 @@ STORE_RESULT = 1
 # depth limit for DFS
 DEPTH_LIMIT = 200
 
+# order of the path exploration: dfs, bfs, random or distance (to the CALL/SSTORE targets)
+SEARCH_STRATEGY = "dfs"
+
+# seed of the random search
+SEARCH_SEED = 0
+
+# merge both sides of the small branches without effect at their join point,
+# one path with If values instead of a path per side
+STATE_MERGING = 0
+
+# cut the paths entering a join block in the same state as an explored path
+STATE_PRUNING = 1
+
+# cut the paths which cannot reach a CALL/SSTORE checked by the detectors
+PRUNE_PATHS = 1
+
+# stop exploring once no verdict of the result can change anymore (findings-complete),
+# the details like the fee rates or the expressions per function may then be partial
+FINDINGS_COMPLETE = 0
+
+# count the executed opcodes, solver checks and forks, and time the functions,
+# written next to the findings as "profile"
+PROFILE = 0
+
+# trace categories of the executor written to the debug log, comma separated or "all",
+# see symbolic_execution.trace
+TRACE = ""
+
+# last trace records kept in memory and dumped to the log when a path fails, 0 for none
+TRACE_BUFFER = 0
+
 GAS_LIMIT = 400000000
 
 LOOP_LIMIT = 30
 
+# iterations of a loop on a path before it is widened and left through its exits,
+# with the gigahorse loop facts, 0 to only bound the loops by LOOP_LIMIT
+LOOP_UNROLL = 2
+
+# max number of shared layers of a forked symbolic state before it is flattened
+STATE_LAYER_LIMIT = 32
+
 GENERATE_TEST_CASES = 0
 
 # Run Hyperion in parallel
 PARALLEL = 1
 
+# number of worker processes analyzing the targeted functions of a contract
+SE_WORKERS = 1
+
 TARGET_CONTRACTS = None
 
 # WEB = 1 means that we are using Oyente for web service
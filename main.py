@@ -3,6 +3,7 @@ import json
 import logging
 
 from global_params import *
+import global_params
 import symbolic_execution.ir_se
 from symbolic_execution.ir_se import *
 
@@ -10,6 +11,8 @@ from symbolic_execution.ir_se import *
 from nlp.text_analyzer import FrontEndSpecsExtractor
 from semantic_parser.semantic import Semantics
 from symbolic_execution.state_extractor import StateExtractor
+from symbolic_execution.search import STRATEGIES
+from symbolic_execution.trace import CATEGORIES as TRACE_CATEGORIES
 
 
 def analyze_dapp():
@@ -56,6 +59,10 @@ def analyze_dapp():
     filename = args.output_dir + "/" + source["address"] + ".json"
     with open(filename, "w") as file:
         file.write(json_str)
+    if "profile" in result:
+        filename = args.output_dir + "/" + source["address"] + ".profile.json"
+        with open(filename, "w") as file:
+            file.write(json.dumps(result["profile"], indent=4))
     return exit_code
 
 
@@ -124,7 +131,66 @@ def main():
         type=str,
         default="result",
     )
+    parser.add_argument(
+        "-s",
+        "--strategy",
+        help="Path exploration order of the symbolic execution.",
+        action="store",
+        dest="strategy",
+        choices=STRATEGIES,
+        default=global_params.SEARCH_STRATEGY,
+    )
+    parser.add_argument(
+        "-w",
+        "--workers",
+        help="Number of processes analyzing the targeted functions.",
+        action="store",
+        dest="workers",
+        type=int,
+        default=global_params.SE_WORKERS,
+    )
+    parser.add_argument(
+        "-p",
+        "--profile",
+        help="Profile the symbolic execution, also written to <address>.profile.json.",
+        action="store_true",
+    )
+    parser.add_argument(
+        "-t",
+        "--trace",
+        help="Trace categories of the symbolic execution written to the verbose log, "
+        "comma separated or all: " + ", ".join(TRACE_CATEGORIES) + ".",
+        action="store",
+        dest="trace",
+        type=str,
+        default=global_params.TRACE,
+    )
+    parser.add_argument(
+        "-tb",
+        "--trace_buffer",
+        help="Number of last trace records dumped to the log when a path fails.",
+        action="store",
+        dest="trace_buffer",
+        type=int,
+        default=global_params.TRACE_BUFFER,
+    )
+    parser.add_argument(
+        "-c",
+        "--cache",
+        help="Directory of the findings kept across runs and shared by the clones "
+        "of a contract, empty to always analyze.",
+        action="store",
+        dest="cache",
+        type=str,
+        default=global_params.RESULT_CACHE,
+    )
     args = parser.parse_args()
+    global_params.SEARCH_STRATEGY = args.strategy
+    global_params.SE_WORKERS = args.workers
+    global_params.PROFILE = int(args.profile)
+    global_params.TRACE = args.trace
+    global_params.TRACE_BUFFER = args.trace_buffer
+    global_params.RESULT_CACHE = args.cache
 
     logging.basicConfig(
         format="[%(levelname)s][%(filename)s:%(lineno)d]: %(message)s",
@@ -4,6 +4,8 @@ import os
 from web3 import Web3
 import pandas as pd
 
+from symbolic_execution.result_cache import code_hash
+
 log = logging.getLogger(__name__)
 
 
@@ -101,6 +103,14 @@ class Decompiler:
                 with open(loc, "w") as f:
                     f.write(code[2:])
 
+    def get_code_hash(self):
+        # hash of the runtime bytecode, keying the cached findings
+        loc = CONTRACT_PATH + self.address + ".hex"
+        if not os.path.exists(loc):
+            return None
+        with open(loc) as f:
+            return code_hash(f.read())
+
     def analyze_contract(self):
         # use hyperion client to analyze the contract
         logging.info("Decompiling contract...")
@@ -105,6 +105,7 @@ class Semantics:
                 "functions": functions,
                 "path": self.decompiler.path,
                 "dasm_path": self.decompiler.dasm_path,
+                "code_hash": self.decompiler.get_code_hash(),
                 "tac_block_function": tac_block_function,
                 "funcs_to_be_checked": self.funcs_to_be_checked,
                 "func_map": self.func_map,
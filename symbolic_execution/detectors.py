@@ -0,0 +1,384 @@
+from collections import namedtuple
+
+from z3 import is_bv_value, is_expr
+
+from symbolic_execution import expr
+from symbolic_execution.utils import get_storage_position, is_zero
+
+# a fund transfer of a CALL, call is the [recipient, amount] pair of the findings
+Transfer = namedtuple("Transfer", ["funcSign", "ident", "call", "recipient", "amount"])
+# an SSTORE to a constant slot
+Store = namedtuple("Store", ["funcSign", "ident", "slot"])
+
+
+class Detector:
+    """A verdict of the result and the statements which can still change it.
+
+    The verdict is a set of boolean flags of the result, only ever set to True
+    by the handler of a trigger statement, so it is decided once they are all set.
+    """
+
+    name = None
+    # paths of the flags in the result, e.g. ("fee", "warning")
+    flags = ()
+
+    def decided(self, result):
+        for path in self.flags:
+            value = result
+            for key in path:
+                value = value[key]
+            if not value:
+                return False
+        return True
+
+    def applies(self, funcSign, state_dependency_info):
+        # the function can set the flags
+        return True
+
+    def triggers(self, statement, fund_transfer_info, state_dependency_info, definers):
+        # the statement can set the flags, definers maps a variable to the opcode
+        # of its definition
+        raise NotImplementedError
+
+    def check(self, registry, event):
+        # hook of the statements it triggers on, records the findings of event
+        raise NotImplementedError
+
+
+class TransferDetector(Detector):
+    """Checks of the fund transfers found by the semantic analysis, in exec_call"""
+
+    def __init__(self, name, flags):
+        self.name = name
+        self.flags = flags
+
+    def triggers(self, statement, fund_transfer_info, state_dependency_info, definers):
+        return (
+            statement.opcode == "CALL" and statement.ident in fund_transfer_info.calls
+        )
+
+
+class ClearDetector(TransferDetector):
+    """Clearing of the contract balance, from the clear calls of the semantic
+    analysis or else a transfer of the balance"""
+
+    def check(self, registry, transfer):
+        clearcall = registry.fund_transfer_info.clearcall
+        if transfer.funcSign in clearcall:
+            cleared = transfer.ident in clearcall[transfer.funcSign]
+        else:
+            cleared = registry.facts.is_balance(transfer.amount)
+        if cleared:
+            registry.findings.flag("clear", "warning")
+            registry.findings.add(
+                "clear", transfer.funcSign, transfer.ident, transfer.call
+            )
+
+
+class FeeDetector(TransferDetector):
+    """Fees, a scaled amount sent to a constant or stored recipient"""
+
+    def check(self, registry, transfer):
+        if transfer.funcSign in registry.fund_transfer_info.clearcall:
+            return
+        facts = registry.facts
+        recipient = transfer.recipient
+        if is_expr(recipient) and not any(
+            expr.is_storage(var) for var in facts.variables(recipient)
+        ):
+            return
+        amount = transfer.amount
+        if not facts.scaled(amount):
+            return
+        # whether the fee can be modified by others through the storage dependency
+        dependencies = registry.state_dependency_info.slot_dependency_map
+        for var in facts.variables(amount):
+            if expr.is_storage(var):
+                pos = get_storage_position(var.value)
+                if isinstance(pos, int) and hex(pos) in dependencies:
+                    registry.findings.flag("fee", "modifiable")
+        registry.findings.function("fee", transfer.funcSign)
+        # bypass the 0 value
+        if is_zero(amount):
+            return
+        registry.findings.add("fee", transfer.funcSign, transfer.ident, transfer.call)
+        registry.findings.add_rate_node(facts.node(amount))
+        fee_rate = facts.fee_rate(amount)
+        if fee_rate:
+            registry.findings.flag("fee", "warning")
+            registry.findings.add_rate(fee_rate)
+
+
+class RewardDetector(TransferDetector):
+    """Rewards, a scaled amount sent to the caller, depending on the environment"""
+
+    def check(self, registry, transfer):
+        if transfer.funcSign in registry.fund_transfer_info.clearcall:
+            return
+        facts = registry.facts
+        recipient = transfer.recipient
+        if not is_expr(recipient) or not any(
+            expr.is_caller(var) for var in facts.variables(recipient)
+        ):
+            return
+        amount = transfer.amount
+        # iv-x is a refund logic, filtered out by scaled
+        if not facts.scaled(amount):
+            return
+        if any(
+            expr.is_mem(var) or expr.is_balance(var) or expr.is_env(var)
+            for var in facts.variables(amount)
+        ):
+            registry.findings.flag("reward", "warning")
+        registry.findings.add(
+            "reward", transfer.funcSign, transfer.ident, transfer.call
+        )
+
+
+class SlotDetector(Detector):
+    """Checks of the SSTOREs to the slots found by the semantic analysis, in exec_sstore"""
+
+    def __init__(self, name, flags, slots):
+        self.name = name
+        self.flags = flags
+        # state_dependency_info -> hex slots
+        self.slots = slots
+
+    def matches(self, slot, state_dependency_info):
+        return hex(slot) in self.slots(state_dependency_info)
+
+    def triggers(self, statement, fund_transfer_info, state_dependency_info, definers):
+        if statement.opcode != "SSTORE":
+            return False
+        slot = statement.use_vals[0]
+        if isinstance(slot, int):
+            return self.matches(slot, state_dependency_info)
+        # a slot computed during SE may still be a listed constant,
+        # only a hashed (mapping) slot never is
+        return definers.get(slot) not in ("SHA3", "KECCAK256")
+
+    def check(self, registry, store):
+        if self.applies(
+            store.funcSign, registry.state_dependency_info
+        ) and registry.matches(self, store.slot):
+            for path in self.flags:
+                registry.findings.flag(*path)
+
+
+class SupplyDetector(SlotDetector):
+    """Unlimited minting, by the functions without a guarded mint"""
+
+    def applies(self, funcSign, state_dependency_info):
+        return funcSign not in state_dependency_info.guarded_mint_map
+
+
+class PauseDetector(SlotDetector):
+    """Pause switch, the listed slots may carry an offset (0x2_0_0 is 0x2)"""
+
+    def matches(self, slot, state_dependency_info):
+        return any(
+            hex(slot) in pause_slot.split("_")[0]
+            for pause_slot in state_dependency_info.pause_list
+        )
+
+
+# the checks of a statement run in this order
+DETECTORS = [
+    ClearDetector("clear", (("clear", "warning"),)),
+    FeeDetector("fee", (("fee", "warning"), ("fee", "modifiable"))),
+    RewardDetector("reward", (("reward", "warning"),)),
+    SlotDetector("lock", (("lock",),), lambda info: info.time_list),
+    SupplyDetector("supply", (("supply", "unlimited"),), lambda info: info.supply_list),
+    PauseDetector("pause", (("pause",),), None),
+]
+
+
+def statement_definers(blocks):
+    # variable -> opcode of the statement defining it
+    return {
+        var: statement.opcode
+        for block in blocks.values()
+        for statement in block.statements
+        for var in statement.def_vals
+    }
+
+
+def trigger_blocks(
+    blocks, detectors, fund_transfer_info, state_dependency_info, definers=None
+):
+    # blocks with a statement which can change the verdict of one of the detectors
+    if definers is None:
+        definers = statement_definers(blocks)
+    return {
+        ident
+        for ident, block in blocks.items()
+        if any(
+            detector.triggers(
+                statement, fund_transfer_info, state_dependency_info, definers
+            )
+            for statement in block.statements
+            for detector in detectors
+        )
+    }
+
+
+def finding_key(value):
+    # hashable key of a value of the findings, equal for the values which
+    # compare equal, z3 expressions are hash-consed so their ids are compared
+    if isinstance(value, (list, tuple)):
+        return tuple(finding_key(item) for item in value)
+    if is_bv_value(value):
+        return ("int", value.as_long())
+    if is_expr(value):
+        return ("expr", value.get_id())
+    if isinstance(value, int):
+        return ("int", value)
+    return (type(value).__name__, value)
+
+
+class Findings:
+    """The result of a contract, its lists of findings deduplicated with hashed sets"""
+
+    def __init__(self, result):
+        self.result = result
+        # (detector name, funcSign, ident) -> keys of the calls found
+        self.calls = {}
+        self.rates = set(result["fee"]["rate"])
+        # nodes of the fee amounts whose rate was computed, in order, the rates
+        # depend on the chain and are computed again for a cached result
+        self.rate_nodes = {}
+
+    def flag(self, *path):
+        entries = self.result
+        for key in path[:-1]:
+            entries = entries[key]
+        entries[path[-1]] = True
+
+    def function(self, name, funcSign):
+        # findings of the function, kept even when empty
+        return self.result[name].setdefault(funcSign, {})
+
+    def add(self, name, funcSign, ident, call):
+        entries = self.function(name, funcSign)
+        seen = self.calls.get((name, funcSign, ident))
+        if seen is None:
+            seen = self.calls[(name, funcSign, ident)] = set(
+                finding_key(item) for item in entries.get(ident, ())
+            )
+            entries.setdefault(ident, [])
+        key = finding_key(call)
+        if key not in seen:
+            seen.add(key)
+            entries[ident].append(call)
+
+    def add_rate_node(self, node):
+        self.rate_nodes.setdefault(node)
+
+    def add_rate(self, rate):
+        if rate not in self.rates:
+            self.rates.add(rate)
+            self.result["fee"]["rate"].append(rate)
+
+
+class ExprFacts:
+    """Facts of the transfer values shared by the detectors, on their lifted nodes"""
+
+    def __init__(self, state_extractor):
+        self.state_extractor = state_extractor
+        self.lifter = expr.Lifter()
+        # node -> fee rate
+        self.rates = {}
+
+    def node(self, value):
+        # None for the concrete values and the names of unknown values
+        if not is_expr(value):
+            return None
+        return self.lifter.lift(value)
+
+    def variables(self, value):
+        node = self.node(value)
+        return node.variables() if node is not None else ()
+
+    def scaled(self, value):
+        node = self.node(value)
+        return node is not None and expr.scaled(node)
+
+    def is_balance(self, value):
+        node = self.node(value)
+        return node is not None and expr.is_balance(node)
+
+    def fee_rate(self, amount):
+        # of a scaled amount
+        return self.rate(self.node(amount))
+
+    def rate(self, node):
+        if node not in self.rates:
+            if len(self.rates) > expr.LIFT_CACHE_LIMIT:
+                self.rates = {}
+            self.rates[node] = expr.fee_rate(node, self.state_extractor.get_chain_value)
+        return self.rates[node]
+
+
+class DetectorRegistry:
+    """The detectors subscribed to the statements which can change their verdict.
+
+    The trigger statements are found once per contract, the handlers of the
+    other statements never call into the detectors.
+    """
+
+    def __init__(
+        self, detectors, blocks, fund_transfer_info, state_dependency_info, state
+    ):
+        self.fund_transfer_info = fund_transfer_info
+        self.state_dependency_info = state_dependency_info
+        definers = statement_definers(blocks)
+        # statement ident -> subscribed detectors
+        self.hooks = {}
+        for block in blocks.values():
+            for statement in block.statements:
+                subscribed = [
+                    detector
+                    for detector in detectors
+                    if detector.triggers(
+                        statement, fund_transfer_info, state_dependency_info, definers
+                    )
+                ]
+                if subscribed:
+                    self.hooks[statement.ident] = subscribed
+        self.facts = ExprFacts(state)
+        self.findings = None
+        # (detector name, slot) -> whether the slot is one of the detector
+        self.slot_matches = {}
+
+    def subscribed(self, ident):
+        return self.hooks.get(ident, ())
+
+    def matches(self, detector, slot):
+        key = (detector.name, slot)
+        if key not in self.slot_matches:
+            self.slot_matches[key] = detector.matches(slot, self.state_dependency_info)
+        return self.slot_matches[key]
+
+    def rate_nodes(self, result):
+        # nodes of the fee amounts of result whose rate was computed
+        if self.findings is None or self.findings.result is not result:
+            return []
+        return list(self.findings.rate_nodes)
+
+    def resolve_rates(self, result, rate_nodes):
+        # the fee rates of a cached result, with the chain values of this contract
+        if self.findings is None or self.findings.result is not result:
+            self.findings = Findings(result)
+        for node in rate_nodes:
+            self.findings.add_rate_node(node)
+            fee_rate = self.facts.rate(node)
+            if fee_rate:
+                self.findings.flag("fee", "warning")
+                self.findings.add_rate(fee_rate)
+
+    def notify(self, result, event, detectors):
+        # run the checks of the detectors subscribed to the statement of event
+        if self.findings is None or self.findings.result is not result:
+            self.findings = Findings(result)
+        for detector in detectors:
+            detector.check(self, event)
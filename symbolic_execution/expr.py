@@ -0,0 +1,179 @@
+import weakref
+
+from z3 import Z3_OP_UNINTERPRETED, is_app, is_bv_value, is_const
+
+# Compact expression DAG of the values checked by the detectors.
+# The symbolic values stay z3 expressions, the detectors only inspect their
+# shape, a z3 value is lifted once per AST into hash-consed nodes whose facts
+# are computed once per node and shared by every expression containing it.
+
+# op of the uninterpreted constants (the symbolic variables) and of the numerals,
+# the other nodes are named after their z3 declaration, e.g. bvmul or bvudiv_i
+VAR = "var"
+NUM = "num"
+
+# nodes alive, by (op, args, value)
+_interned = weakref.WeakValueDictionary()
+
+# expressions lifted, the table is dropped when it is full
+LIFT_CACHE_LIMIT = 1 << 16
+
+
+class Node:
+    """A hash-consed expression, equal nodes are the same object.
+
+    value is the name of a VAR, the int of a NUM and the parameters of the
+    other declarations (e.g. the bounds of an extract), args are nodes.
+    """
+
+    __slots__ = ("op", "args", "value", "mul_or_div", "_variables", "__weakref__")
+
+    def __new__(cls, op, args=(), value=None):
+        key = (op, args, value)
+        node = _interned.get(key)
+        if node is None:
+            node = object.__new__(cls)
+            node.op = op
+            node.args = args
+            node.value = value
+            node.mul_or_div = op in ("bvmul", "bvudiv_i") or any(
+                arg.mul_or_div for arg in args
+            )
+            node._variables = None
+            _interned[key] = node
+        return node
+
+    def __reduce__(self):
+        # interned again when unpickled, e.g. in another process
+        return (Node, (self.op, self.args, self.value))
+
+    def variables(self):
+        # the VAR nodes below this one
+        if self._variables is None:
+            if self.op == VAR:
+                self._variables = frozenset([self])
+            else:
+                self._variables = frozenset().union(
+                    *(arg.variables() for arg in self.args)
+                )
+        return self._variables
+
+    def __repr__(self):
+        if self.op in (VAR, NUM):
+            return str(self.value)
+        return "%s(%s)" % (self.op, ", ".join(map(repr, self.args)))
+
+
+def var(name):
+    return Node(VAR, (), name)
+
+
+def num(value):
+    return Node(NUM, (), value)
+
+
+class Lifter:
+    """Nodes of the z3 values of a contract, lifted once per AST"""
+
+    def __init__(self):
+        # AST id -> (expression, node)
+        self.nodes = {}
+
+    def lift(self, expr):
+        entry = self.nodes.get(expr.get_id())
+        if entry is not None:
+            return entry[1]
+        if len(self.nodes) > LIFT_CACHE_LIMIT:
+            self.nodes = {}
+        stack = [(expr, False)]
+        while stack:
+            current, expanded = stack.pop()
+            key = current.get_id()
+            if key in self.nodes:
+                continue
+            if is_bv_value(current):
+                node = num(current.as_long())
+            elif is_const(current) and current.decl().kind() == Z3_OP_UNINTERPRETED:
+                node = var(current.decl().name())
+            elif not is_app(current):
+                node = Node(current.sexpr())
+            elif not expanded:
+                stack.append((current, True))
+                stack.extend((child, False) for child in current.children())
+                continue
+            else:
+                decl = current.decl()
+                node = Node(
+                    decl.name(),
+                    tuple(self.nodes[c.get_id()][1] for c in current.children()),
+                    tuple(p if isinstance(p, int) else str(p) for p in decl.params())
+                    or None,
+                )
+            self.nodes[key] = (current, node)
+        return self.nodes[expr.get_id()][1]
+
+
+def is_storage(node):
+    return node.op == VAR and node.value.startswith("Ia_store")
+
+
+def is_balance(node):
+    return node.op == VAR and (
+        node.value.startswith("balance_") or node.value == "IH_b"
+    )
+
+
+def is_caller(node):
+    return node.op == VAR and node.value == "Is"
+
+
+def is_mem(node):
+    return node.op == VAR and node.value.startswith("mem_")
+
+
+def is_env(node):
+    return node.op == VAR and node.value.startswith("IH_")
+
+
+def is_refund(node):
+    # Iv - x, the refund of the value sent (utils.is_subtracted_from_iv_or_balance)
+    return node.op == "bvadd" and node.args[0].op == VAR and node.args[0].value == "Iv"
+
+
+def scaled(node):
+    # a mul or div, not a refund
+    return node.mul_or_div and not is_refund(node)
+
+
+def fee_rate(node, chain_value):
+    # rate of a fee amount like bvudiv_i(5 * Iv, 100), chain_value reads the
+    # value of a storage variable of the contract, None when it is not a rate
+    if node.op != "bvudiv_i":
+        if node.op != "concat":
+            return None
+        # the low bits of a division
+        if node.args[1].op == "extract":
+            node = node.args[1].args[0]
+    factor = factor_value(node.args[0], chain_value)
+    denominator = operand_value(node.args[1], chain_value)  # 100
+    if factor and denominator:
+        return float(factor / denominator)  # 5/100
+    return None
+
+
+def factor_value(node, chain_value):
+    if node.op != "bvmul":
+        return None
+    # 5 in 5 * Iv
+    return operand_value(node.args[0], chain_value)
+
+
+def operand_value(node, chain_value):
+    if node.op == NUM:
+        return node.value
+    if is_storage(node):
+        try:
+            return chain_value(node.value)
+        except:
+            return None
+    return None
@@ -0,0 +1,209 @@
+from z3 import Z3_OP_UNINTERPRETED, is_app, is_const, is_expr
+
+# expressions whose variables are memoized, the memo is dropped when it is full
+VAR_CACHE_LIMIT = 1 << 16
+
+
+def function_liveness(func_blocks):
+    # block ident -> variables live after the PHIs of the block, in the local CFG
+    # of its function, the uses of a PHI are live at the end of the predecessors
+    uses = {}
+    defs = {}
+    phi_uses = {}
+    for block in func_blocks:
+        block_uses = set()
+        block_defs = set()
+        block_phi_uses = set()
+        for statement in block.statements:
+            variables = [v for v in statement.use_vals if isinstance(v, str)]
+            if statement.opcode == "PHI":
+                block_phi_uses.update(variables)
+            else:
+                block_uses.update(v for v in variables if v not in block_defs)
+            block_defs.update(v for v in statement.def_vals if isinstance(v, str))
+        uses[block.ident] = block_uses
+        defs[block.ident] = block_defs
+        phi_uses[block.ident] = block_phi_uses
+    live = {ident: set(block_uses) for ident, block_uses in uses.items()}
+    changed = True
+    while changed:
+        changed = False
+        for block in reversed(func_blocks):
+            out = set()
+            for succ in block.successors:
+                if succ.ident in live:
+                    out |= live[succ.ident] | phi_uses[succ.ident]
+            new = uses[block.ident] | (out - defs[block.ident])
+            if len(new) != len(live[block.ident]):
+                live[block.ident] = new
+                changed = True
+    return {ident: frozenset(variables) for ident, variables in live.items()}
+
+
+class StateFingerprints:
+    """Fingerprints of the states of the paths entering a join block, after its PHIs.
+
+    A path entering a block in the same state as an earlier path of the function
+    would only repeat its exploration and is cut, when the earlier path entered it
+    at the same or a smaller depth. A deeper one can be cut by the DEPTH_LIMIT
+    before reaching what this path would, whatever the search order.
+    The state is the block, the pending private calls, the values of the live
+    variables at the block and at the return sites, the storage, memory and
+    hashes, and the path constraints sharing a variable with any of them.
+    """
+
+    def __init__(self, blocks, tac_block_function):
+        self.blocks = blocks
+        self.tac_block_function = tac_block_function
+        # function -> block ident -> live variables at its entry
+        self.liveness = {}
+        # AST id -> (expression, ids of its variables)
+        self.var_cache = {}
+        # fingerprint -> (smallest depth, values kept alive for their AST ids)
+        self.seen = {}
+        self.checked = 0
+        self.pruned = 0
+
+    def reset(self):
+        # the states of a function only subsume the states of the same function
+        self.seen = {}
+
+    def live_variables(self, block):
+        func = self.tac_block_function[block.ident]
+        if func not in self.liveness:
+            func_blocks = [
+                b
+                for b in self.blocks.values()
+                if self.tac_block_function[b.ident] == func
+            ]
+            self.liveness[func] = function_liveness(func_blocks)
+        return self.liveness[func][block.ident]
+
+    def var_ids(self, expr):
+        # ids of the variables of expr, memoized per sub-expression
+        entry = self.var_cache.get(expr.get_id())
+        if entry is not None:
+            return entry[1]
+        if len(self.var_cache) > VAR_CACHE_LIMIT:
+            self.var_cache = {}
+        stack = [(expr, False)]
+        while stack:
+            current, expanded = stack.pop()
+            key = current.get_id()
+            if key in self.var_cache:
+                continue
+            if is_const(current):
+                ids = (
+                    frozenset([key])
+                    if current.decl().kind() == Z3_OP_UNINTERPRETED
+                    else frozenset()
+                )
+            elif not is_app(current):
+                ids = frozenset()
+            elif not expanded:
+                stack.append((current, True))
+                stack.extend((child, False) for child in current.children())
+                continue
+            else:
+                ids = frozenset().union(
+                    *(self.var_cache[c.get_id()][1] for c in current.children())
+                )
+            self.var_cache[key] = (current, ids)
+        return self.var_cache[expr.get_id()][1]
+
+    def fingerprint(self, params, block, state_key, constraints):
+        # hashable state of a path entering block, and the expressions it refers to
+        exprs = []
+
+        def key_of(value):
+            if is_expr(value):
+                exprs.append(value)
+                return ("expr", value.get_id())
+            if isinstance(value, (int, str)) or value is None:
+                return (type(value).__name__, value)
+            # any other value, compared by identity
+            exprs.append(value)
+            return ("object", id(value))
+
+        def dict_key(entries):
+            return frozenset((key, key_of(value)) for key, value in entries.items())
+
+        var_to_source = params.var_to_source
+        frames = []
+        live = [self.live_variables(block)]
+        private_calls = params.private_calls
+        while private_calls is not None:
+            (caller_block, _), private_calls = private_calls
+            frames.append(caller_block.ident)
+            if caller_block.successors:
+                live.append(self.live_variables(caller_block.successors[0]))
+        live_values = frozenset(
+            (var, key_of(var_to_source.get(var)))
+            for variables in live
+            for var in variables
+            if var in var_to_source
+        )
+        global_state = params.global_state
+        base, pages, words, symbolic = params.memory.content()
+        memory = (
+            base,
+            pages,
+            tuple((address, key_of(word)) for address, word in words),
+            tuple((address, key_of(word)) for address, word in symbolic),
+        )
+        state = (
+            block.ident,
+            tuple(frames),
+            state_key,
+            live_values,
+            dict_key(
+                {k: v for k, v in global_state.items() if k not in ("Ia", "balance")}
+            ),
+            dict_key(global_state["Ia"]),
+            dict_key(global_state["balance"]),
+            dict_key(params.sha3_list),
+            dict_key(params.loop_iterations),
+            frozenset(
+                (func, tuple(defs)) for func, defs in params.privatefun_defs.items()
+            ),
+            memory,
+        )
+        # the constraints on other variables cannot change what this path does next
+        var_ids = set()
+        for value in exprs:
+            if is_expr(value):
+                var_ids |= self.var_ids(value)
+        selected = [False] * len(constraints)
+        changed = True
+        while changed:
+            changed = False
+            for i, (constraint, ids) in enumerate(constraints):
+                if not selected[i] and not var_ids.isdisjoint(ids):
+                    selected[i] = True
+                    var_ids |= ids
+                    changed = True
+        relevant = [c for i, (c, _) in enumerate(constraints) if selected[i]]
+        exprs.extend(relevant)
+        return state + (frozenset(c.get_id() for c in relevant),), exprs
+
+    def subsumed(self, params, block, depth, state_key, constraints):
+        # True when an earlier path entered block in the same state
+        self.checked += 1
+        fingerprint, exprs = self.fingerprint(params, block, state_key, constraints)
+        seen = self.seen.get(fingerprint)
+        if seen is not None and seen[0] <= depth:
+            self.pruned += 1
+            return True
+        self.seen[fingerprint] = (depth, exprs)
+        return False
+
+    def counters(self):
+        return {"checked": self.checked, "pruned": self.pruned}
+
+    def add_counters(self, counters):
+        # counters of the same contract computed in another process
+        for key, value in counters.items():
+            setattr(self, key, getattr(self, key) + value)
+
+    def stats(self):
+        return self.counters()
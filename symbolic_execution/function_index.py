@@ -0,0 +1,302 @@
+import hashlib
+import re
+from collections import namedtuple
+
+from symbolic_execution import expr
+
+# Index of the findings of a function by a fingerprint of its code, shared by the
+# contracts containing the same function. The fingerprint is computed over the
+# TAC statements of the blocks the symbolic execution of the function can reach,
+# its private callees included, with the layout of the contract abstracted: the
+# blocks, statements and variables are numbered in their order of appearance,
+# the jump and call targets are blocks, and the wide constants (addresses,
+# immutables, hashes) are numbered by their first occurrence. The other
+# constants (amounts, masks) change the findings and are kept, as are the slots
+# of SLOAD and SSTORE and the listed slots, which the detectors match.
+
+# a statement of the function is "#<block>.<position>" in the stored findings
+POSITION = re.compile(r"^#(\d+)\.(\d+)$")
+# the function, its findings are keyed by its signature
+FUNCTION = "#function"
+
+NUMBER = re.compile(r"0x[0-9a-fA-F]+|\d+")
+
+# opcodes whose first use is the address of a block
+TARGET_OPCODES = {"JUMP", "JUMPI", "CALLPRIVATE"}
+# opcodes whose first use is a storage slot
+SLOT_OPCODES = {"SLOAD", "SSTORE"}
+
+WORD = (1 << 256) - 1
+
+# the layout of a function in its contract, positions are (block, statement) pairs
+Fingerprint = namedtuple("Fingerprint", ["digest", "idents", "positions", "constants"])
+
+
+def wide_constant(value):
+    # an address, immutable or hash, not a small number nor a bit mask
+    if not 1 << 64 <= value <= WORD:
+        return False
+    low = value & (value + 1) == 0
+    high = (value ^ WORD) & ((value ^ WORD) + 1) == 0
+    power = value & (value - 1) == 0
+    return not (low or high or power)
+
+
+def function_blocks(head, blocks):
+    # the blocks reachable from head in a canonical order, the target of a jump
+    # before its fall through and a private callee before the return site
+    order = []
+    index = {}
+    stack = [head]
+    while stack:
+        block = stack.pop()
+        if block.ident in index:
+            continue
+        index[block.ident] = len(order)
+        order.append(block)
+        stack.extend(reversed(block_successors(block, blocks)))
+    return order, index
+
+
+def block_successors(block, blocks):
+    # the successors of block in the order the executor follows them, the callee
+    # of a CALLPRIVATE is only linked to its call site during the execution
+    successors = list(block.successors)
+    for statement in block.statements:
+        target = statement.use_vals[0] if statement.use_vals else None
+        if not isinstance(target, int):
+            continue
+        if statement.opcode in ("JUMP", "JUMPI"):
+            # the target is picked as in exec_jumpi
+            targets = [s for s in successors if s.ident.startswith(hex(target))]
+            successors = targets + [s for s in successors if s not in targets]
+        elif statement.opcode == "CALLPRIVATE" and hex(target) in blocks:
+            successors.insert(0, blocks[hex(target)])
+    return successors
+
+
+class FunctionIndex:
+    """Fingerprints of the public functions of a contract, and the translation of
+    their findings to and from the layout-free form kept in the ResultCache."""
+
+    def __init__(self, blocks, loops, fund_transfer_info, state_dependency_info):
+        self.blocks = blocks
+        self.loops = loops
+        self.fund_transfer_info = fund_transfer_info
+        self.state_dependency_info = state_dependency_info
+        # the slots of the semantic analysis, never abstracted
+        self.slots = {
+            int(slot.split("_")[0], 16)
+            for slots in (
+                state_dependency_info.time_list,
+                state_dependency_info.supply_list,
+                state_dependency_info.pause_list,
+                state_dependency_info.slot_dependency_map,
+            )
+            for slot in slots
+        }
+        # funcSign -> Fingerprint
+        self.fingerprints = {}
+        self.hits = 0
+        self.misses = 0
+        self.stores = 0
+
+    def fingerprint(self, funcSign, head):
+        if funcSign in self.fingerprints:
+            return self.fingerprints[funcSign]
+        order, index = function_blocks(head, self.blocks)
+        variables = {}
+        constants = {}
+
+        def var(name):
+            return variables.setdefault(name, len(variables))
+
+        def value(successors, statement, position, use):
+            if isinstance(use, str):
+                return ("var", var(use))
+            if position == 0 and statement.opcode in TARGET_OPCODES:
+                for successor in successors:
+                    if successor.ident.startswith(hex(use)):
+                        return ("block", index[successor.ident])
+            if position == 0 and statement.opcode in SLOT_OPCODES:
+                return ("int", use)
+            if wide_constant(use) and use not in self.slots:
+                return ("wide", constants.setdefault(use, len(constants)))
+            return ("int", use)
+
+        code = []
+        idents = {}
+        for b, block in enumerate(order):
+            successors = block_successors(block, self.blocks)
+            statements = []
+            for s, statement in enumerate(block.statements):
+                idents[statement.ident] = (b, s)
+                statements.append(
+                    (
+                        statement.op,
+                        tuple(
+                            ("var", var(d)) if isinstance(d, str) else ("int", d)
+                            for d in statement.def_vals
+                        ),
+                        tuple(
+                            value(successors, statement, p, use)
+                            for p, use in enumerate(statement.use_vals)
+                        ),
+                    )
+                )
+            code.append(
+                (
+                    tuple(index[successor.ident] for successor in successors),
+                    tuple(statements),
+                )
+            )
+
+        # the facts of the semantic analysis the loops and the detectors use
+        loops = []
+        for block in order:
+            loop = self.loops.get(block.ident)
+            if loop is not None:
+                loops.append(
+                    (
+                        index[block.ident],
+                        tuple(sorted(index.get(b, -1) for b in loop.blocks)),
+                        tuple(sorted(index.get(b, -1) for b in loop.exits)),
+                        tuple(sorted(variables.get(v, -1) for v in loop.widened)),
+                    )
+                )
+        calls = []
+        for ident, operands in self.fund_transfer_info.calls.items():
+            if ident in idents:
+                # the recipient and amount by their canonical uses in the CALL
+                b, s = idents[ident]
+                uses = code[b][1][s][2]
+                statement = order[b].statements[s]
+                calls.append(
+                    (
+                        idents[ident],
+                        tuple(
+                            (
+                                uses[statement.operands.index(operand)]
+                                if operand in statement.operands
+                                else None
+                            )
+                            for operand in operands
+                        ),
+                    )
+                )
+        clearcall = self.fund_transfer_info.clearcall
+        info = self.state_dependency_info
+        facts = (
+            tuple(sorted(calls)),
+            funcSign in clearcall,
+            tuple(sorted(idents.get(i, (-1, -1)) for i in clearcall.get(funcSign, ()))),
+            funcSign in info.guarded_mint_map,
+            tuple(sorted(info.time_list)),
+            tuple(sorted(info.supply_list)),
+            tuple(sorted(info.pause_list)),
+            tuple(sorted(info.slot_dependency_map)),
+        )
+        digest = hashlib.sha256(repr((code, loops, facts)).encode()).hexdigest()
+        fingerprint = Fingerprint(
+            digest,
+            idents,
+            {position: ident for ident, position in idents.items()},
+            tuple(constants),
+        )
+        self.fingerprints[funcSign] = fingerprint
+        return fingerprint
+
+    def store(self, cache, funcSign, head, partial, rate_nodes):
+        # the findings of the function, in the layout-free form
+        fingerprint = self.fingerprint(funcSign, head)
+
+        def ident_key(key):
+            if key == funcSign:
+                return FUNCTION
+            if key in fingerprint.idents:
+                return "#%d.%d" % fingerprint.idents[key]
+            return key
+
+        cache.store(
+            (
+                rename_keys(partial, ident_key),
+                rate_nodes,
+                fingerprint.constants,
+            ),
+            "function",
+            fingerprint.digest,
+        )
+        self.stores += 1
+
+    def load(self, cache, funcSign, head):
+        # (findings, rate nodes) of a function with the same fingerprint, in the
+        # layout of this contract, None when there is none
+        fingerprint = self.fingerprint(funcSign, head)
+        entry = cache.load("function", fingerprint.digest)
+        if entry is None:
+            self.misses += 1
+            return None
+        partial, rate_nodes, constants = entry
+
+        def ident_key(key):
+            if key == FUNCTION:
+                return funcSign
+            match = POSITION.match(key) if isinstance(key, str) else None
+            if match is not None:
+                return fingerprint.positions[(int(match[1]), int(match[2]))]
+            return key
+
+        partial = rename_keys(partial, ident_key)
+        mapping = {
+            old: new for old, new in zip(constants, fingerprint.constants) if old != new
+        }
+        if mapping:
+            partial = substitute_constants(partial, mapping)
+            rate_nodes = [substitute_node(node, mapping) for node in rate_nodes]
+        self.hits += 1
+        return partial, rate_nodes
+
+    def stats(self):
+        return {"hits": self.hits, "misses": self.misses, "stores": self.stores}
+
+
+def rename_keys(value, rename):
+    if isinstance(value, dict):
+        return {rename(key): rename_keys(item, rename) for key, item in value.items()}
+    if isinstance(value, list):
+        return [rename_keys(item, rename) for item in value]
+    return value
+
+
+def substitute_constants(value, mapping):
+    # the wide constants of another contract in a plain result, replaced by the
+    # constants at the same places in this one
+    if isinstance(value, dict):
+        return {key: substitute_constants(item, mapping) for key, item in value.items()}
+    if isinstance(value, list):
+        return [substitute_constants(item, mapping) for item in value]
+    if isinstance(value, int) and not isinstance(value, bool):
+        return mapping.get(value, value)
+    if isinstance(value, str):
+
+        def replace(match):
+            text = match.group(0)
+            number = int(text, 0) if text.startswith("0x") else int(text)
+            if number not in mapping:
+                return text
+            return (
+                hex(mapping[number]) if text.startswith("0x") else str(mapping[number])
+            )
+
+        return NUMBER.sub(replace, value)
+    return value
+
+
+def substitute_node(node, mapping):
+    if node.op == expr.NUM:
+        return expr.num(mapping.get(node.value, node.value))
+    if not node.args:
+        return node
+    return expr.Node(
+        node.op, tuple(substitute_node(arg, mapping) for arg in node.args), node.value
+    )
@@ -2,7 +2,12 @@ from typing import Tuple, List, Union, Mapping, Set
 from collections import namedtuple, defaultdict
 from itertools import chain
 
-Statement = namedtuple('Statement', ['ident', 'op', 'operands', 'defs'])
+# opcode, def_vals and use_vals are precompiled by construct_cfg so that the
+# symbolic executor does no file I/O or string parsing per executed statement
+Statement = namedtuple(
+    'Statement',
+    ['ident', 'op', 'operands', 'defs', 'opcode', 'def_vals', 'use_vals'],
+)
 
 
 class Block:
@@ -127,6 +132,8 @@ def construct_cfg(path) -> Tuple[Mapping[str, Block], Mapping[str, Function]]:
             tac_block_function[block] = func_id
     tac_block_stmts = load_csv_multimap(path + 'TAC_Block.csv', reverse=True)
     tac_op = load_csv_map(path + 'TAC_Op.csv')
+    # constant values of variables, loaded once for all statements
+    tac_variable_value = load_csv_map(path + 'TAC_Variable_Value.csv')
 
     # Load statement defs/uses
     tac_defs: Mapping[str, List[Tuple[str, int]]] = defaultdict(list)
@@ -152,11 +159,12 @@ def construct_cfg(path) -> Tuple[Mapping[str, Block], Mapping[str, Function]]:
     for block_id in chain(*tac_function_blocks.values()):
         try:
             statements = [
-                Statement(
+                compile_stmt(
                     s_id,
                     tac_op[s_id],
                     [var for var, _ in sorted(tac_uses[s_id], key=lambda x: x[1])],
                     [var for var, _ in sorted(tac_defs[s_id], key=lambda x: x[1])],
+                    tac_variable_value,
                 )
                 for s_id in sorted(tac_block_stmts[block_id], key=stmt_sort_key)
             ]
@@ -194,19 +202,35 @@ def construct_cfg(path) -> Tuple[Mapping[str, Block], Mapping[str, Function]]:
     return blocks, functions, tac_block_function
 
 
-def emit_stmt(path, stmt: Statement):
-    tac_variable_value = load_csv_map(path + 'TAC_Variable_Value.csv')
-
-    def render_var(var: str):
-        if var in tac_variable_value:
-            return int(tac_variable_value[var], 16)
-        else:
-            return f"v{var.replace('0x', '')}"
+def render_var(var: str, tac_variable_value: Mapping[str, str]):
+    if var in tac_variable_value:
+        return int(tac_variable_value[var], 16)
+    else:
+        return f"v{var.replace('0x', '')}"
+
+
+def compile_stmt(
+    ident: str,
+    op: str,
+    operands: List[str],
+    defs: List[str],
+    tac_variable_value: Mapping[str, str],
+) -> Statement:
+    # defs/uses are stored as tuples, they are shared by every execution
+    # of the statement and must never be mutated by the executor
+    return Statement(
+        ident,
+        op,
+        operands,
+        defs,
+        op.split(" ")[0],
+        tuple(render_var(v, tac_variable_value) for v in defs),
+        tuple(render_var(v, tac_variable_value) for v in operands),
+    )
 
-    defs = [render_var(v) for v in stmt.defs]
-    uses = [render_var(v) for v in stmt.operands]
 
-    return defs, uses
+def emit_stmt(stmt: Statement):
+    return stmt.def_vals, stmt.use_vals
 
     # if defs:
     #     emit(f"{stmt.ident}: {', '.join(defs)} = {stmt.op} {', '.join(uses)}", out, 1)
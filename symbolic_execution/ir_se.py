@@ -1,5 +1,4 @@
 import errno
-import re
 import signal
 from symbolic_execution.ir_basic_blocks import *
 from z3 import *
@@ -8,8 +7,36 @@ from symbolic_execution.vargenerator import *
 import traceback
 from symbolic_execution.vargenerator import *
 from symbolic_execution.utils import *
-import zlib
-import base64
+from symbolic_execution.persistent import PersistentDict, PersistentList, CowList, fork
+from symbolic_execution.memory import EVMMemory
+from symbolic_execution.detectors import (
+    DETECTORS,
+    DetectorRegistry,
+    Store,
+    Transfer,
+    finding_key,
+)
+from symbolic_execution.fingerprint import StateFingerprints
+from symbolic_execution.function_index import FunctionIndex
+from symbolic_execution.loops import load_loops
+from symbolic_execution.merge import PATH_LIMIT, MergeRegions, merge_paths
+from symbolic_execution.portfolio import Portfolio
+from symbolic_execution.portfolio import new_solver as new_portfolio_solver
+from symbolic_execution.profiler import Profiler
+from symbolic_execution.query_cache import QueryCache
+from symbolic_execution.result_cache import ResultCache
+from symbolic_execution.simplify_cache import SimplifyCache
+from symbolic_execution.trace import Tracer
+from symbolic_execution.summary import (
+    BLOCK_LIMIT,
+    FunctionSummaries,
+    Summary,
+    summarizable_functions,
+)
+from symbolic_execution.search import new_worklist, compute_target_distances
+import time
+import collections
+import multiprocessing
 import logging
 import global_params
 
@@ -18,618 +45,1457 @@ log = logging.getLogger(__name__)
 # Store visited blocks
 visited_blocks = set()
 
+# engine of the parent process, inherited by the forked workers of SEEngine.run
+worker_engine = None
+
 UNSIGNED_BOUND_NUMBER = 2**256 - 1
 CONSTANT_ONES_159 = BitVecVal((1 << 160) - 1, 256)
+# recent models tried on a side of a branch before checking it
+MODEL_REUSE = 4
+# constraints whose variables are memoized, the memo is dropped when it is full
+ENTRY_CACHE_LIMIT = 1 << 16
 
 Assertion = namedtuple("Assertion", ["pc", "model"])
 Underflow = namedtuple("Underflow", ["pc", "model"])
 Overflow = namedtuple("Overflow", ["pc", "model"])
+Edge = namedtuple("Edge", ["v1", "v2"])
+# a path waiting in the worklist of the explorer
+PathState = namedtuple(
+    "PathState",
+    [
+        "params",
+        "block",
+        "pre_block",
+        "depth",
+        "func_call",
+        "current_func_name",
+        "constraints",
+    ],
+)
 
 
 class Parameter:
     def __init__(self, **kwargs):
         attr_defaults = {
-            "stack": [],
-            "calls": [],
-            "memory": [],
-            "visited": [],
-            "overflow_pcs": [],
-            "mem": {},
-            "var_to_source": {},
-            "sha3_list": {},
-            "global_state": {},
-            "path_conditions_and_vars": {},
+            "stack": CowList(),
+            "calls": CowList(),
+            "memory": EVMMemory(),
+            "visited": PersistentList(),
+            "overflow_pcs": CowList(),
+            "var_to_source": PersistentDict(),
+            "sha3_list": PersistentDict(),
+            "global_state": PersistentDict(),
+            "path_conditions_and_vars": PersistentDict(),
             "target_params": None,
             "privatefun_defs": {},
+            # (caller block, return defs) of the pending private calls, linked tuples
+            "private_calls": None,
+            # loop head -> iterations of the loop on the path
+            "loop_iterations": PersistentDict(),
+            # join block whose PHIs were already evaluated by a merge of paths
+            "merged_join": None,
         }
         for attr, default in six.iteritems(attr_defaults):
             setattr(self, attr, kwargs.get(attr, default))
 
     def copy(self):
-        _kwargs = custom_deepcopy(self.__dict__)
+        # O(1) per container, the paths only share the state before the fork
+        _kwargs = {attr: fork(value) for attr, value in six.iteritems(self.__dict__)}
+        global_state = _kwargs["global_state"]
+        for key in ("Ia", "balance"):
+            if key in global_state:
+                global_state[key] = fork(global_state[key])
+        path_conditions_and_vars = _kwargs["path_conditions_and_vars"]
+        path_conditions_and_vars["path_condition"] = fork(
+            path_conditions_and_vars["path_condition"]
+        )
         return Parameter(**_kwargs)
 
 
-def get_init_global_state(path_conditions_and_vars):
-    global_state = {"balance": {}, "pc": 0}
-    init_is = (
-        init_ia
-    ) = (
-        deposited_value
-    ) = (
-        sender_address
-    ) = (
-        receiver_address
-    ) = (
-        gas_price
-    ) = (
-        origin
-    ) = (
-        currentCoinbase
-    ) = (
-        currentNumber
-    ) = (
-        currentDifficulty
-    ) = (
-        currentGasLimit
-    ) = currentChainId = currentSelfBalance = currentBaseFee = currentTimestamp = None
-
-    sender_address = BitVec("Is", 256)
-    receiver_address = BitVec("Ia", 256)
-    deposited_value = BitVec("Iv", 256)
-    init_is = BitVec("init_Is", 256)
-    init_ia = BitVec("init_Ia", 256)
-
-    path_conditions_and_vars["Is"] = sender_address
-    path_conditions_and_vars["Ia"] = receiver_address
-    path_conditions_and_vars["Iv"] = deposited_value
-
-    # from s to a, s is sender, a is receiver
-    # v is the amount of ether deposited and transferred
-    constraint = deposited_value >= BitVecVal(0, 256)
-    path_conditions_and_vars["path_condition"].append(constraint)
-    constraint = init_is >= deposited_value
-    path_conditions_and_vars["path_condition"].append(constraint)
-    constraint = init_ia >= BitVecVal(0, 256)
-    path_conditions_and_vars["path_condition"].append(constraint)
-
-    # update the balances of the "caller" and "callee"
-    global_state["balance"]["Is"] = init_is - deposited_value
-    global_state["balance"]["Ia"] = init_ia + deposited_value
-
-    if not gas_price:
-        new_var_name = gen.gen_gas_price_var()
-        gas_price = BitVec(new_var_name, 256)
-        path_conditions_and_vars[new_var_name] = gas_price
-
-    if not origin:
-        new_var_name = gen.gen_origin_var()
-        origin = BitVec(new_var_name, 256)
-        path_conditions_and_vars[new_var_name] = origin
-
-    if not currentCoinbase:
-        new_var_name = "IH_c"
-        currentCoinbase = BitVec(new_var_name, 256)
-        path_conditions_and_vars[new_var_name] = currentCoinbase
-
-    if not currentNumber:
-        new_var_name = "IH_i"
-        currentNumber = BitVec(new_var_name, 256)
-        path_conditions_and_vars[new_var_name] = currentNumber
-
-    if not currentDifficulty:
-        new_var_name = "IH_d"
-        currentDifficulty = BitVec(new_var_name, 256)
-        path_conditions_and_vars[new_var_name] = currentDifficulty
-
-    if not currentGasLimit:
-        new_var_name = "IH_l"
-        currentGasLimit = BitVec(new_var_name, 256)
-        path_conditions_and_vars[new_var_name] = currentGasLimit
-
-    if not currentChainId:
-        new_var_name = "IH_cid"
-        currentChainId = BitVec(new_var_name, 256)
-        path_conditions_and_vars[new_var_name] = currentChainId
-
-    if not currentSelfBalance:
-        new_var_name = "IH_b"
-        currentSelfBalance = BitVec(new_var_name, 256)
-        path_conditions_and_vars[new_var_name] = currentSelfBalance
-
-    if not currentBaseFee:
-        new_var_name = "IH_f"
-        currentBaseFee = BitVec(new_var_name, 256)
-        path_conditions_and_vars[new_var_name] = currentBaseFee
-
-    if not currentTimestamp:
-        new_var_name = "IH_s"
-        currentTimestamp = BitVec(new_var_name, 256)
-        path_conditions_and_vars[new_var_name] = currentTimestamp
-
-    # the state of the current contract
-    if "Ia" not in global_state:
-        global_state["Ia"] = {}
-    global_state["miu_i"] = 0
-    global_state["value"] = deposited_value
-    global_state["sender_address"] = sender_address
-    global_state["receiver_address"] = receiver_address
-    global_state["gas_price"] = gas_price
-    global_state["origin"] = origin
-    global_state["currentCoinbase"] = currentCoinbase
-    global_state["currentTimestamp"] = currentTimestamp
-    global_state["currentNumber"] = currentNumber
-    global_state["currentDifficulty"] = currentDifficulty
-    global_state["currentGasLimit"] = currentGasLimit
-
-    global_state["currentChainId"] = currentChainId
-    global_state["currentSelfBalance"] = currentSelfBalance
-    global_state["currentBaseFee"] = currentBaseFee
-
-    return global_state
-
-
-def generate_dot_file(target_func):
+class CustomSolver:
+    """Solver of the path constraints of the explored path.
+
+    The feasibility of a condition on the path is a check of the path
+    constraints with the condition as an assumption, the path solver gets a
+    tracked literal implying the condition instead of a push/add/pop scope.
+    With CONSTRAINT_SLICING, a query is checked on a solver of its own slice
+    and the path constraints are only recorded in the frames, the path solver
+    has no scopes and is not rebuilt for another path.
     """
-    Generates a .dot file for the control flow graph based on visited_edges.
 
-    :param visited_edges: A dictionary where keys are namedtuples representing edges and
-                          values are the number of times the edge has been visited.
-    :param filename: The name of the output .dot file.
-    """
-    filename = str(target_func) + ".dot"
-    with open(filename, "w") as f:
-        f.write("digraph CFG {\n")
-        f.write("    node [shape=box];\n")
-
-        for edge, count in visited_edges.items():
-            current_edge_type = visited_edges_type.get(edge, "normal")
-
-            if current_edge_type == "private_call_return":
-                color = "red"
-            elif current_edge_type == "private_call_from":
-                color = "blue"
-            else:
-                color = "black"
-            f.write(
-                f'    "{edge.v1.ident}" -> "{edge.v2.ident}" [label="Visited: {count}", color="{color}"];\n'
-            )
-
-        f.write("}\n")
-
-
-class CustomSolver:
-    def __init__(self, parallel=0, timeout=0):
+    def __init__(
+        self,
+        parallel=0,
+        timeout=0,
+        query_cache=None,
+        profiler=None,
+        portfolio=None,
+        budget=None,
+    ):
         self.push_count = 0
-        if parallel == 1:
+        # (constraint, ids of its variables) added in every push frame
+        self.frames = [[]]
+        self.slicing = global_params.CONSTRAINT_SLICING
+        self.query_cache = query_cache
+        self.profiler = profiler
+        self.portfolio = portfolio
+        # the races of the portfolio end with the time budget of the function
+        self.budget = budget
+        self.last_model = None
+        # models of the last satisfiable checks, newest first
+        self.models = collections.deque(maxlen=MODEL_REUSE)
+        self.parallel = parallel
+        self.timeout = timeout
+        # id -> constraint of the paths kept on an unknown result, or never checked
+        self.uncertain = {}
+        # constraint id -> (constraint, ids of its variables)
+        self.entry_cache = {}
+        self.solver = self.new_solver()
+        self.solver.add()
+        # constraint id -> (constraint, literal implying it in self.solver, frame)
+        self.literals = {}
+
+    def new_solver(self):
+        if self.parallel == 1:
             t2 = Then("simplify", "solve-eqs", "smt")
             _t = Then("tseitin-cnf-core", "split-clause")
             t1 = ParThen(_t, t2)
-            self.solver = OrElse(t1, t2).solver()
+            solver = OrElse(t1, t2).solver()
         else:
-            self.solver = Solver()
-        self.solver.set("timeout", timeout)
-        self.solver.add()
+            solver = Solver()
+        solver.set("timeout", self.timeout)
+        return solver
 
     def push(self):
-        self.solver.push()
+        if not self.slicing:
+            self.solver.push()
+        self.frames.append([])
         self.push_count += 1
 
     def pop(self):
         if self.push_count > 0:
-            self.solver.pop()
+            self.frames.pop()
             self.push_count -= 1
+            if self.slicing:
+                return
+            self.solver.pop()
+            # the implications of the literals added in the frame are gone
+            self.literals = {
+                key: entry
+                for key, entry in self.literals.items()
+                if entry[2] <= self.push_count
+            }
         else:
             raise Exception("Cannot pop from an empty stack!")
 
     def model(self):
+        if self.last_model is not None:
+            return self.last_model
         return self.solver.model()
 
     def can_pop(self):
         return self.push_count > 0
 
+    def path_constraints(self):
+        return tuple(entry for frame in self.frames for entry in frame)
+
+    def reset(self, constraints):
+        # continue with the constraints of another path
+        if constraints == self.path_constraints():
+            return
+        self.frames = [list(constraints)]
+        self.push_count = 0
+        if self.slicing:
+            # the path solver is not queried on the slices
+            return
+        self.solver = self.new_solver()
+        self.solver.add([constraint for constraint, _ in constraints])
+        self.literals = {}
+
+    def entries(self, constraints):
+        # (constraint, ids of its variables) of the constraints which are not true
+        entries = []
+        for constraint in constraints:
+            if not is_expr(constraint):
+                constraint = BoolVal(constraint)
+            entry = self.entry_cache.get(constraint.get_id())
+            if entry is None:
+                if is_true(constraint):
+                    continue
+                if len(self.entry_cache) > ENTRY_CACHE_LIMIT:
+                    self.entry_cache = {}
+                var_ids = frozenset(var.get_id() for var in get_vars(constraint))
+                entry = self.entry_cache[constraint.get_id()] = (constraint, var_ids)
+            entries.append(entry)
+        return entries
+
     def add(self, *args):
-        return self.solver.add(*args)
+        for arg in args:
+            self.frames[-1].extend(
+                self.entries(arg if isinstance(arg, (list, tuple)) else [arg])
+            )
+        if not self.slicing:
+            self.solver.add(*args)
+
+    def with_constraints(self, conditions, checked=True):
+        # the path constraints with the conditions, the constraints of a
+        # path continuing with them, unchecked ones are not known satisfiable
+        entries = self.entries(conditions)
+        if not checked:
+            self.uncertain.update((c.get_id(), c) for c, _ in entries)
+        return self.path_constraints() + tuple(entries)
+
+    def known_sat(self):
+        # the path constraints were found satisfiable, by the checks adding them
+        return not self.uncertain or not any(
+            constraint.get_id() in self.uncertain
+            for constraint, _ in self.path_constraints()
+        )
 
-    def check(self):
-        return self.solver.check()
+    def independent_slice(self, query):
+        # the constraints of the query, and the ones of the path sharing variables
+        # with it, directly or through other constraints, the rest of the path
+        # is independent and already satisfiable
+        entries = self.path_constraints()
+        if not entries:
+            return [constraint for constraint, _ in query]
+        selected = [False] * len(entries)
+        var_ids = set().union(*(ids for _, ids in query))
+        changed = True
+        while changed:
+            changed = False
+            for i, (constraint, ids) in enumerate(entries):
+                if not selected[i] and not var_ids.isdisjoint(ids):
+                    selected[i] = True
+                    var_ids |= ids
+                    changed = True
+        return [entry[0] for i, entry in enumerate(entries) if selected[i]] + [
+            constraint for constraint, _ in query
+        ]
+
+    def check(self, *conditions):
+        # satisfiability of the path constraints with the conditions assumed,
+        # without conditions the constraints of the last frame are the query
+        self.last_model = None
+        if conditions:
+            query = self.entries(conditions)
+            if any(is_false(constraint) for constraint, _ in query):
+                return unsat
+        else:
+            query = self.frames[-1]
+            self.frames[-1] = []
+        try:
+            ret = self.check_query(query, bool(conditions))
+        finally:
+            if not conditions:
+                self.frames[-1] = query
+        if ret == unknown:
+            self.uncertain.update((c.get_id(), c) for c, _ in query)
+        elif self.last_model is not None:
+            self.models.appendleft(self.last_model)
+        return ret
+
+    def check_query(self, query, assumed):
+        if not self.slicing and self.query_cache is None and self.portfolio is None:
+            return self.check_path(query, assumed)
+        if self.slicing:
+            if query:
+                constraints = self.independent_slice(query)
+            else:
+                constraints = [constraint for constraint, _ in self.path_constraints()]
+        else:
+            constraints = [
+                constraint for constraint, _ in self.path_constraints() + tuple(query)
+            ]
+        if self.query_cache is not None:
+            key = frozenset(constraint.get_id() for constraint in constraints)
+            cached = self.query_cache.lookup(key, constraints)
+            if cached is not None:
+                ret, self.last_model = cached
+                return ret
+        start = time.time()
+        ret, model = self.solve(constraints, query, assumed)
+        if self.query_cache is not None:
+            self.query_cache.store(key, constraints, ret, model, time.time() - start)
+        self.last_model = model
+        return ret
+
+    def solve(self, constraints, query, assumed):
+        # (result, model) of the constraints, the query is assumed on the path
+        # solver, the ones left unknown go to the portfolio
+        if self.slicing:
+            solver = self.new_solver()
+            # same incremental mode as the path solver
+            solver.push()
+            solver.add(constraints)
+            ret = self.timed_check(solver)
+            model = solver.model() if ret == sat else None
+        else:
+            ret = self.check_path(query, assumed)
+            model = self.last_model
+        if ret != unknown or self.portfolio is None:
+            return ret, model
+        # the configuration winning most often on the kind of query, then a race
+        preferred = self.portfolio.preferred(constraints)
+        if preferred is not None and self.portfolio_timeout() > 0:
+            solver = new_portfolio_solver(preferred, self.portfolio_timeout())
+            solver.add(constraints)
+            ret = self.timed_check(solver)
+            if ret != unknown:
+                self.portfolio.preferred_hits += 1
+                return ret, solver.model() if ret == sat else None
+        if self.portfolio_timeout() <= 0:
+            return unknown, None
+        start = time.perf_counter()
+        ret, model = self.portfolio.race(constraints, self.portfolio_timeout())
+        if self.profiler is not None:
+            self.profiler.check(ret, time.perf_counter() - start)
+        return ret, model
+
+    def portfolio_timeout(self):
+        # timeout of a portfolio check in ms, at most the time left to the function
+        if self.budget is None:
+            return self.portfolio.timeout
+        return int(min(self.portfolio.timeout, self.budget.remaining() * 1000))
+
+    def check_path(self, query, assumed):
+        # check with the path solver, the assumed query through its literals
+        if not assumed:
+            ret = self.timed_check(self.solver)
+        else:
+            ret = self.timed_check(
+                self.solver, [self.literal(constraint) for constraint, _ in query]
+            )
+        self.last_model = self.solver.model() if ret == sat else None
+        return ret
+
+    def literal(self, constraint):
+        # a fresh boolean implying the constraint in the path solver, the
+        # constraint only holds in the checks assuming the literal
+        entry = self.literals.get(constraint.get_id())
+        if entry is None:
+            literal = Bool("assume_%d" % constraint.get_id())
+            self.solver.add(Implies(literal, constraint))
+            entry = (constraint, literal, self.push_count)
+            self.literals[constraint.get_id()] = entry
+        return entry[1]
+
+    def branch(self, condition, negation):
+        # feasibility of both sides of a conditional jump, a side is satisfied
+        # by the last model or implied by the infeasibility of the other one,
+        # both sides are checked on a path with uncertain constraints
+        sides = [condition, negation]
+        results = [None, None]
+        known_sat = self.known_sat()
+        decided = self.satisfied_by_model(sides) if known_sat else None
+        if decided is not None:
+            results[decided] = sat
+        for i, side in enumerate(sides):
+            if results[i] is not None:
+                continue
+            if results[1 - i] == unsat and known_sat:
+                results[i] = sat
+            else:
+                results[i] = self.check(side)
+        return results
+
+    def satisfied_by_model(self, sides):
+        # index of the side satisfied by a recent model, if it satisfies the
+        # path constraints the side depends on, else None
+        if not self.models:
+            return None
+        query = self.entries(sides[:1])
+        if not query:
+            return None
+        if self.slicing:
+            constraints = self.independent_slice(query)[: -len(query)]
+        else:
+            constraints = [constraint for constraint, _ in self.path_constraints()]
+        for model in self.models:
+            if all(
+                is_true(model.eval(constraint, model_completion=True))
+                for constraint in constraints
+            ):
+                for i, side in enumerate(sides):
+                    if is_true(model.eval(side, model_completion=True)):
+                        return i
+        return None
 
+    def timed_check(self, solver, assumptions=()):
+        if self.profiler is None:
+            return solver.check(*assumptions)
+        start = time.perf_counter()
+        ret = solver.check(*assumptions)
+        self.profiler.check(ret, time.perf_counter() - start)
+        return ret
 
-def initGlobalVars():
-    # Initialize global variables
-    global solver
-    # Z3 solver
-    solver = CustomSolver(global_params.PARALLEL, global_params.TIMEOUT)
 
-    global MSIZE
-    MSIZE = False
+class TimeoutError(Exception):
+    pass
 
-    global revertible_overflow_pcs
-    revertible_overflow_pcs = set()
 
-    global g_timeout
-    g_timeout = False
+class Timeout:
+    """Timeout class using ALARM signal."""
 
-    global visited_pcs
-    visited_pcs = set()
+    def __init__(self, sec=10, error_message=os.strerror(errno.ETIME)):
+        self.sec = sec
+        self.error_message = error_message
 
-    global results
-    global start_block_to_func_sig
-    start_block_to_func_sig = {}
+    def __enter__(self):
+        signal.signal(signal.SIGALRM, self._handle_timeout)
+        signal.alarm(self.sec)
 
-    results = {
-        "evm_code_coverage": "",
-        "instructions": "",
-        "time": "",
-    }
+    def __exit__(self, *args):
+        signal.alarm(0)  # disable alarm
 
-    global calls_affect_state
-    calls_affect_state = {}
+    def _handle_timeout(self, signum, frame):
+        raise TimeoutError(self.error_message)
 
-    # capturing the last statement of each basic block
-    global end_ins_dict
-    end_ins_dict = {}
 
-    # capturing all the instructions, keys are corresponding addresses
-    global instructions
-    instructions = {}
+class TimeBudget:
+    """Time budget of a contract, checked cooperatively by the path explorer.
 
-    # capturing the "jump type" of each basic block
-    global jump_type
-    jump_type = {}
+    Every function gets an even share of the time left, so the time unused by
+    the quick functions goes to the next ones.
+    """
 
-    global vertices
-    vertices = {}
+    def __init__(self, seconds, functions, workers=1):
+        self.deadline = time.time() + seconds if seconds > 0 else float("inf")
+        self.pending = functions
+        self.workers = workers
+        self.function_deadline = self.deadline
 
-    global edges
-    edges = {}
+    def start_function(self):
+        now = time.time()
+        share = max(self.deadline - now, 0) * self.workers / max(self.pending, 1)
+        # the other workers start a function meanwhile
+        self.pending -= self.workers
+        self.function_deadline = min(now + share, self.deadline)
 
-    global visited_edges
-    visited_edges = {}
+    def expired(self):
+        return time.time() > self.function_deadline
 
-    global visited_edges_type
-    visited_edges_type = {}
+    def remaining(self):
+        # seconds left to the function
+        return max(self.function_deadline - time.time(), 0)
 
-    global money_flow_all_paths
-    money_flow_all_paths = []
 
-    global reentrancy_all_paths
-    reentrancy_all_paths = []
+# opcode -> handler, filled by the opcode_handler decorator below
+# every handler is an SEEngine method
+# called as handler(engine, params, block, statement, defs, uses)
+OPCODE_HANDLERS = {}
 
-    # store the path condition corresponding to each path in money_flow_all_paths
-    global path_conditions
-    path_conditions = []
 
-    global global_problematic_pcs  # for different defects
-    global_problematic_pcs = {
-        "integer_underflow": [],
-        "integer_overflow": [],
-    }
+def opcode_handler(*opcodes):
+    def register(handler):
+        for opcode in opcodes:
+            OPCODE_HANDLERS[opcode] = handler
+        return handler
 
-    # store global variables, e.g. storage, balance of all paths
-    global all_gs
-    all_gs = []
+    return register
 
-    global total_no_of_paths
-    total_no_of_paths = 0
 
-    global no_of_test_cases
-    no_of_test_cases = 0
+def resolve(var_to_source, var):
+    # the tracked value of a variable, constants are used as they are
+    return var_to_source.get(var, var)
 
-    # to generate names for symbolic variables
-    global gen
-    gen = Generator()
 
+# environment and block header values kept in the global state
+ENV_GLOBAL_STATE_KEYS = {
+    # caller that is directly responsible for this execution
+    "CALLER": "sender_address",
+    "ORIGIN": "origin",
+    # buy function feature: msg.value to transfer the token
+    "CALLVALUE": "value",
+    "GASPRICE": "gas_price",
+    "COINBASE": "currentCoinbase",
+    "TIMESTAMP": "currentTimestamp",
+    "NUMBER": "currentNumber",
+    "DIFFICULTY": "currentDifficulty",
+    "GASLIMIT": "currentGasLimit",
+    # address(this).balance
+    "SELFBALANCE": "currentSelfBalance",
+    "CHAINID": "currentChainId",
+    "BASEFEE": "currentBaseFee",
+}
 
-def run_build_cfg_and_analyze(target_params):
-    initGlobalVars()
-    build_cfg_and_analyze(target_params)
-    # global g_timeout
 
-    # try:
-    #     with Timeout(sec=global_params.GLOBAL_TIMEOUT):
-    #         build_cfg_and_analyze(target_params)
-    #     log.debug("Done Symbolic execution")
-    # except TimeoutError:
-    #     g_timeout = True
-    #     log.critical("Timeout!")
+class SEEngine:
+    """Symbolic execution of the targeted functions of a contract.
 
+    All the engine state is kept in the instance, the functions can therefore be
+    analyzed in worker processes, each with its own engine and z3 context.
+    """
 
-class TimeoutError(Exception):
-    pass
+    def __init__(self, inputs, state):
+        self.inputs = inputs
+        self.result = new_result(inputs)
+        self.blocks = inputs["blocks"]
+        self.functions = inputs["functions"]
+        self.tac_block_function = inputs["tac_block_function"]
+        self.funcs_to_be_checked = inputs["funcs_to_be_checked"]
+        self.fund_transfer_graph = inputs["fund_transfer_graph"]
+        self.state_dependency_graph = inputs["state_dependency_graph"]
+        self.func_map = inputs["func_map"]
+        self.path = inputs["path"]
+        self.state_extractor = state
+        self.g_disasm_file = inputs["dasm_path"]
+        # findings per function of the contracts analyzed before, by the
+        # runtime bytecode hash or by the fingerprint of the function
+        self.result_cache = (
+            ResultCache(global_params.RESULT_CACHE)
+            if global_params.RESULT_CACHE
+            and (inputs.get("code_hash") or global_params.FUNCTION_INDEX)
+            else None
+        )
+        # solver results shared by all the functions of the contract
+        self.query_cache = (
+            QueryCache(global_params.QUERY_CACHE) if global_params.QUERY_CACHE else None
+        )
+        # solver configurations raced on the queries left unknown, and their wins
+        self.portfolio = (
+            Portfolio(global_params.PORTFOLIO_TIMEOUT)
+            if global_params.PORTFOLIO
+            else None
+        )
+        self.simplify_cache = (
+            SimplifyCache(global_params.SIMPLIFY_CACHE)
+            if global_params.SIMPLIFY_CACHE
+            else None
+        )
+        # pure private functions applied at their call sites instead of re-executed
+        self.function_summaries = (
+            FunctionSummaries(
+                summarizable_functions(self.blocks, self.tac_block_function)
+            )
+            if global_params.FUNCTION_SUMMARIES
+            else None
+        )
+        # loop head ident -> Loop, from the loop facts of the decompilation
+        self.loops = (
+            load_loops(self.path, self.blocks) if global_params.LOOP_UNROLL else {}
+        )
+        # fingerprints of the public functions, to share their findings with the
+        # same functions of other contracts
+        self.function_index = (
+            FunctionIndex(
+                self.blocks,
+                self.loops,
+                self.fund_transfer_graph,
+                self.state_dependency_graph,
+            )
+            if self.result_cache is not None and global_params.FUNCTION_INDEX
+            else None
+        )
+        # both sides of the small branches continued as one path at their join point
+        self.merge_regions = (
+            MergeRegions(self.blocks, self.tac_block_function, self.loops)
+            if global_params.STATE_MERGING
+            else None
+        )
+        # states already explored, checked at the join blocks
+        self.fingerprints = (
+            StateFingerprints(self.blocks, self.tac_block_function)
+            if global_params.STATE_PRUNING
+            else None
+        )
+        # trace of the executor, see symbolic_execution.trace
+        self.trace = Tracer(global_params.TRACE, global_params.TRACE_BUFFER)
+        # opcode, solver and path counters, with --profile
+        self.profiler = Profiler() if global_params.PROFILE else None
+        # the detectors subscribed to the CALL/SSTORE statements
+        self.detectors = DetectorRegistry(
+            DETECTORS,
+            self.blocks,
+            self.fund_transfer_graph,
+            self.state_dependency_graph,
+            state,
+        )
+        # block ident -> distance to the nearest CALL/SSTORE target,
+        # for the "distance" search and the pruning of the paths without targets
+        self.target_distances = None
+        # findings-complete mode: the detectors whose verdict the analyzed
+        # function can still change, and their target distances by detector names
+        self.outstanding = None
+        self.focused_funcSign = None
+        self.detector_distances = {}
+        if (
+            global_params.SEARCH_STRATEGY == "distance"
+            or global_params.PRUNE_PATHS
+            or global_params.FINDINGS_COMPLETE
+        ):
+            self.target_distances = compute_target_distances(
+                self.blocks,
+                self.tac_block_function,
+                self.fund_transfer_graph,
+                self.state_dependency_graph,
+            )
 
+    def caches(self):
+        # the enabled per-contract caches, by name
+        caches = {
+            "query": self.query_cache,
+            "portfolio": self.portfolio,
+            "simplify": self.simplify_cache,
+            "summary": self.function_summaries,
+            "merge": self.merge_regions,
+            "fingerprint": self.fingerprints,
+        }
+        return {name: cache for name, cache in caches.items() if cache is not None}
+
+    def simplify(self, expr):
+        if self.simplify_cache is not None:
+            return self.simplify_cache.simplify(expr)
+        return to_concrete(simplify(expr)) if is_expr(expr) else expr
+
+    def get_init_global_state(self, path_conditions_and_vars):
+        global_state = PersistentDict({"balance": PersistentDict(), "pc": 0})
+        init_is = (
+            init_ia
+        ) = (
+            deposited_value
+        ) = (
+            sender_address
+        ) = (
+            receiver_address
+        ) = (
+            gas_price
+        ) = (
+            origin
+        ) = (
+            currentCoinbase
+        ) = (
+            currentNumber
+        ) = (
+            currentDifficulty
+        ) = (
+            currentGasLimit
+        ) = currentChainId = currentSelfBalance = currentBaseFee = currentTimestamp = None
+
+        sender_address = BitVec("Is", 256)
+        receiver_address = BitVec("Ia", 256)
+        deposited_value = BitVec("Iv", 256)
+        init_is = BitVec("init_Is", 256)
+        init_ia = BitVec("init_Ia", 256)
+
+        path_conditions_and_vars["Is"] = sender_address
+        path_conditions_and_vars["Ia"] = receiver_address
+        path_conditions_and_vars["Iv"] = deposited_value
+
+        # from s to a, s is sender, a is receiver
+        # v is the amount of ether deposited and transferred
+        constraint = deposited_value >= BitVecVal(0, 256)
+        path_conditions_and_vars["path_condition"].append(constraint)
+        constraint = init_is >= deposited_value
+        path_conditions_and_vars["path_condition"].append(constraint)
+        constraint = init_ia >= BitVecVal(0, 256)
+        path_conditions_and_vars["path_condition"].append(constraint)
 
-class Timeout:
-    """Timeout class using ALARM signal."""
+        # update the balances of the "caller" and "callee"
+        global_state["balance"]["Is"] = init_is - deposited_value
+        global_state["balance"]["Ia"] = init_ia + deposited_value
+
+        if not gas_price:
+            new_var_name = self.gen.gen_gas_price_var()
+            gas_price = BitVec(new_var_name, 256)
+            path_conditions_and_vars[new_var_name] = gas_price
+
+        if not origin:
+            new_var_name = self.gen.gen_origin_var()
+            origin = BitVec(new_var_name, 256)
+            path_conditions_and_vars[new_var_name] = origin
+
+        if not currentCoinbase:
+            new_var_name = "IH_c"
+            currentCoinbase = BitVec(new_var_name, 256)
+            path_conditions_and_vars[new_var_name] = currentCoinbase
+
+        if not currentNumber:
+            new_var_name = "IH_i"
+            currentNumber = BitVec(new_var_name, 256)
+            path_conditions_and_vars[new_var_name] = currentNumber
+
+        if not currentDifficulty:
+            new_var_name = "IH_d"
+            currentDifficulty = BitVec(new_var_name, 256)
+            path_conditions_and_vars[new_var_name] = currentDifficulty
+
+        if not currentGasLimit:
+            new_var_name = "IH_l"
+            currentGasLimit = BitVec(new_var_name, 256)
+            path_conditions_and_vars[new_var_name] = currentGasLimit
+
+        if not currentChainId:
+            new_var_name = "IH_cid"
+            currentChainId = BitVec(new_var_name, 256)
+            path_conditions_and_vars[new_var_name] = currentChainId
+
+        if not currentSelfBalance:
+            new_var_name = "IH_b"
+            currentSelfBalance = BitVec(new_var_name, 256)
+            path_conditions_and_vars[new_var_name] = currentSelfBalance
+
+        if not currentBaseFee:
+            new_var_name = "IH_f"
+            currentBaseFee = BitVec(new_var_name, 256)
+            path_conditions_and_vars[new_var_name] = currentBaseFee
+
+        if not currentTimestamp:
+            new_var_name = "IH_s"
+            currentTimestamp = BitVec(new_var_name, 256)
+            path_conditions_and_vars[new_var_name] = currentTimestamp
+
+        # the state of the current contract
+        if "Ia" not in global_state:
+            global_state["Ia"] = PersistentDict()
+        global_state["miu_i"] = 0
+        global_state["value"] = deposited_value
+        global_state["sender_address"] = sender_address
+        global_state["receiver_address"] = receiver_address
+        global_state["gas_price"] = gas_price
+        global_state["origin"] = origin
+        global_state["currentCoinbase"] = currentCoinbase
+        global_state["currentTimestamp"] = currentTimestamp
+        global_state["currentNumber"] = currentNumber
+        global_state["currentDifficulty"] = currentDifficulty
+        global_state["currentGasLimit"] = currentGasLimit
+
+        global_state["currentChainId"] = currentChainId
+        global_state["currentSelfBalance"] = currentSelfBalance
+        global_state["currentBaseFee"] = currentBaseFee
+
+        return global_state
+
+    def generate_dot_file(self, target_func):
+        """
+        Generates a .dot file for the control flow graph based on visited_edges.
+
+        :param visited_edges: A dictionary where keys are namedtuples representing edges and
+                              values are the number of times the edge has been visited.
+        :param filename: The name of the output .dot file.
+        """
+        filename = str(target_func) + ".dot"
+        with open(filename, "w") as f:
+            f.write("digraph CFG {\n")
+            f.write("    node [shape=box];\n")
+
+            for edge, count in self.visited_edges.items():
+                current_edge_type = self.visited_edges_type.get(edge, "normal")
+
+                if current_edge_type == "private_call_return":
+                    color = "red"
+                elif current_edge_type == "private_call_from":
+                    color = "blue"
+                else:
+                    color = "black"
+                f.write(
+                    f'    "{edge.v1.ident}" -> "{edge.v2.ident}" [label="Visited: {count}", color="{color}"];\n'
+                )
 
-    def __init__(self, sec=10, error_message=os.strerror(errno.ETIME)):
-        self.sec = sec
-        self.error_message = error_message
+            f.write("}\n")
+
+    def initGlobalVars(self):
+        # Initialize the state of a function
+        # Z3 solver
+        self.solver = CustomSolver(
+            global_params.PARALLEL,
+            global_params.TIMEOUT,
+            self.query_cache,
+            self.profiler,
+            self.portfolio,
+            self.budget,
+        )
 
-    def __enter__(self):
-        signal.signal(signal.SIGALRM, self._handle_timeout)
-        signal.alarm(self.sec)
+        self.MSIZE = False
 
-    def __exit__(self, *args):
-        signal.alarm(0)  # disable alarm
+        # the exploration ran out of its time budget
+        self.cut_short = False
 
-    def _handle_timeout(self, signum, frame):
-        raise TimeoutError(self.error_message)
+        # paths dropped since they cannot reach a target
+        self.pruned_paths = 0
 
+        if self.fingerprints is not None:
+            self.fingerprints.reset()
 
-def build_cfg_and_analyze(target_params):
-    targeted_sym_exec(target_params)
-    # generate_dot_file(target_params.funcSign)
+        self.visited_edges = {}
 
+        self.visited_edges_type = {}
 
-def targeted_sym_exec(target_params):
-    global blocks
-    # executing, starting from beginning
-    path_conditions_and_vars = {"path_condition": []}
-    global_state = get_init_global_state(path_conditions_and_vars)
-    params = Parameter(
-        path_conditions_and_vars=path_conditions_and_vars,
-        global_state=global_state,
-        target_params=target_params,
-    )
-    # mark the start block of the targeted function and begin SE
-    return sym_exec_block(
-        params, target_params.target_block, blocks["0x0"], 0, -1, "fallback"
-    )
+        # to generate names for symbolic variables
+        self.gen = Generator()
 
+    def run_build_cfg_and_analyze(self, target_params):
+        self.initGlobalVars()
+        # the time budget is checked by explore, the result keeps what was found in time
+        self.budget.start_function()
+        self.build_cfg_and_analyze(target_params)
 
-def sym_exec_block(params, block, pre_block, depth, func_call, current_func_name):
-    global solver
-    global visited_edges
-    global path_conditions
-    global global_problematic_pcs
-    global all_gs
-    global results
-
-    log.debug("==============================")
-    log.debug(block.ident)
-
-    visited = params.visited
-    # in fact, no use of stack
-    stack = params.stack
-    mem = params.mem
-    memory = params.memory
-    global_state = params.global_state
-    sha3_list = params.sha3_list
-    path_conditions_and_vars = params.path_conditions_and_vars
-    calls = params.calls
-
-    Edge = namedtuple("Edge", ["v1", "v2"])
-
-    if block.return_private_from != None:
-        pre_block = block.return_private_from
-
-    elif block.private_call_from != None:
-        pre_block = block.private_call_from
-
-    current_edge = Edge(pre_block, block)
-
-    if block.return_private_from != None:
-        visited_edges_type[current_edge] = "private_call_return"
-
-    elif block.private_call_from != None:
-        visited_edges_type[current_edge] = "private_call_from"
-
-    else:
-        visited_edges_type[current_edge] = "normal"
-
-    if current_edge in visited_edges:
-        updated_count_number = visited_edges[current_edge] + 1
-        visited_edges.update({current_edge: updated_count_number})
-    else:
-        visited_edges.update({current_edge: 1})
-
-    # print(current_edge[0].ident)
-    # print(current_edge[1].ident)
-    # print("count number: " + str(visited_edges[current_edge]))
-
-    if visited_edges[current_edge] > global_params.LOOP_LIMIT:
-        log.debug("Overcome a number of loop limit. Terminating this path ...")
-        return stack
-
-    # print(block)
-    # statement[1] = op
-    # se every statement in the block
-    for statement in block.statements:
-        # 'Statement', ['ident', 'op', 'operands', 'defs']
-        sym_exec_ins(params, block, statement, func_call, current_func_name)
-
-    visited.append(block)
-    depth += 1
-
-    # successors can only be 0 or 1 or 2 or 3
-    # CALLPRIVATE opcode can insert the successors to make it 3
-    successors = block.successors
-    # if find privatecall, first SE the called private function
-    if block.private_call_target != None:
-        successor = block.private_call_target
-        new_params = params.copy()
-        sym_exec_block(
-            new_params, successor, block, depth, func_call, current_func_name
-        )
+    def build_cfg_and_analyze(self, target_params):
+        self.targeted_sym_exec(target_params)
+        # generate_dot_file(target_params.funcSign)
 
-    elif block.return_private_target != None:
-        successor = block.return_private_target
-        new_params = params.copy()
-        sym_exec_block(
-            new_params, successor, block, depth, func_call, current_func_name
+    def targeted_sym_exec(self, target_params):
+        # executing, starting from beginning
+        path_conditions_and_vars = PersistentDict({"path_condition": PersistentList()})
+        global_state = self.get_init_global_state(path_conditions_and_vars)
+        params = Parameter(
+            path_conditions_and_vars=path_conditions_and_vars,
+            global_state=global_state,
+            target_params=target_params,
         )
-    # end block or out of depth
-    elif depth > global_params.DEPTH_LIMIT:
-        log.debug("Overcome a number of depth limit. Terminating this path ...")
-
-    elif len(successors) == 0:
-        log.debug("TERMINATING A PATH ...")
-
-    elif len(successors) == 1:
-        # unconditional jump opcode
-        successor = block.successors[0]
-        new_params = params.copy()
-        sym_exec_block(
-            new_params, successor, block, depth, func_call, current_func_name
+        # mark the start block of the targeted function and begin SE
+        worklist = new_worklist(global_params.SEARCH_STRATEGY, self.target_distances)
+        worklist.extend(
+            self.reachable(
+                [
+                    PathState(
+                        params,
+                        target_params.target_block,
+                        self.blocks["0x0"],
+                        0,
+                        -1,
+                        "fallback",
+                        self.solver.path_constraints(),
+                    )
+                ]
+            )
         )
+        self.explore(worklist)
+        if global_params.PRUNE_PATHS:
+            log.info("Pruned paths without targets: " + str(self.pruned_paths))
+
+    def explore(self, worklist):
+        while len(worklist):
+            if self.budget.expired():
+                log.warning("Out of time budget, %d paths left" % len(worklist))
+                self.cut_short = True
+                return
+            if self.outstanding is not None and not self.refocus():
+                log.info("Findings decided, %d paths left" % len(worklist))
+                return
+            state = worklist.pop()
+            self.solver.reset(state.constraints)
+            try:
+                states = self.sym_exec_block(*state[:-1])
+                if self.profiler is not None:
+                    self.profiler.paths(states)
+                worklist.extend(self.reachable(states))
+            except TimeoutError:
+                raise
+            except Exception:
+                traceback.print_exc()
+                self.trace.dump("path failed in block " + state.block.ident)
+
+    def reachable(self, states):
+        # drop the paths which cannot reach any statement checked by the detectors
+        if not global_params.PRUNE_PATHS and self.outstanding is None:
+            return states
+        live = [state for state in states if state.block.ident in self.target_distances]
+        self.pruned_paths += len(states) - len(live)
+        return live
+
+    def focus(self, funcSign):
+        # findings-complete mode: target the statements of the detectors whose
+        # verdict the function can still change, False when there are none
+        self.focused_funcSign = funcSign
+        self.outstanding = [
+            detector
+            for detector in DETECTORS
+            if not detector.decided(self.result)
+            and detector.applies(funcSign, self.state_dependency_graph)
+        ]
+        key = tuple(detector.name for detector in self.outstanding)
+        if key not in self.detector_distances:
+            self.detector_distances[key] = compute_target_distances(
+                self.blocks,
+                self.tac_block_function,
+                self.fund_transfer_graph,
+                self.state_dependency_graph,
+                self.outstanding,
+            )
+        self.target_distances = self.detector_distances[key]
+        return bool(self.outstanding)
 
-    elif len(successors) == 2:
-        # conditional jump
-        branch_expression = block.get_branch_expression()
-        solver.push()  # SET A BOUNDARY FOR SOLVER
-        solver.add(branch_expression)
+    def refocus(self):
+        # narrow the targets when a verdict got decided, False once all are
+        if any(detector.decided(self.result) for detector in self.outstanding):
+            return self.focus(self.focused_funcSign)
+        return True
 
-        try:
-            if solver.check() == unsat:
-                log.critical("INFEASIBLE PATH DETECTED")
-                # print("======JUMPI jump target======")
-                # print("INFEASIBLE PATH DETECTED")
-                # print(block.ident)
+    def sym_exec_block(
+        self, params, block, pre_block, depth, func_call, current_func_name
+    ):
+        # execute a block of a path, returns the successor paths to be explored
+
+        self.trace("block", "%s", block.ident)
+
+        visited = params.visited
+
+        if block.return_private_from != None:
+            pre_block = block.return_private_from
+
+        elif block.private_call_from != None:
+            pre_block = block.private_call_from
+
+        current_edge = Edge(pre_block, block)
+
+        if block.return_private_from != None:
+            self.visited_edges_type[current_edge] = "private_call_return"
+
+        elif block.private_call_from != None:
+            self.visited_edges_type[current_edge] = "private_call_from"
+
+        else:
+            self.visited_edges_type[current_edge] = "normal"
+
+        if current_edge in self.visited_edges:
+            updated_count_number = self.visited_edges[current_edge] + 1
+            self.visited_edges.update({current_edge: updated_count_number})
+        else:
+            self.visited_edges.update({current_edge: 1})
+
+        # print(current_edge[0].ident)
+        # print(current_edge[1].ident)
+        # print("count number: " + str(visited_edges[current_edge]))
+
+        if self.visited_edges[current_edge] > global_params.LOOP_LIMIT:
+            self.trace(
+                "path", "Loop limit in %s. Terminating this path ...", block.ident
+            )
+            return []
+
+        # a loop iterated LOOP_UNROLL times on the path is widened and left, through
+        # the exits of the head, and of its other blocks after one more iteration
+        loop = self.loops.get(block.ident)
+        widened = None
+        if loop is not None and loop.exits:
+            iterations = params.loop_iterations
+            if pre_block.ident in loop.blocks:
+                iterations[block.ident] = iterations.get(block.ident, 0) + 1
             else:
-                # true branch
-                left_branch = block.get_jump_target()
-                new_params = params.copy()
-                new_params.path_conditions_and_vars["path_condition"].append(
-                    branch_expression
+                iterations[block.ident] = 0
+            if iterations[block.ident] > global_params.LOOP_UNROLL + 1:
+                self.trace(
+                    "path", "Widened loop %s. Terminating this path ...", block.ident
                 )
-                last_idx = (
-                    len(new_params.path_conditions_and_vars["path_condition"]) - 1
+                return []
+            if iterations[block.ident] > global_params.LOOP_UNROLL:
+                widened = loop
+                self.widen(params, loop)
+
+        # the loop-carried values keep their fresh value,
+        # the values of merged paths their If
+        skip_phis = widened is not None or params.merged_join is block
+        params.merged_join = None
+
+        # se every statement in the block
+        check_state = self.fingerprints is not None and (
+            len(block.predecessors) != 1 or block.return_private_from is not None
+        )
+        for statement in block.statements:
+            # 'Statement', ['ident', 'op', 'operands', 'defs']
+            if statement.opcode == "PHI":
+                if skip_phis:
+                    continue
+            elif check_state:
+                # a join block entered again in an explored state, after its PHIs
+                check_state = False
+                if self.fingerprints.subsumed(
+                    params,
+                    block,
+                    depth,
+                    (func_call, current_func_name),
+                    self.solver.path_constraints(),
+                ):
+                    self.trace(
+                        "path", "Equivalent state explored. Terminating this path ..."
+                    )
+                    return []
+            self.sym_exec_ins(params, block, statement, func_call, current_func_name)
+
+        visited.append(block)
+        depth += 1
+
+        # successors can only be 0 or 1 or 2 or 3
+        # CALLPRIVATE opcode can insert the successors to make it 3
+        successors = block.successors
+        # a single successor continues with the params of this path, no copy needed
+        # if find privatecall, first SE the called private function
+        if block.private_call_target != None:
+            if self.function_summaries is not None:
+                next_states = self.apply_summary(
+                    params, block, depth, func_call, current_func_name
                 )
-                sym_exec_block(
-                    new_params, left_branch, block, depth, func_call, current_func_name
+                if next_states is not None:
+                    return next_states
+            successor = block.private_call_target
+            return [
+                PathState(
+                    params,
+                    successor,
+                    block,
+                    depth,
+                    func_call,
+                    current_func_name,
+                    self.solver.path_constraints(),
                 )
-        except TimeoutError:
-            raise
-        except Exception as e:
-            traceback.print_exc()
-
-        if solver.can_pop():
-            solver.pop()  # POP SOLVER CONTEXT
+            ]
 
-        solver.push()  # SET A BOUNDARY FOR SOLVER
-        negated_branch_expression = Not(branch_expression)
-        solver.add(negated_branch_expression)
+        elif block.return_private_target != None:
+            successor = block.return_private_target
+            return [
+                PathState(
+                    params,
+                    successor,
+                    block,
+                    depth,
+                    func_call,
+                    current_func_name,
+                    self.solver.path_constraints(),
+                )
+            ]
+        # end block or out of depth
+        elif depth > global_params.DEPTH_LIMIT:
+            self.trace(
+                "path", "Depth limit in %s. Terminating this path ...", block.ident
+            )
 
-        log.debug("Negated branch expression: " + str(negated_branch_expression))
+        elif len(successors) == 0:
+            self.trace("path", "TERMINATING A PATH ...")
 
-        try:
-            if solver.check() == unsat:
-                # Note that this check can be optimized. I.e. if the previous check succeeds,
-                # no need to check for the negated condition, but we can immediately go into
-                # the else branch
-                log.critical("INFEASIBLE PATH DETECTED")
-                # print("======JUMPI fall target======")
-                # print("INFEASIBLE PATH DETECTED")
-                # print(block.ident)
-            else:
-                right_branch = block.get_falls_to()
-                new_params = params.copy()
-                new_params.path_conditions_and_vars["path_condition"].append(
-                    negated_branch_expression
+        elif len(successors) == 1:
+            # unconditional jump opcode
+            successor = block.successors[0]
+            if (
+                widened is not None
+                and not widened.breaks
+                and successor.ident not in widened.exits
+            ):
+                return []
+            return [
+                PathState(
+                    params,
+                    successor,
+                    block,
+                    depth,
+                    func_call,
+                    current_func_name,
+                    self.solver.path_constraints(),
                 )
-                last_idx = (
-                    len(new_params.path_conditions_and_vars["path_condition"]) - 1
+            ]
+
+        elif len(successors) == 2:
+            # conditional jump
+            branch_expression = block.get_branch_expression()
+            negated_branch_expression = Not(branch_expression)
+            self.trace(
+                "branch", "Negated branch expression: %s", negated_branch_expression
+            )
+            next_states = []
+            # true branch first, then the fall through
+            sides = [
+                (branch, expression)
+                for branch, expression in (
+                    (block.get_jump_target(), branch_expression),
+                    (block.get_falls_to(), negated_branch_expression),
                 )
-                sym_exec_block(
-                    new_params, right_branch, block, depth, func_call, current_func_name
+                if widened is None or widened.breaks or branch.ident in widened.exits
+            ]
+            try:
+                if len(sides) == 2:
+                    results = self.solver.branch(
+                        branch_expression, negated_branch_expression
+                    )
+                else:
+                    results = [self.solver.check(expression) for _, expression in sides]
+                for (branch, expression), result in zip(sides, results):
+                    if result == unsat:
+                        self.trace(
+                            "branch", "INFEASIBLE PATH DETECTED to %s", branch.ident
+                        )
+                        continue
+                    new_params = params.copy()
+                    new_params.path_conditions_and_vars["path_condition"].append(
+                        expression
+                    )
+                    next_states.append(
+                        PathState(
+                            new_params,
+                            branch,
+                            block,
+                            depth,
+                            func_call,
+                            current_func_name,
+                            self.solver.with_constraints([expression]),
+                        )
+                    )
+            except TimeoutError:
+                raise
+            except Exception:
+                traceback.print_exc()
+                self.trace.dump("branch failed in block " + block.ident)
+            if self.merge_regions is not None and len(next_states) == 2:
+                merged = self.merge_branches(
+                    params,
+                    block,
+                    next_states,
+                    (branch_expression, negated_branch_expression),
                 )
+                if merged is not None:
+                    return merged
+            return next_states
+
+        else:
+            updated_count_number = self.visited_edges[current_edge] - 1
+            self.visited_edges.update({current_edge: updated_count_number})
+            raise Exception("Unknown Jump-Type")
+
+        return []
+
+    def merge_branches(self, params, block, states, expressions):
+        # execute both sides of a branch up to its join point and continue with
+        # one path, None when the branch is not worth merging
+        join = self.merge_regions.join(block)
+        if join is None:
+            return None
+        arrivals = []
+        try:
+            for state, expression in zip(states, expressions):
+                arrivals.extend(self.exec_region(state, join, expression))
+                if len(arrivals) > PATH_LIMIT:
+                    self.merge_regions.declined += 1
+                    return None
         except TimeoutError:
             raise
-        except Exception as e:
-            traceback.print_exc()
-        if solver.can_pop():
-            solver.pop()  # POP SOLVER CONTEXT
-        # updated_count_number = visited_edges[current_edge] - 1
-        # visited_edges.update({current_edge: updated_count_number})
-
-    else:
-        updated_count_number = visited_edges[current_edge] - 1
-        visited_edges.update({current_edge: updated_count_number})
-        raise Exception("Unknown Jump-Type")
-
-
-def sym_exec_ins(params, block, statement, func_call, current_func_name):
-    global MSIZE
-    global visited_pcs
-    global solver
-    global vertices
-    global edges
-    global blocks
-    global calls_affect_state
-    global instructions
-    global path
-    global result
-    global state_extractor
-    global g_disasm_file
-
-    stack = params.stack
-    mem = params.mem
-    memory = params.memory
-    global_state = params.global_state
-    sha3_list = params.sha3_list
-    path_conditions_and_vars = params.path_conditions_and_vars
-    calls = params.calls
-    overflow_pcs = params.overflow_pcs
-    # find recovered defs and uses from the decompiled IR
-    defs, uses = emit_stmt(path, statement)
-    # pass the stored states
-    var_to_source = params.var_to_source
-    target_params = params.target_params
-    privatefun_defs = params.privatefun_defs
-
-    current_func_id = functions[tac_block_function[block.ident]].ident
-    # mark the defs to the private function memory
-    if current_func_id in privatefun_defs.keys():
-        if isinstance(defs, list):
+        except Exception:
+            # the sides are explored as separate paths instead
+            log.debug("Cannot merge the branch of " + block.ident, exc_info=True)
+            self.merge_regions.declined += 1
+            return None
+        if len(arrivals) < 2:
+            # the other paths end in the region, without effect
+            self.merge_regions.merged += 1
+            for state, _ in arrivals:
+                state.params.merged_join = join
+            return [
+                state._replace(
+                    constraints=self.solver.with_constraints(conditions, checked=False)
+                )
+                for state, conditions in arrivals
+            ]
+        guards = [simplify(And(*conditions)) for _, conditions in arrivals]
+        condition = simplify(Or(guards))
+        merged = merge_paths(
+            params, [state.params for state, _ in arrivals], guards, condition
+        )
+        if merged is None:
+            self.merge_regions.declined += 1
+            return None
+        self.merge_regions.merged += 1
+        merged.merged_join = join
+        first = arrivals[0][0]
+        return [
+            first._replace(
+                params=merged,
+                depth=max(state.depth for state, _ in arrivals),
+                constraints=self.solver.with_constraints([condition], checked=False),
+            )
+        ]
+
+    def exec_region(self, state, join, expression):
+        # the paths from a side of a branch to the join point, as (state at the
+        # join point with its PHIs evaluated, branch conditions on the way)
+        arrivals = []
+        pending = [(state._replace(params=state.params.copy()), (expression,))]
+        while pending:
+            state, conditions = pending.pop()
+            params, block = state.params, state.block
+            if block is join:
+                for statement in block.statements:
+                    if statement.opcode == "PHI":
+                        self.sym_exec_ins(
+                            params,
+                            block,
+                            statement,
+                            state.func_call,
+                            state.current_func_name,
+                        )
+                arrivals.append((state, conditions))
+                continue
+            for statement in block.statements:
+                self.sym_exec_ins(
+                    params, block, statement, state.func_call, state.current_func_name
+                )
+            params.visited.append(block)
+            depth = state.depth + 1
+            if len(block.successors) == 1:
+                pending.append(
+                    (
+                        state._replace(
+                            block=block.successors[0], pre_block=block, depth=depth
+                        ),
+                        conditions,
+                    )
+                )
+            elif len(block.successors) == 2:
+                branch_expression = block.get_branch_expression()
+                if isinstance(branch_expression, bool):
+                    branch_expression = BoolVal(branch_expression)
+                for successor, expression in (
+                    (block.get_jump_target(), branch_expression),
+                    (block.get_falls_to(), Not(branch_expression)),
+                ):
+                    expression = simplify(expression)
+                    if is_false(expression):
+                        continue
+                    new_params = params.copy()
+                    new_conditions = conditions
+                    if not is_true(expression):
+                        new_params.path_conditions_and_vars["path_condition"].append(
+                            expression
+                        )
+                        new_conditions = conditions + (expression,)
+                    pending.append(
+                        (
+                            state._replace(
+                                params=new_params,
+                                block=successor,
+                                pre_block=block,
+                                depth=depth,
+                            ),
+                            new_conditions,
+                        )
+                    )
+        return arrivals
+
+    def widen(self, params, loop):
+        # any number of iterations: the loop-carried values, and the storage and
+        # memory the loop writes, are unknown
+        var_to_source = params.var_to_source
+        storage = params.global_state["Ia"]
+        memory = params.memory
+        for opcode, address, varying in loop.writes:
+            if varying:
+                # another address at every iteration
+                if opcode == "SSTORE":
+                    for key in list(storage):
+                        storage[key] = BitVec(self.gen.gen_arbitrary_var(), 256)
+                else:
+                    memory.clobber()
+                continue
+            address = resolve(var_to_source, address)
+            if opcode == "SSTORE":
+                key = address if isReal(address) else str(address)
+                storage[key] = BitVec(self.gen.gen_arbitrary_var(), 256)
+            elif opcode == "MSTORE":
+                memory.store(address, BitVec(self.gen.gen_arbitrary_var(), 256))
+            else:
+                memory.forget(address, 1)
+        for var in loop.widened:
+            new_var_name = self.gen.gen_arbitrary_var()
+            var_to_source[var] = BitVec(new_var_name, 256)
+
+    def apply_summary(self, params, block, depth, func_call, current_func_name):
+        # continue after the call of a pure private function without entering it,
+        # None when the function has no precise summary
+        callee = block.private_call_target
+        func = self.tac_block_function[callee.ident]
+        if func not in self.function_summaries.returning_blocks or not block.successors:
+            return None
+        statement = next(s for s in block.statements if s.opcode == "CALLPRIVATE")
+        var_to_source = params.var_to_source
+        actuals = [resolve(var_to_source, use) for use in statement.use_vals[1:]]
+        if not all(isReal(a) or (is_bv(a) and a.size() == 256) for a in actuals):
+            return None
+        key = (func, len(actuals))
+        if key not in self.function_summaries:
+            self.function_summaries.store(
+                key, self.summarize(func, callee, len(actuals))
+            )
+        summary = self.function_summaries.get(key)
+        if summary is None:
+            return None
+
+        substitution = [
+            (arg, to_symbolic(actual)) for arg, actual in zip(summary.args, actuals)
+        ]
+
+        def instantiate(value):
+            if isReal(value) or isinstance(value, bool):
+                return value
+            return self.simplify(substitute(value, *substitution))
+
+        # the conditions of the returning path, the other paths end in the callee
+        path_condition = params.path_conditions_and_vars["path_condition"]
+        constrained = False
+        for condition in summary.conditions:
+            condition = instantiate(condition)
+            if is_false(condition):
+                return []
+            if is_true(condition):
+                continue
+            self.solver.add(condition)
+            path_condition.append(condition)
+            constrained = True
+        if constrained and self.solver.check() == unsat:
+            self.trace("branch", "INFEASIBLE PATH DETECTED in the summary of %s", func)
+            return []
+
+        (caller_block, return_defs), params.private_calls = params.private_calls
+        for var, value in zip(return_defs, summary.returns):
+            var_to_source[var] = instantiate(value)
+        return [
+            PathState(
+                params,
+                block.successors[0],
+                block,
+                depth,
+                func_call,
+                current_func_name,
+                self.solver.path_constraints(),
+            )
+        ]
+
+    def summarize(self, func, callee, arg_num):
+        # execute the returning blocks of a pure private function once,
+        # on fresh variables standing for its arguments
+        returning = self.function_summaries.returning_blocks[func]
+        prefix = callee.ident.replace("0x", "v") + "arg"
+        args = [BitVec("%s_arg%d" % (func, i), 256) for i in range(arg_num)]
+        params = Parameter(
+            var_to_source=PersistentDict(
+                {prefix + str(i): arg for i, arg in enumerate(args)}
+            ),
+            path_conditions_and_vars=PersistentDict(
+                {"path_condition": PersistentList()}
+            ),
+        )
+        pending = [(params, callee, (), frozenset())]
+        summary = None
+        executed = 0
+        try:
+            while pending:
+                params, block, conditions, on_path = pending.pop()
+                executed += 1
+                if block.ident in on_path or executed > BLOCK_LIMIT:
+                    # loops are not summarized
+                    return None
+                on_path = on_path | {block.ident}
+                returned = None
+                for statement in block.statements:
+                    if statement.opcode == "RETURNPRIVATE":
+                        returned = [
+                            resolve(params.var_to_source, use)
+                            for use in statement.use_vals[1:]
+                        ]
+                        break
+                    self.sym_exec_ins(params, block, statement, -1, func)
+                if returned is not None:
+                    if summary is not None or any(isinstance(v, str) for v in returned):
+                        # more than one returning path, or an unknown value
+                        return None
+                    summary = Summary(args, conditions, returned)
+                elif len(block.successors) == 1:
+                    successor = block.successors[0]
+                    if successor.ident in returning:
+                        pending.append((params, successor, conditions, on_path))
+                elif len(block.successors) == 2:
+                    branch_expression = block.get_branch_expression()
+                    if isinstance(branch_expression, bool):
+                        branch_expression = BoolVal(branch_expression)
+                    for successor, expression in (
+                        (block.get_jump_target(), branch_expression),
+                        (block.get_falls_to(), Not(branch_expression)),
+                    ):
+                        expression = simplify(expression)
+                        if successor.ident not in returning or is_false(expression):
+                            continue
+                        branch_conditions = conditions
+                        if not is_true(expression):
+                            branch_conditions = conditions + (expression,)
+                        pending.append(
+                            (params.copy(), successor, branch_conditions, on_path)
+                        )
+                else:
+                    return None
+        except Exception:
+            log.debug("Cannot summarize " + func, exc_info=True)
+            return None
+        return summary
+
+    def sym_exec_ins(self, params, block, statement, func_call, current_func_name):
+        # find recovered defs and uses from the decompiled IR
+        # (precompiled by construct_cfg, no reload of the facts here)
+        defs, uses = emit_stmt(statement)
+        privatefun_defs = params.privatefun_defs
+
+        current_func_id = self.functions[self.tac_block_function[block.ident]].ident
+        # mark the defs to the private function memory
+        if current_func_id in privatefun_defs.keys():
             for subitem in defs:
                 if isinstance(subitem, str):
                     privatefun_defs[current_func_id].append(subitem)
 
-    # hex value tranformed to int type (base 10)
-    # var remain to strings
-
-    # no need to care about const
-    # its gonna be used in opcodes with real meaning
+        # hex value tranformed to int type (base 10)
+        # var remain to strings
 
-    instr = statement[1]
-    ident = statement[0]
+        # no need to care about const
+        # its gonna be used in opcodes with real meaning
 
-    instr_parts = str.split(instr, " ")
-    opcode = instr_parts[0]
-
-    if opcode == "INVALID":
-        return
-    elif opcode == "ASSERTFAIL":
-        return
+        # one lookup per statement instead of walking an if/elif chain
+        handler = OPCODE_HANDLERS.get(statement.opcode)
+        if handler is None:
+            self.trace("exec", "UNKNOWN INSTRUCTION: %s", statement.opcode)
+            return
 
-    # collecting the analysis result by calling this skeletal function
-    # this should be done before symbolically executing the instruction,
-    # since SE will modify the stack and mem
+        self.trace("exec", "EXECUTING: %s", statement.op)
+        if self.profiler is None:
+            handler(self, params, block, statement, defs, uses)
+            return
+        start = time.perf_counter()
+        handler(self, params, block, statement, defs, uses)
+        self.profiler.opcode(statement.opcode, time.perf_counter() - start)
+
+    # opcodes without effect on the tracked values
+    # - JUMP: the jump target is already known from the block successors
+    # - PUSH/DUP/SWAP: no stack operations in gigahorse IR, constants come as CONST
+    @opcode_handler(
+        "STOP",
+        "INVALID",
+        "ASSERTFAIL",
+        "POP",
+        "JUMP",
+        "PC",
+        "JUMPDEST",
+        "CONST",
+        "LOG0",
+        "LOG1",
+        "LOG2",
+        "LOG3",
+        "LOG4",
+        "REVERT",
+        "RETURN",
+        "THROW",
+        *["PUSH" + str(i) for i in range(1, 33)],
+        *["DUP" + str(i) for i in range(1, 17)],
+        *["SWAP" + str(i) for i in range(1, 17)],
+    )
+    def exec_nop(self, params, block, statement, defs, uses):
+        pass
 
-    log.debug("==============================")
-    log.debug("EXECUTING: " + instr)
-    if opcode == "STOP":
-        return
-    elif opcode == "ADD":
-        first = var_to_source[uses[0]] if uses[0] in var_to_source.keys() else uses[0]
-        second = var_to_source[uses[1]] if uses[1] in var_to_source.keys() else uses[1]
-        # Type conversion is needed when they are mismatched
-        if isReal(first) and isSymbolic(second):
-            first = BitVecVal(first, 256)
-            computed = first + second
-        elif isSymbolic(first) and isReal(second):
-            second = BitVecVal(second, 256)
-            computed = first + second
-        elif isSymbolic(first) and isSymbolic(second):
-            log.debug(f"First: {first}, Type of First: {type(first)}")
-            log.debug(f"Second: {second}, Type of Second: {type(second)}")
-            computed = first + second
-        else:
+    @opcode_handler("ADD")
+    def exec_add(self, params, block, statement, defs, uses):
+        var_to_source = params.var_to_source
+        first = resolve(var_to_source, uses[0])
+        second = resolve(var_to_source, uses[1])
+        if isAllReal(first, second):
             # both are real and we need to manually modulus with 2 ** 256
-            # if both are symbolic z3 takes care of modulus automatically
-            computed = (first + second) % (2**256)
-        computed = simplify(computed) if is_expr(computed) else computed
+            # if any is symbolic z3 takes care of modulus automatically
+            computed = (first + second) & UNSIGNED_BOUND_NUMBER
+        else:
+            # Type conversion is needed when they are mismatched
+            computed = to_symbolic(first) + to_symbolic(second)
+        computed = self.simplify(computed)
 
         # future will add overflow check
         # if not isAllReal(computed, first):
@@ -643,38 +1509,30 @@ def sym_exec_ins(params, block, statement, func_call, current_func_name):
         #     solver.pop()
         var_to_source[defs[0]] = computed
 
-    elif opcode == "MUL":
-        first = var_to_source[uses[0]] if uses[0] in var_to_source.keys() else uses[0]
-        second = var_to_source[uses[1]] if uses[1] in var_to_source.keys() else uses[1]
-        if isReal(first) and isSymbolic(second):
-            first = BitVecVal(first, 256)
-        elif isSymbolic(first) and isReal(second):
-            second = BitVecVal(second, 256)
-        elif isSymbolic(first) and isSymbolic(second):
-            log.debug(f"First: {first}, Type of First: {type(first)}")
-            log.debug(f"Second: {second}, Type of Second: {type(second)}")
-        computed = first * second & UNSIGNED_BOUND_NUMBER
-        computed = simplify(computed) if is_expr(computed) else computed
+    @opcode_handler("MUL")
+    def exec_mul(self, params, block, statement, defs, uses):
+        var_to_source = params.var_to_source
+        first = resolve(var_to_source, uses[0])
+        second = resolve(var_to_source, uses[1])
+        if isAllReal(first, second):
+            computed = first * second & UNSIGNED_BOUND_NUMBER
+        else:
+            computed = to_symbolic(first) * to_symbolic(second)
+        computed = self.simplify(computed)
         var_to_source[defs[0]] = computed
 
-    elif opcode == "SUB":
+    @opcode_handler("SUB")
+    def exec_sub(self, params, block, statement, defs, uses):
+        var_to_source = params.var_to_source
         if isReal(defs[0]):
             return
-        first = var_to_source[uses[0]] if uses[0] in var_to_source.keys() else uses[0]
-        second = var_to_source[uses[1]] if uses[1] in var_to_source.keys() else uses[1]
-        if isReal(first) and isSymbolic(second):
-            first = BitVecVal(first, 256)
-            computed = first - second
-        elif isSymbolic(first) and isReal(second):
-            second = BitVecVal(second, 256)
-            computed = first - second
-        elif isSymbolic(first) and isSymbolic(second):
-            log.debug(f"First: {first}, Type of First: {type(first)}")
-            log.debug(f"Second: {second}, Type of Second: {type(second)}")
-            computed = first - second
+        first = resolve(var_to_source, uses[0])
+        second = resolve(var_to_source, uses[1])
+        if isAllReal(first, second):
+            computed = (first - second) & UNSIGNED_BOUND_NUMBER
         else:
-            computed = (first - second) % (2**256)
-        computed = simplify(computed) if is_expr(computed) else computed
+            computed = to_symbolic(first) - to_symbolic(second)
+        computed = self.simplify(computed)
 
         # if not isAllReal(first, second):
         #     solver.push()
@@ -687,69 +1545,69 @@ def sym_exec_ins(params, block, statement, func_call, current_func_name):
         var_to_source[defs[0]] = computed
 
     # due to the exist of PHI opcode, some path may not be feasible to perform DIV operation
-    elif opcode == "DIV":
-        first = var_to_source[uses[0]] if uses[0] in var_to_source.keys() else uses[0]
-        second = var_to_source[uses[1]] if uses[1] in var_to_source.keys() else uses[1]
+    @opcode_handler("DIV")
+    def exec_div(self, params, block, statement, defs, uses):
+        var_to_source = params.var_to_source
+        first = resolve(var_to_source, uses[0])
+        second = resolve(var_to_source, uses[1])
         if isAllReal(first, second):
             if second == 0:
                 computed = 0
             else:
                 first = to_unsigned(first)
                 second = to_unsigned(second)
-                computed = first / second
+                computed = first // second
         else:
             first = to_symbolic(first)
             second = to_symbolic(second)
-            log.debug(f"First: {first}, Type of First: {type(first)}")
-            log.debug(f"Second: {second}, Type of Second: {type(second)}")
+            self.trace("exec", "First: %s, Second: %s", first, second)
             computed = UDiv(first, second)
-        computed = simplify(computed) if is_expr(computed) else computed
-        log.debug("Computed:")
-        log.debug(computed)
+        computed = self.simplify(computed)
+        self.trace("exec", "Computed: %s", computed)
         var_to_source[defs[0]] = computed
 
-    elif opcode == "SDIV":
-        first = var_to_source[uses[0]] if uses[0] in var_to_source.keys() else uses[0]
-        second = var_to_source[uses[1]] if uses[1] in var_to_source.keys() else uses[1]
+    @opcode_handler("SDIV")
+    def exec_sdiv(self, params, block, statement, defs, uses):
+        var_to_source = params.var_to_source
+        first = resolve(var_to_source, uses[0])
+        second = resolve(var_to_source, uses[1])
         if isAllReal(first, second):
             first = to_signed(first)
             second = to_signed(second)
             if second == 0:
                 computed = 0
-            elif first == -(2**255) and second == -1:
-                computed = -(2**255)
             else:
-                sign = -1 if (first / second) < 0 else 1
-                computed = sign * (abs(first) / abs(second))
+                # truncated towards zero, -2**255 / -1 wraps around to itself
+                sign = -1 if (first < 0) != (second < 0) else 1
+                computed = sign * (abs(first) // abs(second)) & UNSIGNED_BOUND_NUMBER
         else:
             first = to_symbolic(first)
             second = to_symbolic(second)
-            solver.push()
-            solver.add(Not(second == 0))
-            if check_sat(solver) == unsat:
+            nonzero = Not(second == 0)
+            no_overflow = Not(And(first == -(2**255), second == -1))
+            if self.solver.check(nonzero) == unsat:
                 computed = 0
+            elif self.solver.check(nonzero, no_overflow) == unsat:
+                computed = -(2**255)
             else:
-                solver.push()
-                solver.add(Not(And(first == -(2**255), second == -1)))
-                if check_sat(solver) == unsat:
-                    computed = -(2**255)
-                else:
-                    solver.push()
-                    solver.add(first / second < 0)
-                    sign = -1 if check_sat(solver) == sat else 1
-                    z3_abs = lambda x: If(x >= 0, x, -x)
-                    first = z3_abs(first)
-                    second = z3_abs(second)
-                    computed = sign * (first / second)
-                    solver.pop()
-                solver.pop()
-            solver.pop()
-        computed = simplify(computed) if is_expr(computed) else computed
+                negative = first / second < 0
+                sign = (
+                    -1
+                    if self.solver.check(nonzero, no_overflow, negative) == sat
+                    else 1
+                )
+                z3_abs = lambda x: If(x >= 0, x, -x)
+                first = z3_abs(first)
+                second = z3_abs(second)
+                computed = sign * (first / second)
+        computed = self.simplify(computed)
         var_to_source[defs[0]] = computed
 
-    elif opcode == "MOD":
-        first = var_to_source[uses[0]] if uses[0] in var_to_source.keys() else uses[0]
-        second = var_to_source[uses[1]] if uses[1] in var_to_source.keys() else uses[1]
+    @opcode_handler("MOD")
+    def exec_mod(self, params, block, statement, defs, uses):
+        var_to_source = params.var_to_source
+        first = resolve(var_to_source, uses[0])
+        second = resolve(var_to_source, uses[1])
         if isAllReal(first, second):
             if second == 0:
                 computed = 0
@@ -762,21 +1620,20 @@ def sym_exec_ins(params, block, statement, func_call, current_func_name):
             first = to_symbolic(first)
             second = to_symbolic(second)
 
-            solver.push()
-            solver.add(Not(second == 0))
-            if check_sat(solver) == unsat:
+            if self.solver.check(Not(second == 0)) == unsat:
                 # it is provable that second is indeed equal to zero
                 computed = 0
             else:
                 computed = URem(first, second)
-            solver.pop()
 
-        computed = simplify(computed) if is_expr(computed) else computed
+        computed = self.simplify(computed)
         var_to_source[defs[0]] = computed
 
-    elif opcode == "SMOD":
-        first = var_to_source[uses[0]] if uses[0] in var_to_source.keys() else uses[0]
-        second = var_to_source[uses[1]] if uses[1] in var_to_source.keys() else uses[1]
+    @opcode_handler("SMOD")
+    def exec_smod(self, params, block, statement, defs, uses):
+        var_to_source = params.var_to_source
+        first = resolve(var_to_source, uses[0])
+        second = resolve(var_to_source, uses[1])
         if isAllReal(first, second):
             if second == 0:
                 computed = 0
@@ -784,40 +1641,38 @@ def sym_exec_ins(params, block, statement, func_call, current_func_name):
                 first = to_signed(first)
                 second = to_signed(second)
                 sign = -1 if first < 0 else 1
-                computed = sign * (abs(first) % abs(second))
+                computed = sign * (abs(first) % abs(second)) & UNSIGNED_BOUND_NUMBER
         else:
             first = to_symbolic(first)
             second = to_symbolic(second)
 
-            solver.push()
-            solver.add(Not(second == 0))
-            if check_sat(solver) == unsat:
+            nonzero = Not(second == 0)
+            if self.solver.check(nonzero) == unsat:
                 # it is provable that second is indeed equal to zero
                 computed = 0
             else:
-                solver.push()
-                solver.add(first < 0)  # check sign of first element
                 sign = (
                     BitVecVal(-1, 256)
-                    if check_sat(solver) == sat
+                    # check sign of first element
+                    if self.solver.check(nonzero, first < 0) == sat
                     else BitVecVal(1, 256)
                 )
-                solver.pop()
 
                 z3_abs = lambda x: If(x >= 0, x, -x)
                 first = z3_abs(first)
                 second = z3_abs(second)
 
                 computed = sign * (first % second)
-            solver.pop()
 
-        computed = simplify(computed) if is_expr(computed) else computed
+        computed = self.simplify(computed)
         var_to_source[defs[0]] = computed
 
-    elif opcode == "ADDMOD":
-        first = var_to_source[uses[0]] if uses[0] in var_to_source.keys() else uses[0]
-        second = var_to_source[uses[1]] if uses[1] in var_to_source.keys() else uses[1]
-        third = var_to_source[uses[2]] if uses[2] in var_to_source.keys() else uses[2]
+    @opcode_handler("ADDMOD")
+    def exec_addmod(self, params, block, statement, defs, uses):
+        var_to_source = params.var_to_source
+        first = resolve(var_to_source, uses[0])
+        second = resolve(var_to_source, uses[1])
+        third = resolve(var_to_source, uses[2])
 
         if isAllReal(first, second, third):
             if third == 0:
@@ -827,9 +1682,7 @@ def sym_exec_ins(params, block, statement, func_call, current_func_name):
         else:
             first = to_symbolic(first)
             second = to_symbolic(second)
-            solver.push()
-            solver.add(Not(third == 0))
-            if check_sat(solver) == unsat:
+            if self.solver.check(Not(third == 0)) == unsat:
                 computed = 0
             else:
                 first = ZeroExt(256, first)
@@ -837,14 +1690,15 @@ def sym_exec_ins(params, block, statement, func_call, current_func_name):
                 third = ZeroExt(256, third)
                 computed = (first + second) % third
                 computed = Extract(255, 0, computed)
-            solver.pop()
-        computed = simplify(computed) if is_expr(computed) else computed
+        computed = self.simplify(computed)
         var_to_source[defs[0]] = computed
 
-    elif opcode == "MULMOD":
-        first = var_to_source[uses[0]] if uses[0] in var_to_source.keys() else uses[0]
-        second = var_to_source[uses[1]] if uses[1] in var_to_source.keys() else uses[1]
-        third = var_to_source[uses[2]] if uses[2] in var_to_source.keys() else uses[2]
+    @opcode_handler("MULMOD")
+    def exec_mulmod(self, params, block, statement, defs, uses):
+        var_to_source = params.var_to_source
+        first = resolve(var_to_source, uses[0])
+        second = resolve(var_to_source, uses[1])
+        third = resolve(var_to_source, uses[2])
 
         if isAllReal(first, second, third):
             if third == 0:
@@ -854,9 +1708,7 @@ def sym_exec_ins(params, block, statement, func_call, current_func_name):
         else:
             first = to_symbolic(first)
             second = to_symbolic(second)
-            solver.push()
-            solver.add(Not(third == 0))
-            if check_sat(solver) == unsat:
+            if self.solver.check(Not(third == 0)) == unsat:
                 computed = 0
             else:
                 first = ZeroExt(256, first)
@@ -864,33 +1716,32 @@ def sym_exec_ins(params, block, statement, func_call, current_func_name):
                 third = ZeroExt(256, third)
                 computed = URem(first * second, third)
                 computed = Extract(255, 0, computed)
-            solver.pop()
-        computed = simplify(computed) if is_expr(computed) else computed
+        computed = self.simplify(computed)
         var_to_source[defs[0]] = computed
 
-    elif opcode == "EXP":
+    @opcode_handler("EXP")
+    def exec_exp(self, params, block, statement, defs, uses):
+        var_to_source = params.var_to_source
         if isReal(defs[0]):
             pass
         else:
-            base = (
-                var_to_source[uses[0]] if uses[0] in var_to_source.keys() else uses[0]
-            )
-            exponent = (
-                var_to_source[uses[1]] if uses[1] in var_to_source.keys() else uses[1]
-            )
+            base = resolve(var_to_source, uses[0])
+            exponent = resolve(var_to_source, uses[1])
             if isAllReal(base, exponent):
                 computed = pow(base, exponent, 2**256)
             else:
                 # The computed value is unknown, this is because power is
                 # not supported in bit-vector theory
-                new_var_name = gen.gen_arbitrary_var()
+                new_var_name = self.gen.gen_arbitrary_var()
                 computed = BitVec(new_var_name, 256)
-            computed = simplify(computed) if is_expr(computed) else computed
+            computed = self.simplify(computed)
             var_to_source[defs[0]] = computed
 
-    elif opcode == "SIGNEXTEND":
-        first = var_to_source[uses[0]] if uses[0] in var_to_source.keys() else uses[0]
-        second = var_to_source[uses[1]] if uses[1] in var_to_source.keys() else uses[1]
+    @opcode_handler("SIGNEXTEND")
+    def exec_signextend(self, params, block, statement, defs, uses):
+        var_to_source = params.var_to_source
+        first = resolve(var_to_source, uses[0])
+        second = resolve(var_to_source, uses[1])
         if isAllReal(first, second):
             if first >= 32 or first < 0:
                 computed = second
@@ -903,28 +1754,27 @@ def sym_exec_ins(params, block, statement, func_call, current_func_name):
         else:
             first = to_symbolic(first)
             second = to_symbolic(second)
-            solver.push()
-            solver.add(Not(Or(first >= 32, first < 0)))
-            if check_sat(solver) == unsat:
+            in_range = Not(Or(first >= 32, first < 0))
+            if self.solver.check(in_range) == unsat:
                 computed = second
             else:
                 signbit_index_from_right = 8 * first + 7
-                solver.push()
-                solver.add(second & (1 << signbit_index_from_right) == 0)
-                if check_sat(solver) == unsat:
+                signbit_clear = second & (1 << signbit_index_from_right) == 0
+                if self.solver.check(in_range, signbit_clear) == unsat:
                     computed = second | (2**256 - (1 << signbit_index_from_right))
                 else:
                     computed = second & ((1 << signbit_index_from_right) - 1)
-                solver.pop()
-            solver.pop()
-        computed = simplify(computed) if is_expr(computed) else computed
+        computed = self.simplify(computed)
         var_to_source[defs[0]] = computed
+
     #
     #  10s: Comparison and Bitwise Logic Operations
     #
-    elif opcode == "LT":
-        first = var_to_source[uses[0]] if uses[0] in var_to_source.keys() else uses[0]
-        second = var_to_source[uses[1]] if uses[1] in var_to_source.keys() else uses[1]
+    @opcode_handler("LT")
+    def exec_lt(self, params, block, statement, defs, uses):
+        var_to_source = params.var_to_source
+        first = resolve(var_to_source, uses[0])
+        second = resolve(var_to_source, uses[1])
         if isAllReal(first, second):
             first = to_unsigned(first)
             second = to_unsigned(second)
@@ -933,18 +1783,18 @@ def sym_exec_ins(params, block, statement, func_call, current_func_name):
             else:
                 computed = 0
         else:
-            log.debug(f"First: {first}, Type of First: {type(first)}")
-            log.debug(f"Second: {second}, Type of Second: {type(second)}")
+            self.trace("exec", "First: %s, Second: %s", first, second)
             # miss cases due to PHI ir code
             computed = If(ULT(first, second), BitVecVal(1, 256), BitVecVal(0, 256))
-        computed = simplify(computed) if is_expr(computed) else computed
-        log.debug("Computed:")
-        log.debug(computed)
+        computed = self.simplify(computed)
+        self.trace("exec", "Computed: %s", computed)
         var_to_source[defs[0]] = computed
 
-    elif opcode == "GT":
-        first = var_to_source[uses[0]] if uses[0] in var_to_source.keys() else uses[0]
-        second = var_to_source[uses[1]] if uses[1] in var_to_source.keys() else uses[1]
+    @opcode_handler("GT")
+    def exec_gt(self, params, block, statement, defs, uses):
+        var_to_source = params.var_to_source
+        first = resolve(var_to_source, uses[0])
+        second = resolve(var_to_source, uses[1])
 
         if isAllReal(first, second):
             first = to_unsigned(first)
@@ -954,17 +1804,18 @@ def sym_exec_ins(params, block, statement, func_call, current_func_name):
             else:
                 computed = 0
         else:
-            log.debug(f"First: {first}, Type of First: {type(first)}")
-            log.debug(f"Second: {second}, Type of Second: {type(second)}")
+            self.trace("exec", "First: %s, Second: %s", first, second)
             computed = If(UGT(first, second), BitVecVal(1, 256), BitVecVal(0, 256))
-        computed = simplify(computed) if is_expr(computed) else computed
-        log.debug("Computed:")
-        log.debug(computed)
+        computed = self.simplify(computed)
+        self.trace("exec", "Computed: %s", computed)
         var_to_source[defs[0]] = computed
 
-    elif opcode == "SLT":  # Not fully faithful to signed comparison
-        first = var_to_source[uses[0]] if uses[0] in var_to_source.keys() else uses[0]
-        second = var_to_source[uses[1]] if uses[1] in var_to_source.keys() else uses[1]
+    @opcode_handler("SLT")
+    def exec_slt(self, params, block, statement, defs, uses):
+        # Not fully faithful to signed comparison
+        var_to_source = params.var_to_source
+        first = resolve(var_to_source, uses[0])
+        second = resolve(var_to_source, uses[1])
 
         if isAllReal(first, second):
             first = to_signed(first)
@@ -975,12 +1826,15 @@ def sym_exec_ins(params, block, statement, func_call, current_func_name):
                 computed = 0
         else:
             computed = If(first < second, BitVecVal(1, 256), BitVecVal(0, 256))
-        computed = simplify(computed) if is_expr(computed) else computed
+        computed = self.simplify(computed)
         var_to_source[defs[0]] = computed
 
-    elif opcode == "SGT":  # Not fully faithful to signed comparison
-        first = var_to_source[uses[0]] if uses[0] in var_to_source.keys() else uses[0]
-        second = var_to_source[uses[1]] if uses[1] in var_to_source.keys() else uses[1]
+    @opcode_handler("SGT")
+    def exec_sgt(self, params, block, statement, defs, uses):
+        # Not fully faithful to signed comparison
+        var_to_source = params.var_to_source
+        first = resolve(var_to_source, uses[0])
+        second = resolve(var_to_source, uses[1])
         if isAllReal(first, second):
             first = to_signed(first)
             second = to_signed(second)
@@ -990,12 +1844,14 @@ def sym_exec_ins(params, block, statement, func_call, current_func_name):
                 computed = 0
         else:
             computed = If(first > second, BitVecVal(1, 256), BitVecVal(0, 256))
-        computed = simplify(computed) if is_expr(computed) else computed
+        computed = self.simplify(computed)
         var_to_source[defs[0]] = computed
 
-    elif opcode == "EQ":
-        first = var_to_source[uses[0]] if uses[0] in var_to_source.keys() else uses[0]
-        second = var_to_source[uses[1]] if uses[1] in var_to_source.keys() else uses[1]
+    @opcode_handler("EQ")
+    def exec_eq(self, params, block, statement, defs, uses):
+        var_to_source = params.var_to_source
+        first = resolve(var_to_source, uses[0])
+        second = resolve(var_to_source, uses[1])
         if isAllReal(first, second):
             if first == second:
                 computed = 1
@@ -1003,13 +1859,16 @@ def sym_exec_ins(params, block, statement, func_call, current_func_name):
                 computed = 0
         else:
             computed = If(first == second, BitVecVal(1, 256), BitVecVal(0, 256))
-        computed = simplify(computed) if is_expr(computed) else computed
+        computed = self.simplify(computed)
         var_to_source[defs[0]] = computed
-    elif opcode == "ISZERO":
+
+    @opcode_handler("ISZERO")
+    def exec_iszero(self, params, block, statement, defs, uses):
+        var_to_source = params.var_to_source
         # Tricky: this instruction works on both boolean and integer,
         # when we have a symbolic expression, type error might occur
         # Currently handled by try and catch
-        first = var_to_source[uses[0]] if uses[0] in var_to_source.keys() else uses[0]
+        first = resolve(var_to_source, uses[0])
         if isReal(first):
             if first == 0:
                 computed = 1
@@ -1017,36 +1876,45 @@ def sym_exec_ins(params, block, statement, func_call, current_func_name):
                 computed = 0
         else:
             computed = If(first == 0, BitVecVal(1, 256), BitVecVal(0, 256))
-        log.debug(computed)
-        computed = simplify(computed) if is_expr(computed) else computed
+        self.trace("exec", "Computed: %s", computed)
+        computed = self.simplify(computed)
         var_to_source[defs[0]] = computed
-    elif opcode == "AND":
-        first = var_to_source[uses[0]] if uses[0] in var_to_source.keys() else uses[0]
-        second = var_to_source[uses[1]] if uses[1] in var_to_source.keys() else uses[1]
+
+    @opcode_handler("AND")
+    def exec_and(self, params, block, statement, defs, uses):
+        var_to_source = params.var_to_source
+        first = resolve(var_to_source, uses[0])
+        second = resolve(var_to_source, uses[1])
         computed = first & second
-        computed = simplify(computed) if is_expr(computed) else computed
+        computed = self.simplify(computed)
         var_to_source[defs[0]] = computed
 
-    elif opcode == "OR":
-        first = var_to_source[uses[0]] if uses[0] in var_to_source.keys() else uses[0]
-        second = var_to_source[uses[1]] if uses[1] in var_to_source.keys() else uses[1]
+    @opcode_handler("OR")
+    def exec_or(self, params, block, statement, defs, uses):
+        var_to_source = params.var_to_source
+        first = resolve(var_to_source, uses[0])
+        second = resolve(var_to_source, uses[1])
 
         computed = first | second
-        computed = simplify(computed) if is_expr(computed) else computed
+        computed = self.simplify(computed)
         var_to_source[defs[0]] = computed
 
-    elif opcode == "XOR":
-        first = var_to_source[uses[0]] if uses[0] in var_to_source.keys() else uses[0]
-        second = var_to_source[uses[1]] if uses[1] in var_to_source.keys() else uses[1]
+    @opcode_handler("XOR")
+    def exec_xor(self, params, block, statement, defs, uses):
+        var_to_source = params.var_to_source
+        first = resolve(var_to_source, uses[0])
+        second = resolve(var_to_source, uses[1])
 
         computed = first ^ second
-        computed = simplify(computed) if is_expr(computed) else computed
+        computed = self.simplify(computed)
         var_to_source[defs[0]] = computed
 
-    elif opcode == "NOT":
-        first = var_to_source[uses[0]] if uses[0] in var_to_source.keys() else uses[0]
+    @opcode_handler("NOT")
+    def exec_not(self, params, block, statement, defs, uses):
+        var_to_source = params.var_to_source
+        first = resolve(var_to_source, uses[0])
         computed = (~first) & UNSIGNED_BOUND_NUMBER
-        computed = simplify(computed) if is_expr(computed) else computed
+        computed = self.simplify(computed)
         var_to_source[defs[0]] = computed
 
     # model IR special op code PHI
@@ -1056,33 +1924,27 @@ def sym_exec_ins(params, block, statement, func_call, current_func_name):
     # (1) tar = phi 0x0, var; var => tar
     # (2) tar = phi var, 0x0; var => tar
     # (3) tar = phi var, var; var1 => tar, and var2 => tar, however, one can be constant in var map
-    elif opcode == "PHI":
+    @opcode_handler("PHI")
+    def exec_phi(self, params, block, statement, defs, uses):
+        var_to_source = params.var_to_source
         flow_to = defs[0]
         if isReal(uses[0]) and isSymbolic(uses[1]):
             if uses[1] not in var_to_source.keys():
                 var_to_source[flow_to] = uses[0]
                 return
-            flow_from = (
-                var_to_source[uses[1]] if uses[1] in var_to_source.keys() else uses[1]
-            )
+            flow_from = resolve(var_to_source, uses[1])
             var_to_source[flow_to] = flow_from
         elif isReal(uses[1]) and isSymbolic(uses[0]):
             if uses[0] not in var_to_source.keys():
                 var_to_source[flow_to] = uses[1]
                 return
-            flow_from = (
-                var_to_source[uses[0]] if uses[0] in var_to_source.keys() else uses[0]
-            )
+            flow_from = resolve(var_to_source, uses[0])
             var_to_source[flow_to] = flow_from
         # another bug may occur due to phi x y, x and y are both not constants
         elif isSymbolic(uses[0]) and isSymbolic(uses[1]):
             # both uses flow to the def
-            flow_from_0 = (
-                var_to_source[uses[0]] if uses[0] in var_to_source.keys() else uses[0]
-            )
-            flow_from_1 = (
-                var_to_source[uses[1]] if uses[1] in var_to_source.keys() else uses[1]
-            )
+            flow_from_0 = resolve(var_to_source, uses[0])
+            flow_from_1 = resolve(var_to_source, uses[1])
             if isReal(flow_from_0):
                 var_to_source[flow_to] = flow_from_1
             elif isReal(flow_from_1):
@@ -1098,10 +1960,12 @@ def sym_exec_ins(params, block, statement, func_call, current_func_name):
                     # else jump out
                     var_to_source[flow_to] = flow_from_0
 
-    elif opcode == "BYTE":
-        first = var_to_source[uses[0]] if uses[0] in var_to_source.keys() else uses[0]
+    @opcode_handler("BYTE")
+    def exec_byte(self, params, block, statement, defs, uses):
+        var_to_source = params.var_to_source
+        first = resolve(var_to_source, uses[0])
         byte_index = 32 - first - 1
-        second = var_to_source[uses[1]] if uses[1] in var_to_source.keys() else uses[1]
+        second = resolve(var_to_source, uses[1])
 
         if isAllReal(first, second):
             if first >= 32 or first < 0:
@@ -1112,61 +1976,63 @@ def sym_exec_ins(params, block, statement, func_call, current_func_name):
         else:
             first = to_symbolic(first)
             second = to_symbolic(second)
-            solver.push()
-            solver.add(Not(Or(first >= 32, first < 0)))
-            if check_sat(solver) == unsat:
+            if self.solver.check(Not(Or(first >= 32, first < 0))) == unsat:
                 computed = 0
             else:
                 computed = second & (255 << (8 * byte_index))
                 computed = computed >> (8 * byte_index)
-            solver.pop()
-        computed = simplify(computed) if is_expr(computed) else computed
+        computed = self.simplify(computed)
         var_to_source[defs[0]] = computed
 
     #
     # 20s: SHA3/KECCAK256
     #
-    elif opcode in ["KECCAK256", "SHA3"]:
-        s0 = var_to_source[uses[0]] if uses[0] in var_to_source.keys() else uses[0]
-        s1 = var_to_source[uses[1]] if uses[1] in var_to_source.keys() else uses[1]
+    @opcode_handler("KECCAK256", "SHA3")
+    def exec_sha3(self, params, block, statement, defs, uses):
+        var_to_source = params.var_to_source
+        memory = params.memory
+        sha3_list = params.sha3_list
+        path_conditions_and_vars = params.path_conditions_and_vars
+        s0 = resolve(var_to_source, uses[0])
+        s1 = resolve(var_to_source, uses[1])
         # s0 = uses[0]  # 0
         # s1 = uses[1]  # 64
-        slot = None
-        if isAllReal(s0, s1):
-            # simulate the hashing of sha3
-            data = [str(x) for x in memory[s0 : s0 + s1]]
-
+        # simulate the hashing of sha3, same content same variable
+        position = memory.sha3_key(s0, s1) if isAllReal(s0, s1) else None
+        if position is not None:
             # *Slot id in memory[63] <= MSTORE(64, slot)
-            # slot = memory[63]
-            # log.info(slot)
-            # log.info(sha3_list)
-            position = "".join(data)
-            position = re.sub("[\s+]", "", position)
-            position = zlib.compress(six.b(position), 9)
-            position = base64.b64encode(position)
-            position = position.decode("utf-8", "strict")
             if position in sha3_list:
                 var_to_source[defs[0]] = sha3_list[position]
             else:
-                new_var_name = gen.gen_arbitrary_var()
+                new_var_name = self.gen.gen_arbitrary_var()
                 new_var = BitVec(new_var_name, 256)
                 sha3_list[position] = new_var
                 var_to_source[defs[0]] = new_var
         else:
             # push into the execution a fresh symbolic variable
-            new_var_name = gen.gen_arbitrary_var()
+            new_var_name = self.gen.gen_arbitrary_var()
             new_var = BitVec(new_var_name, 256)
             path_conditions_and_vars[new_var_name] = new_var
             var_to_source[defs[0]] = new_var
+
     #
     # 30s: Environment Information
     #
-    elif opcode == "ADDRESS":  # get address of currently executing account
+    @opcode_handler("ADDRESS")
+    def exec_address(self, params, block, statement, defs, uses):
+        # get address of currently executing account
+        var_to_source = params.var_to_source
+        path_conditions_and_vars = params.path_conditions_and_vars
         var_to_source[defs[0]] = path_conditions_and_vars["Ia"]
-    elif opcode == "BALANCE":
-        address = var_to_source[uses[0]] if uses[0] in var_to_source.keys() else uses[0]
 
-        new_var_name = gen.gen_balance_var()
+    @opcode_handler("BALANCE")
+    def exec_balance(self, params, block, statement, defs, uses):
+        var_to_source = params.var_to_source
+        global_state = params.global_state
+        path_conditions_and_vars = params.path_conditions_and_vars
+        address = resolve(var_to_source, uses[0])
+
+        new_var_name = self.gen.gen_balance_var()
         if new_var_name in path_conditions_and_vars:
             new_var = path_conditions_and_vars[new_var_name]
         else:
@@ -1179,19 +2045,19 @@ def sym_exec_ins(params, block, statement, func_call, current_func_name):
         global_state["balance"][hashed_address] = new_var
         var_to_source[defs[0]] = new_var
 
-    elif opcode == "CALLER":  # get caller address
-        # that is directly responsible for this execution
-        var_to_source[defs[0]] = global_state["sender_address"]
-    elif opcode == "ORIGIN":  # get execution origination address
-        var_to_source[defs[0]] = global_state["origin"]
-    elif opcode == "CALLVALUE":  # get value of this transaction
-        var_to_source[defs[0]] = global_state["value"]
-        # buy function feature: msg.value to transfer the token
-    elif opcode == "CALLDATALOAD":  # from inputter data from environment
-        position = (
-            var_to_source[uses[0]] if uses[0] in var_to_source.keys() else uses[0]
-        )
-        new_var_name = gen.gen_data_var(position)
+    @opcode_handler(*ENV_GLOBAL_STATE_KEYS.keys())
+    def exec_env_info(self, params, block, statement, defs, uses):
+        params.var_to_source[defs[0]] = params.global_state[
+            ENV_GLOBAL_STATE_KEYS[statement.opcode]
+        ]
+
+    @opcode_handler("CALLDATALOAD")
+    def exec_calldataload(self, params, block, statement, defs, uses):
+        # from inputter data from environment
+        var_to_source = params.var_to_source
+        path_conditions_and_vars = params.path_conditions_and_vars
+        position = resolve(var_to_source, uses[0])
+        new_var_name = self.gen.gen_data_var(position)
         if new_var_name in path_conditions_and_vars:
             new_var = path_conditions_and_vars[new_var_name]
         else:
@@ -1199,55 +2065,56 @@ def sym_exec_ins(params, block, statement, func_call, current_func_name):
             path_conditions_and_vars[new_var_name] = new_var
         var_to_source[defs[0]] = new_var
 
-    elif opcode == "CALLDATASIZE":
-        new_var_name = gen.gen_data_size()
+    @opcode_handler("CALLDATASIZE")
+    def exec_calldatasize(self, params, block, statement, defs, uses):
+        var_to_source = params.var_to_source
+        path_conditions_and_vars = params.path_conditions_and_vars
+        new_var_name = self.gen.gen_data_size()
         if new_var_name in path_conditions_and_vars:
             new_var = path_conditions_and_vars[new_var_name]
         else:
             new_var = BitVec(new_var_name, 256)
             path_conditions_and_vars[new_var_name] = new_var
         var_to_source[defs[0]] = new_var
-    elif opcode == "CALLDATACOPY":  # Copy inputter data to memory
-        #  TODO: Don't know how to simulate this yet
-        pass
-    elif opcode == "CODESIZE":
-        if g_disasm_file.endswith(".dasm"):
-            evm_file_name = g_disasm_file[:-7]
+
+    @opcode_handler("CODESIZE")
+    def exec_codesize(self, params, block, statement, defs, uses):
+        var_to_source = params.var_to_source
+        if self.g_disasm_file.endswith(".dasm"):
+            evm_file_name = self.g_disasm_file[:-7]
         else:
-            evm_file_name = g_disasm_file
+            evm_file_name = self.g_disasm_file
         with open(evm_file_name, "r") as evm_file:
             evm = evm_file.read()[:-1]
-            code_size = len(evm) / 2
+            code_size = len(evm) // 2
             var_to_source[defs[0]] = code_size
-    elif opcode == "CODECOPY":
-        mem_location = (
-            var_to_source[uses[0]] if uses[0] in var_to_source.keys() else uses[0]
-        )
-        code_from = (
-            var_to_source[uses[1]] if uses[1] in var_to_source.keys() else uses[1]
-        )
-        no_bytes = (
-            var_to_source[uses[2]] if uses[2] in var_to_source.keys() else uses[2]
-        )
+
+    @opcode_handler("CODECOPY")
+    def exec_codecopy(self, params, block, statement, defs, uses):
+        var_to_source = params.var_to_source
+        global_state = params.global_state
+        memory = params.memory
+        path_conditions_and_vars = params.path_conditions_and_vars
+        mem_location = resolve(var_to_source, uses[0])
+        code_from = resolve(var_to_source, uses[1])
+        no_bytes = resolve(var_to_source, uses[2])
         current_miu_i = global_state["miu_i"]
 
         if isAllReal(mem_location, current_miu_i, code_from, no_bytes):
-            temp = int(math.ceil((mem_location + no_bytes) / float(32)))
-            if temp > current_miu_i:
-                current_miu_i = temp
+            current_miu_i = max(current_miu_i, (mem_location + no_bytes + 31) // 32)
 
-            if g_disasm_file.endswith(".dasm"):
-                evm_file_name = g_disasm_file[:-7]
+            if self.g_disasm_file.endswith(".dasm"):
+                evm_file_name = self.g_disasm_file[:-7]
             else:
-                evm_file_name = g_disasm_file
+                evm_file_name = self.g_disasm_file
             with open(evm_file_name, "r") as evm_file:
                 evm = evm_file.read()[:-1]
                 start = code_from * 2
                 end = start + no_bytes * 2
                 code = evm[start:end]
-            mem[mem_location] = int(code, 16)
+            memory.store_bytes(mem_location, bytes.fromhex(code), no_bytes)
         else:
-            new_var_name = gen.gen_code_var("Ia", code_from, no_bytes)
+            new_var_name = self.gen.gen_code_var("Ia", code_from, no_bytes)
             if new_var_name in path_conditions_and_vars:
                 new_var = path_conditions_and_vars[new_var_name]
             else:
@@ -1257,29 +2124,35 @@ def sym_exec_ins(params, block, statement, func_call, current_func_name):
             temp = ((mem_location + no_bytes) / 32) + 1
             current_miu_i = to_symbolic(current_miu_i)
             expression = current_miu_i < temp
-            solver.push()
-            solver.add(expression)
-            if MSIZE:
-                if check_sat(solver) != unsat:
-                    current_miu_i = If(expression, temp, current_miu_i)
-            solver.pop()
-            mem.clear()  # very conservative
-            mem[str(mem_location)] = new_var
+            if self.MSIZE and self.solver.check(expression) != unsat:
+                current_miu_i = If(expression, temp, current_miu_i)
+            memory.forget(mem_location, no_bytes)
+            memory.store(mem_location, new_var)
         global_state["miu_i"] = current_miu_i
 
-    elif opcode == "RETURNDATACOPY":
-        pass
-    elif opcode == "RETURNDATASIZE":
-        new_var_name = gen.gen_arbitrary_var()
+    # don't know how to simulate the copied data yet, only that it overwrites the range
+    @opcode_handler("CALLDATACOPY", "RETURNDATACOPY")
+    def exec_calldatacopy(self, params, block, statement, defs, uses):
+        var_to_source = params.var_to_source
+        mem_location = resolve(var_to_source, uses[0])
+        no_bytes = resolve(var_to_source, uses[2])
+        params.memory.forget(mem_location, no_bytes)
+
+    @opcode_handler("RETURNDATASIZE")
+    def exec_returndatasize(self, params, block, statement, defs, uses):
+        var_to_source = params.var_to_source
+        new_var_name = self.gen.gen_arbitrary_var()
         new_var = BitVec(new_var_name, 256)
         var_to_source[defs[0]] = new_var
-    elif opcode == "GASPRICE":
-        var_to_source[defs[0]] = global_state["gas_price"]
-    elif opcode == "EXTCODESIZE":
-        address = var_to_source[uses[0]] if uses[0] in var_to_source.keys() else uses[0]
+
+    @opcode_handler("EXTCODESIZE")
+    def exec_extcodesize(self, params, block, statement, defs, uses):
+        var_to_source = params.var_to_source
+        path_conditions_and_vars = params.path_conditions_and_vars
+        address = resolve(var_to_source, uses[0])
 
         # not handled yet
-        new_var_name = gen.gen_code_size_var(address)
+        new_var_name = self.gen.gen_code_size_var(address)
         if new_var_name in path_conditions_and_vars:
             new_var = path_conditions_and_vars[new_var_name]
         else:
@@ -1287,20 +2160,19 @@ def sym_exec_ins(params, block, statement, func_call, current_func_name):
             path_conditions_and_vars[new_var_name] = new_var
         var_to_source[defs[0]] = new_var
 
-    elif opcode == "EXTCODECOPY":
-        address = var_to_source[uses[0]] if uses[0] in var_to_source.keys() else uses[0]
-        mem_location = (
-            var_to_source[uses[1]] if uses[1] in var_to_source.keys() else uses[1]
-        )
-        code_from = (
-            var_to_source[uses[2]] if uses[2] in var_to_source.keys() else uses[2]
-        )
-        no_bytes = (
-            var_to_source[uses[3]] if uses[3] in var_to_source.keys() else uses[3]
-        )
+    @opcode_handler("EXTCODECOPY")
+    def exec_extcodecopy(self, params, block, statement, defs, uses):
+        var_to_source = params.var_to_source
+        global_state = params.global_state
+        memory = params.memory
+        path_conditions_and_vars = params.path_conditions_and_vars
+        address = resolve(var_to_source, uses[0])
+        mem_location = resolve(var_to_source, uses[1])
+        code_from = resolve(var_to_source, uses[2])
+        no_bytes = resolve(var_to_source, uses[3])
         current_miu_i = global_state["miu_i"]
 
-        new_var_name = gen.gen_code_var(address, code_from, no_bytes)
+        new_var_name = self.gen.gen_code_var(address, code_from, no_bytes)
         if new_var_name in path_conditions_and_vars:
             new_var = path_conditions_and_vars[new_var_name]
         else:
@@ -1310,19 +2182,20 @@ def sym_exec_ins(params, block, statement, func_call, current_func_name):
         temp = ((mem_location + no_bytes) / 32) + 1
         current_miu_i = to_symbolic(current_miu_i)
         expression = current_miu_i < temp
-        solver.push()
-        solver.add(expression)
-        if MSIZE:
-            if check_sat(solver) != unsat:
-                current_miu_i = If(expression, temp, current_miu_i)
-        solver.pop()
-        mem.clear()  # very conservative
-        mem[str(mem_location)] = new_var
+        if self.MSIZE and self.solver.check(expression) != unsat:
+            current_miu_i = If(expression, temp, current_miu_i)
+        memory.forget(mem_location, no_bytes)
+        memory.store(mem_location, new_var)
         global_state["miu_i"] = current_miu_i
+
     #
     #  40s: Block Information
     #
-    elif opcode == "BLOCKHASH":  # information from block header
+    @opcode_handler("BLOCKHASH")
+    def exec_blockhash(self, params, block, statement, defs, uses):
+        # information from block header
+        var_to_source = params.var_to_source
+        path_conditions_and_vars = params.path_conditions_and_vars
         new_var_name = "IH_blockhash"
         if new_var_name in path_conditions_and_vars:
             new_var = path_conditions_and_vars[new_var_name]
@@ -1331,131 +2204,94 @@ def sym_exec_ins(params, block, statement, func_call, current_func_name):
             path_conditions_and_vars[new_var_name] = new_var
         var_to_source[defs[0]] = new_var
 
-    elif opcode == "COINBASE":  # information from block header
-        var_to_source[defs[0]] = global_state["currentCoinbase"]
-    elif opcode == "TIMESTAMP":  # information from block header
-        var_to_source[defs[0]] = global_state["currentTimestamp"]
-    elif opcode == "NUMBER":  # information from block header
-        var_to_source[defs[0]] = global_state["currentNumber"]
-    elif opcode == "DIFFICULTY":  # information from block header
-        var_to_source[defs[0]] = global_state["currentDifficulty"]
-    elif opcode == "GASLIMIT":  # information from block header
-        var_to_source[defs[0]] = global_state["currentGasLimit"]
     #
     #  50s: Stack, Memory, Storage, and Flow Information
     #
-    elif opcode == "POP":
-        pass
-    elif opcode == "MLOAD":
-        address = var_to_source[uses[0]] if uses[0] in var_to_source.keys() else uses[0]
+    @opcode_handler("MLOAD")
+    def exec_mload(self, params, block, statement, defs, uses):
+        var_to_source = params.var_to_source
+        global_state = params.global_state
+        memory = params.memory
+        path_conditions_and_vars = params.path_conditions_and_vars
+        address = resolve(var_to_source, uses[0])
         current_miu_i = global_state["miu_i"]
-        if isAllReal(address, current_miu_i) and address in mem:
-            temp = int(math.ceil((address + 32) / float(32)))
-            if temp > current_miu_i:
-                current_miu_i = temp
-            value = mem[address]
-            var_to_source[defs[0]] = value
+        if isAllReal(address, current_miu_i):
+            # words touched, ceil((address + 32) / 32)
+            current_miu_i = max(current_miu_i, (address + 63) // 32)
         else:
-            temp = ((address + 31) / 32) + 1
+            temp = ((to_symbolic(address) + 31) / 32) + 1
             current_miu_i = to_symbolic(current_miu_i)
             expression = current_miu_i < temp
-            solver.push()
-            solver.add(expression)
-            if MSIZE:
-                if check_sat(solver) != unsat:
-                    # this means that it is possibly that current_miu_i < temp
-                    current_miu_i = If(expression, temp, current_miu_i)
-            solver.pop()
-            new_var_name = gen.gen_mem_var(address)
+            if self.MSIZE and self.solver.check(expression) != unsat:
+                # this means that it is possibly that current_miu_i < temp
+                current_miu_i = If(expression, temp, current_miu_i)
+        value = memory.load(address)
+        if value is not None:
+            var_to_source[defs[0]] = value
+        else:
+            new_var_name = self.gen.gen_mem_var(address)
             if new_var_name in path_conditions_and_vars:
                 new_var = path_conditions_and_vars[new_var_name]
             else:
                 new_var = BitVec(new_var_name, 256)
                 path_conditions_and_vars[new_var_name] = new_var
             var_to_source[defs[0]] = new_var
+            # the next load of the word reads the same variable
             if isReal(address):
-                mem[address] = new_var
-            else:
-                mem[str(address)] = new_var
+                memory.store(address, new_var)
         global_state["miu_i"] = current_miu_i
 
-    elif opcode == "MSTORE":
-        stored_address = (
-            var_to_source[uses[0]] if uses[0] in var_to_source.keys() else uses[0]
-        )
+    @opcode_handler("MSTORE")
+    def exec_mstore(self, params, block, statement, defs, uses):
+        var_to_source = params.var_to_source
+        global_state = params.global_state
+        memory = params.memory
+        stored_address = resolve(var_to_source, uses[0])
 
-        stored_value = (
-            var_to_source[uses[1]] if uses[1] in var_to_source.keys() else uses[1]
-        )
+        stored_value = resolve(var_to_source, uses[1])
         # MSTORE slotid to MEM32
-        # log.info(stored_address)
-        # log.info(stored_value)
-        # log.info(mem)
         current_miu_i = global_state["miu_i"]
-        if isReal(stored_address):
-            # preparing data for hashing later
-            old_size = len(memory) // 32
-            new_size = ceil32(stored_address + 32) // 32
-            mem_extend = (new_size - old_size) * 32
-            memory.extend([0] * mem_extend)
-            value = stored_value
-
-            for i in range(31, -1, -1):
-                memory[stored_address + i] = value % 256
-                value /= 256
+        # note that the stored_value could be symbolic
+        memory.store(stored_address, stored_value)
         if isAllReal(stored_address, current_miu_i):
-            temp = int(math.ceil((stored_address + 32) / float(32)))
-            if temp > current_miu_i:
-                current_miu_i = temp
-            # note that the stored_value could be symbolic
-            mem[stored_address] = stored_value
+            current_miu_i = max(current_miu_i, (stored_address + 63) // 32)
         else:
-            temp = ((stored_address + 31) / 32) + 1
+            temp = ((to_symbolic(stored_address) + 31) / 32) + 1
             expression = current_miu_i < temp
-            solver.push()
-            solver.add(expression)
-            if MSIZE:
-                if check_sat(solver) != unsat:
-                    # this means that it is possibly that current_miu_i < temp
-                    current_miu_i = If(expression, temp, current_miu_i)
-            solver.pop()
-            mem.clear()  # very conservative
-            mem[str(stored_address)] = stored_value
+            if self.MSIZE and self.solver.check(expression) != unsat:
+                # this means that it is possibly that current_miu_i < temp
+                current_miu_i = If(expression, temp, current_miu_i)
         global_state["miu_i"] = current_miu_i
-    elif opcode == "MSTORE8":
-        stored_address = (
-            var_to_source[uses[0]] if uses[0] in var_to_source.keys() else uses[0]
-        )
-        temp_value = (
-            var_to_source[uses[1]] if uses[1] in var_to_source.keys() else uses[1]
-        )
+
+    @opcode_handler("MSTORE8")
+    def exec_mstore8(self, params, block, statement, defs, uses):
+        var_to_source = params.var_to_source
+        global_state = params.global_state
+        memory = params.memory
+        stored_address = resolve(var_to_source, uses[0])
+        temp_value = resolve(var_to_source, uses[1])
         stored_value = temp_value % 256  # get the least byte
         current_miu_i = global_state["miu_i"]
+        # note that the stored_value could be symbolic
+        memory.store8(stored_address, stored_value)
         if isAllReal(stored_address, current_miu_i):
-            temp = int(math.ceil((stored_address + 1) / float(32)))
-            if temp > current_miu_i:
-                current_miu_i = temp
-            # note that the stored_value could be symbolic
-            mem[stored_address] = stored_value
+            current_miu_i = max(current_miu_i, (stored_address + 32) // 32)
         else:
-            temp = (stored_address / 32) + 1
+            temp = (to_symbolic(stored_address) / 32) + 1
             if isReal(current_miu_i):
                 current_miu_i = BitVecVal(current_miu_i, 256)
             expression = current_miu_i < temp
-            solver.push()
-            solver.add(expression)
-            if MSIZE:
-                if check_sat(solver) != unsat:
-                    # this means that it is possibly that current_miu_i < temp
-                    current_miu_i = If(expression, temp, current_miu_i)
-            solver.pop()
-            mem.clear()  # very conservative
-            mem[str(stored_address)] = stored_value
+            if self.MSIZE and self.solver.check(expression) != unsat:
+                # this means that it is possibly that current_miu_i < temp
+                current_miu_i = If(expression, temp, current_miu_i)
         global_state["miu_i"] = current_miu_i
-    elif opcode == "SLOAD":
-        position = (
-            var_to_source[uses[0]] if uses[0] in var_to_source.keys() else uses[0]
-        )
+
+    @opcode_handler("SLOAD")
+    def exec_sload(self, params, block, statement, defs, uses):
+        var_to_source = params.var_to_source
+        global_state = params.global_state
+        path_conditions_and_vars = params.path_conditions_and_vars
+        position = resolve(var_to_source, uses[0])
 
         if isReal(position) and position in global_state["Ia"]:
             value = global_state["Ia"][position]
@@ -1466,11 +2302,11 @@ def sym_exec_ins(params, block, statement, func_call, current_func_name):
                 var_to_source[defs[0]] = value
             else:
                 if is_expr(position):
-                    position = simplify(position)
+                    position = self.simplify(position)
                 new_var_name = (
-                    gen.gen_owner_store_var(var_to_source[position])
+                    self.gen.gen_owner_store_var(var_to_source[position])
                     if position in var_to_source.keys()
-                    else gen.gen_owner_store_var(position)
+                    else self.gen.gen_owner_store_var(position)
                 )
 
                 if new_var_name in path_conditions_and_vars:
@@ -1485,60 +2321,32 @@ def sym_exec_ins(params, block, statement, func_call, current_func_name):
                 else:
                     global_state["Ia"][str(position)] = new_var
 
-    elif opcode == "SSTORE":
-        stored_address = (
-            var_to_source[uses[0]] if uses[0] in var_to_source.keys() else uses[0]
-        )
-        stored_value = (
-            var_to_source[uses[1]] if uses[1] in var_to_source.keys() else uses[1]
-        )
-        logging.info("SSTORE")
-        log.info(stored_address)
-        log.info(stored_value)
+    @opcode_handler("SSTORE")
+    def exec_sstore(self, params, block, statement, defs, uses):
+        var_to_source = params.var_to_source
+        global_state = params.global_state
+        target_params = params.target_params
+        stored_address = resolve(var_to_source, uses[0])
+        stored_value = resolve(var_to_source, uses[1])
+        self.trace("storage", "SSTORE %s %s", stored_address, stored_value)
 
         if isReal(stored_address):
             # note that the stored_value could be unknown
             global_state["Ia"][stored_address] = stored_value
-            log.debug(hex(stored_address))
-            # check time sstore op
-            if hex(stored_address) in target_params.state_dependency_info.time_list:
-                result["lock"] = True
-
-            # check supply sstore op
-            # the supply and balance slot exist in the same func
-            # supply dependant on owner
-            if hex(stored_address) in target_params.state_dependency_info.supply_list:
-                # check owner constrain
-                # if (
-                #     hex(stored_address)
-                #     in target_params.state_dependency_info.slot_dependency_map.keys()
-                # ):
-                # find if there is a guarded mint op in current funcSign
-                # bypass the owner constrain
-                if (
-                    target_params.funcSign
-                    not in target_params.state_dependency_info.guarded_mint_map.keys()
-                ):
-                    log.info("Unlimited Minting")
-                    result["supply"]["unlimited"] = True
-            # check pause sstore op
-            # may occur slot offset bias
-            # 0x2_0_0 equals to 0x2
-            pause_related_slots = target_params.state_dependency_info.pause_list
-            for i in pause_related_slots:
-                if hex(stored_address) in i.split("_")[0]:
-                    # default has owner constrain
-                    result["pause"] = True
+            detectors = self.detectors.subscribed(statement.ident)
+            if detectors:
+                self.detectors.notify(
+                    self.result,
+                    Store(target_params.funcSign, statement.ident, stored_address),
+                    detectors,
+                )
         else:
             # note that the stored_value could be unknown
             global_state["Ia"][str(stored_address)] = stored_value
 
-    elif opcode == "JUMP":
-        # know jump target in the successors identified (length = 1)
-        target_block = uses[0]
-        # log.info(block.successors[0].ident)
-
-    elif opcode == "JUMPI":
+    @opcode_handler("JUMPI")
+    def exec_jumpi(self, params, block, statement, defs, uses):
+        var_to_source = params.var_to_source
         # We need to prepare two branches
         target_address = uses[0]
         # log.info(hex(target_address))
@@ -1550,7 +2358,7 @@ def sym_exec_ins(params, block, statement, func_call, current_func_name):
                 block.set_falls_to(successor)
         # log.info(block.get_jump_target().ident)
         # log.info(block.get_falls_to().ident)
-        flag = var_to_source[uses[1]] if uses[1] in var_to_source.keys() else uses[1]
+        flag = resolve(var_to_source, uses[1])
         branch_expression = BitVecVal(0, 1) == BitVecVal(1, 1)
         if isReal(flag):
             if flag != 0:
@@ -1559,334 +2367,84 @@ def sym_exec_ins(params, block, statement, func_call, current_func_name):
             branch_expression = flag != 0
         block.set_branch_expression(branch_expression)
 
-    elif opcode == "PC":
-        return
-    elif opcode == "MSIZE":
+    @opcode_handler("MSIZE")
+    def exec_msize(self, params, block, statement, defs, uses):
+        var_to_source = params.var_to_source
+        global_state = params.global_state
         msize = 32 * global_state["miu_i"]
         var_to_source[defs[0]] = msize
-    elif opcode == "GAS":
+
+    @opcode_handler("GAS")
+    def exec_gas(self, params, block, statement, defs, uses):
+        var_to_source = params.var_to_source
+        path_conditions_and_vars = params.path_conditions_and_vars
         # In general, we do not have this precisely. It depends on both
         # the initial gas and the amount has been depleted
         # we need o think about this in the future, in case precise gas
         # can be tracked
-        new_var_name = gen.gen_gas_var()
+        new_var_name = self.gen.gen_gas_var()
         new_var = BitVec(new_var_name, 256)
         path_conditions_and_vars[new_var_name] = new_var
         var_to_source[defs[0]] = new_var
-    elif opcode == "JUMPDEST":
-        # Literally do nothing
-        pass
-    #
-    #  60s & 70s: Push Operations
-    #  No push op in gigahorse IR
-    elif opcode.startswith("PUSH", 0):  # this is a push instruction
-        pass
-
-    elif opcode == "CONST":
-        # push constants but used in real ops
-        pass
-    #
-    #  80s: Duplication Operations
-    #
-    elif opcode.startswith("DUP", 0):
-        # in fact no use of DUP
-        pass
-
-    #
-    #  90s: Swap Operations
-    #
-    elif opcode.startswith("SWAP", 0):
-        # in fact no use of SWAP
-        pass
-
-    #
-    #  a0s: Logging Operations
-    #
-    elif opcode in ("LOG0", "LOG1", "LOG2", "LOG3", "LOG4"):
-        pass
 
     #
     #  f0s: System Operations
     #
-    elif opcode in ["CREATE", "CREATE2"]:
-        new_var_name = gen.gen_arbitrary_var()
+    @opcode_handler("CREATE", "CREATE2")
+    def exec_create(self, params, block, statement, defs, uses):
+        var_to_source = params.var_to_source
+        new_var_name = self.gen.gen_arbitrary_var()
         new_var = BitVec(new_var_name, 256)
         var_to_source[defs[0]] = new_var
 
-    elif opcode == "CALL":
+    @opcode_handler("CALL")
+    def exec_call(self, params, block, statement, defs, uses):
+        var_to_source = params.var_to_source
+        target_params = params.target_params
+        ident = statement.ident
         # TODO: Need to handle miu_i
-        outgas = var_to_source[uses[0]] if uses[0] in var_to_source.keys() else uses[0]
-        recipient = (
-            var_to_source[uses[1]] if uses[1] in var_to_source.keys() else uses[1]
-        )
-        transfer_amount = (
-            var_to_source[uses[2]] if uses[2] in var_to_source.keys() else uses[2]
-        )
-        start_data_input = (
-            var_to_source[uses[3]] if uses[3] in var_to_source.keys() else uses[3]
-        )
-        size_data_input = (
-            var_to_source[uses[4]] if uses[4] in var_to_source.keys() else uses[4]
-        )
-        start_data_output = (
-            var_to_source[uses[5]] if uses[5] in var_to_source.keys() else uses[5]
-        )
-        size_data_ouput = (
-            var_to_source[uses[6]] if uses[6] in var_to_source.keys() else uses[6]
-        )
-        log.info(ident)
-        log.debug(recipient)
-        log.debug(transfer_amount)
+        recipient = resolve(var_to_source, uses[1])
+        transfer_amount = resolve(var_to_source, uses[2])
+        self.trace("call", "CALL %s %s %s", ident, recipient, transfer_amount)
         # for ether transfer
         # feasibility forward check
         # get the formula of the transfer amount
         # with the inferred transfer recipient role
         # callStmt: [recipientVar, amountVar, recipient_role, recipient, amount]
-        if ident in target_params.fund_transfer_info.calls.keys():
+        detectors = self.detectors.subscribed(ident)
+        if detectors:
+            call_stmt = target_params.fund_transfer_info.calls[ident]
+            recipient_var = "v" + call_stmt[0].replace("0x", "")
+            amount_var = "v" + call_stmt[1].replace("0x", "")
             # first
             # if the recipient is the const address
             # the se will read it as int
             # then convert it to hex string
             if isinstance(recipient, int):
-                var_to_source[
-                    "v"
-                    + target_params.fund_transfer_info.calls[ident][0].replace("0x", "")
-                ] = hex(recipient)
+                var_to_source[recipient_var] = hex(recipient)
             # load value from var_to_source
             # if unalbe to load, throw an exception
             try:
-                res = {
-                    ident: [
-                        var_to_source[
-                            "v"
-                            + target_params.fund_transfer_info.calls[ident][0].replace(
-                                "0x", ""
-                            )
-                        ],
-                        var_to_source[
-                            "v"
-                            + target_params.fund_transfer_info.calls[ident][1].replace(
-                                "0x", ""
-                            )
-                        ],
-                    ]
-                }
+                call = [var_to_source[recipient_var], var_to_source[amount_var]]
             except Exception as e:
                 log.error(e)
                 return
-            log.info(res)
-            # read the value from var_to_source
-            recipient = res[ident][0]
-            transfer_amount = res[ident][1]
-            if (
-                target_params.funcSign
-                in target_params.fund_transfer_info.clearcall.keys()
-            ):
-                # the first step
-                # use semantic analysis result to judge the clear operation
-                if (
-                    ident
-                    in target_params.fund_transfer_info.clearcall[
-                        target_params.funcSign
-                    ]
-                ):
-                    result["clear"]["warning"] = True
-                    if target_params.funcSign not in result["clear"].keys():
-                        result["clear"][target_params.funcSign] = {}
-                    if ident not in result["clear"][target_params.funcSign].keys():
-                        result["clear"][target_params.funcSign][ident] = [res[ident]]
-                    else:
-                        if (
-                            res[ident]
-                            not in result["clear"][target_params.funcSign][ident]
-                        ):
-                            result["clear"][target_params.funcSign][ident].append(
-                                res[ident]
-                            )
-            else:  # not clear, other types
-                # additional rules for missing clear, using contract balance to assist (reduce FNs)
-                if is_balance_var(transfer_amount):
-                    result["clear"]["warning"] = True
-                    if target_params.funcSign not in result["clear"].keys():
-                        result["clear"][target_params.funcSign] = {}
-                    if ident not in result["clear"][target_params.funcSign].keys():
-                        result["clear"][target_params.funcSign][ident] = [res[ident]]
-                    else:
-                        if (
-                            res[ident]
-                            not in result["clear"][target_params.funcSign][ident]
-                        ):
-                            result["clear"][target_params.funcSign][ident].append(
-                                res[ident]
-                            )
-
-                receiver_vars = []
-                # if receiver is a constant address
-                if not is_expr(recipient):
-                    log.info(recipient)
-                    log.info(transfer_amount)
-                    # for tax, judge the modifiable status of tax-related vars
-                    if contains_mul_or_div(
-                        transfer_amount
-                    ) and not is_subtracted_from_iv_or_balance(transfer_amount):
-                        if is_expr(transfer_amount):
-                            amount_vars = get_vars(transfer_amount)
-                            for var in amount_vars:
-                                if is_storage_var(var):
-                                    pos = get_storage_position(var)
-                                    if isinstance(pos, int):
-                                        if (
-                                            hex(pos)
-                                            in target_params.state_dependency_info.slot_dependency_map.keys()
-                                        ):  # judge whether tax-related state vars can be modified by other through storage dependency
-                                            result["fee"]["modifiable"] = True
-                    if contains_mul_or_div(
-                        transfer_amount
-                    ) and not is_subtracted_from_iv_or_balance(transfer_amount):
-                        if target_params.funcSign not in result["fee"].keys():
-                            result["fee"][target_params.funcSign] = {}
-                        # bypass the 0 value
-                        if not is_zero(transfer_amount):
-                            if (
-                                ident
-                                not in result["fee"][target_params.funcSign].keys()
-                            ):
-                                result["fee"][target_params.funcSign][ident] = [
-                                    res[ident]
-                                ]
-                            else:
-                                if (
-                                    res[ident]
-                                    not in result["fee"][target_params.funcSign][ident]
-                                ):
-                                    result["fee"][target_params.funcSign][ident].append(
-                                        res[ident]
-                                    )
-                            fee_rate = state_extractor.compute_fee_rate(transfer_amount)
-                            if fee_rate:
-                                log.info(fee_rate)
-                                result["fee"]["warning"] = True
-                                if fee_rate not in result["fee"]["rate"]:
-                                    result["fee"]["rate"].append(fee_rate)
-                else:
-                    receiver_vars = get_vars(recipient)
-                    for var in receiver_vars:
-                        if is_caller(var):
-                            log.info(var)
-                            # analyze whether the reward amount is dependent on the environment var
-                            # in addition, iv-x is a refund logic, filter out
-                            if contains_mul_or_div(
-                                transfer_amount
-                            ) and not is_subtracted_from_iv_or_balance(transfer_amount):
-                                amount_vars = get_vars(transfer_amount)
-                                for var in amount_vars:
-                                    if (
-                                        is_mem_var(var)
-                                        or is_balance_var(var)
-                                        or is_env_var(var)
-                                    ):
-                                        result["reward"]["warning"] = True
-                                if (
-                                    target_params.funcSign
-                                    not in result["reward"].keys()
-                                ):
-                                    result["reward"][target_params.funcSign] = {}
-
-                                if (
-                                    ident
-                                    not in result["reward"][
-                                        target_params.funcSign
-                                    ].keys()
-                                ):
-                                    result["reward"][target_params.funcSign][ident] = [
-                                        res[ident]
-                                    ]
-                                else:
-                                    if (
-                                        res[ident]
-                                        not in result["reward"][target_params.funcSign][
-                                            ident
-                                        ]
-                                    ):
-                                        result["reward"][target_params.funcSign][
-                                            ident
-                                        ].append(res[ident])
-                        elif is_storage_var(var):
-                            log.info(recipient)
-                            log.info(transfer_amount)
-                            # try to get coefficient
-                            if contains_mul_or_div(
-                                transfer_amount
-                            ) and not is_subtracted_from_iv_or_balance(transfer_amount):
-                                if is_expr(transfer_amount):
-                                    amount_vars = get_vars(transfer_amount)
-                                    for var in amount_vars:
-                                        if is_storage_var(var):
-                                            pos = get_storage_position(var)
-                                            if isinstance(pos, int):
-                                                if (
-                                                    hex(pos)
-                                                    in target_params.state_dependency_info.slot_dependency_map.keys()
-                                                ):
-                                                    result["fee"]["modifiable"] = True
-                                log.info(transfer_amount)
-                                if target_params.funcSign not in result["fee"].keys():
-                                    result["fee"][target_params.funcSign] = {}
-                                    # bypass the 0 value
-                                if not is_zero(transfer_amount):
-                                    if (
-                                        ident
-                                        not in result["fee"][
-                                            target_params.funcSign
-                                        ].keys()
-                                    ):
-                                        result["fee"][target_params.funcSign][ident] = [
-                                            res[ident]
-                                        ]
-                                    else:
-                                        if (
-                                            res[ident]
-                                            not in result["fee"][
-                                                target_params.funcSign
-                                            ][ident]
-                                        ):
-                                            result["fee"][target_params.funcSign][
-                                                ident
-                                            ].append(res[ident])
-
-                                    fee_rate = state_extractor.compute_fee_rate(
-                                        transfer_amount
-                                    )
-                                    if fee_rate:
-                                        log.info(fee_rate)
-                                        result["fee"]["warning"] = True
-                                        if fee_rate not in result["fee"]["rate"]:
-                                            result["fee"]["rate"].append(fee_rate)
+            self.trace("call", "transfer %s", call)
+            self.detectors.notify(
+                self.result,
+                Transfer(target_params.funcSign, ident, call, call[0], call[1]),
+                detectors,
+            )
         # we default set the call return as 1 as we do not consider the reentrancy pattern
         var_to_source[defs[0]] = 1
 
-    elif opcode == "CALLCODE":
+    @opcode_handler("CALLCODE")
+    def exec_callcode(self, params, block, statement, defs, uses):
+        var_to_source = params.var_to_source
+        global_state = params.global_state
+        path_conditions_and_vars = params.path_conditions_and_vars
         # TODO: Need to handle miu_i
-        outgas = var_to_source[uses[0]] if uses[0] in var_to_source.keys() else uses[0]
-        recipient = (
-            var_to_source[uses[1]] if uses[1] in var_to_source.keys() else uses[1]
-        )  # this is not used as recipient
-
-        transfer_amount = (
-            var_to_source[uses[2]] if uses[2] in var_to_source.keys() else uses[2]
-        )
-        start_data_input = (
-            var_to_source[uses[3]] if uses[3] in var_to_source.keys() else uses[3]
-        )
-        size_data_input = (
-            var_to_source[uses[4]] if uses[4] in var_to_source.keys() else uses[4]
-        )
-        start_data_output = (
-            var_to_source[uses[5]] if uses[5] in var_to_source.keys() else uses[5]
-        )
-        size_data_ouput = (
-            var_to_source[uses[6]] if uses[6] in var_to_source.keys() else uses[6]
-        )
+        transfer_amount = resolve(var_to_source, uses[2])
         # in the paper, it is shaky when the size of data output is
         # min of stack[6] and the | o |
 
@@ -1898,54 +2456,46 @@ def sym_exec_ins(params, block, statement, func_call, current_func_name):
 
         # Let us ignore the call depth
         balance_ia = global_state["balance"]["Ia"]
+        if isAllReal(transfer_amount, balance_ia):
+            var_to_source[defs[0]] = 1 if transfer_amount <= balance_ia else 0
+            return
         is_enough_fund = transfer_amount <= balance_ia
-        solver.push()
-        solver.add(is_enough_fund)
 
-        if check_sat(solver) == unsat:
+        if self.solver.check(is_enough_fund) == unsat:
             # this means not enough fund, thus the execution will result in exception
-            solver.pop()
             var_to_source[defs[0]] = 0
             # stack.insert(0, 0)  # x = 0
         else:
             # the execution is possibly okay
             var_to_source[defs[0]] = 1
             # stack.insert(0, 1)  # x = 1
-            solver.pop()
-            solver.add(is_enough_fund)
+            self.solver.add(is_enough_fund)
             path_conditions_and_vars["path_condition"].append(is_enough_fund)
-            last_idx = len(path_conditions_and_vars["path_condition"]) - 1
-
-    elif opcode in ("DELEGATECALL", "STATICCALL"):
-        recipient = (
-            var_to_source[uses[1]] if uses[1] in var_to_source.keys() else uses[1]
-        )
 
-        new_var_name = gen.gen_arbitrary_var()
+    @opcode_handler("DELEGATECALL", "STATICCALL")
+    def exec_delegatecall(self, params, block, statement, defs, uses):
+        var_to_source = params.var_to_source
+        new_var_name = self.gen.gen_arbitrary_var()
         new_var = BitVec(new_var_name, 256)
         var_to_source[defs[0]] = new_var
 
-    elif opcode == "REVERT":
-        pass
-    elif opcode == "RETURN":
-        # TODO: Need to handle miu_i
-        pass
-
-    elif opcode in ("SELFDESTRUCT", "SUICIDE"):
-        recipient = (
-            var_to_source[uses[0]] if uses[0] in var_to_source.keys() else uses[0]
-        )
+    @opcode_handler("SELFDESTRUCT", "SUICIDE")
+    def exec_selfdestruct(self, params, block, statement, defs, uses):
+        var_to_source = params.var_to_source
+        global_state = params.global_state
+        path_conditions_and_vars = params.path_conditions_and_vars
+        recipient = resolve(var_to_source, uses[0])
         transfer_amount = global_state["balance"]["Ia"]
         global_state["balance"]["Ia"] = 0
         if isReal(recipient):
             new_address_name = "concrete_address_" + str(recipient)
         else:
-            new_address_name = gen.gen_arbitrary_address_var()
-        old_balance_name = gen.gen_arbitrary_var()
+            new_address_name = self.gen.gen_arbitrary_address_var()
+        old_balance_name = self.gen.gen_arbitrary_var()
         old_balance = BitVec(old_balance_name, 256)
         path_conditions_and_vars[old_balance_name] = old_balance
         constraint = old_balance >= 0
-        solver.add(constraint)
+        self.solver.add(constraint)
         path_conditions_and_vars["path_condition"].append(constraint)
         new_balance = old_balance + transfer_amount
         global_state["balance"][new_address_name] = new_balance
@@ -1953,177 +2503,83 @@ def sym_exec_ins(params, block, statement, func_call, current_func_name):
         return
 
     # brand new opcodes
-    elif opcode == "SHL":
-        # *For selector to shift left 224 bits
-        # EXP
-        base = 2
-        exponent = (
-            var_to_source[uses[0]] if uses[0] in var_to_source.keys() else uses[0]
-        )
-        # Type conversion is needed when they are mismatched
-        if isAllReal(base, exponent):
-            computed = pow(base, exponent, 2**256)
+    # EVM shifts match the z3 bit-vector shifts, a shift by 256 or more included
+    @opcode_handler("SHL")
+    def exec_shl(self, params, block, statement, defs, uses):
+        var_to_source = params.var_to_source
+        shift = resolve(var_to_source, uses[0])
+        value = resolve(var_to_source, uses[1])
+        if isAllReal(shift, value):
+            computed = (value << shift) & UNSIGNED_BOUND_NUMBER if shift < 256 else 0
         else:
-            # The computed value is unknown, this is because power is
-            # not supported in bit-vector theory
-            new_var_name = gen.gen_arbitrary_var()
-            computed = BitVec(new_var_name, 256)
-        computed = simplify(computed) if is_expr(computed) else computed
-
-        # MUL
-        first = computed
-        second = var_to_source[uses[1]] if uses[1] in var_to_source.keys() else uses[1]
-        if isReal(first) and isSymbolic(second):
-            first = BitVecVal(first, 256)
-        elif isSymbolic(first) and isReal(second):
-            second = BitVecVal(second, 256)
-        computed = first * second & UNSIGNED_BOUND_NUMBER
-        computed = simplify(computed) if is_expr(computed) else computed
+            computed = to_symbolic(value) << to_symbolic(shift)
+        computed = self.simplify(computed)
         var_to_source[defs[0]] = computed
 
-    elif opcode == "SHR":
-        # EXP
-        base = 2
-        exponent = (
-            var_to_source[uses[0]] if uses[0] in var_to_source.keys() else uses[0]
-        )
-        # Type conversion is needed when they are mismatched
-        if isAllReal(base, exponent):
-            computed = pow(base, exponent, 2**256)
+    @opcode_handler("SHR")
+    def exec_shr(self, params, block, statement, defs, uses):
+        var_to_source = params.var_to_source
+        shift = resolve(var_to_source, uses[0])
+        value = resolve(var_to_source, uses[1])
+        if isAllReal(shift, value):
+            computed = value >> shift
         else:
-            # The computed value is unknown, this is because power is
-            # not supported in bit-vector theory
-            new_var_name = gen.gen_arbitrary_var()
-            computed = BitVec(new_var_name, 256)
-        computed = simplify(computed) if is_expr(computed) else computed
-
-        # DIV
-        first = computed
-        second = var_to_source[uses[1]] if uses[1] in var_to_source.keys() else uses[1]
-        if isAllReal(first, second):
-            if second == 0:
-                computed = 0
-            else:
-                first = to_unsigned(first)
-                second = to_unsigned(second)
-                computed = first / second
-        else:
-            first = to_symbolic(first)
-            second = to_symbolic(second)
-            solver.push()
-            solver.add(Not(second == 0))
-            if check_sat(solver) == unsat:
-                computed = 0
-            else:
-                computed = UDiv(first, second)
-            solver.pop()
-        computed = simplify(computed) if is_expr(computed) else computed
+            computed = LShR(to_symbolic(value), to_symbolic(shift))
+        computed = self.simplify(computed)
         var_to_source[defs[0]] = computed
 
-    elif opcode == "SAR":
-        # EXP
-        base = 2
-        exponent = (
-            var_to_source[uses[0]] if uses[0] in var_to_source.keys() else uses[0]
-        )
-        # Type conversion is needed when they are mismatched
-        if isAllReal(base, exponent):
-            computed = pow(base, exponent, 2**256)
-        else:
-            # The computed value is unknown, this is because power is
-            # not supported in bit-vector theory
-            new_var_name = gen.gen_arbitrary_var()
-            computed = BitVec(new_var_name, 256)
-        computed = simplify(computed) if is_expr(computed) else computed
-
-        # not equivalent to SDIV
-        first = computed
-        second = var_to_source[uses[1]] if uses[1] in var_to_source.keys() else uses[1]
-        if isAllReal(first, second):
-            first = to_unsigned(first)
-            second = to_signed(second)
-            if second == 0:
-                computed = 0
-            elif first == -(2**255) and second == -1:
-                computed = -(2**255)
-            else:
-                sign = -1 if (first / second) < 0 else 1
-                computed = sign * (abs(first) / abs(second))
+    @opcode_handler("SAR")
+    def exec_sar(self, params, block, statement, defs, uses):
+        var_to_source = params.var_to_source
+        shift = resolve(var_to_source, uses[0])
+        value = resolve(var_to_source, uses[1])
+        if isAllReal(shift, value):
+            computed = (to_signed(value) >> shift) & UNSIGNED_BOUND_NUMBER
         else:
-            first = to_symbolic(first)
-            second = to_symbolic(second)
-            solver.push()
-            solver.add(Not(second == 0))
-            if check_sat(solver) == unsat:
-                computed = 0
-            else:
-                solver.push()
-                solver.add(Not(And(first == -(2**255), second == -1)))
-                if check_sat(solver) == unsat:
-                    computed = -(2**255)
-                else:
-                    solver.push()
-                    solver.add(first / second < 0)
-                    sign = -1 if check_sat(solver) == sat else 1
-
-                    def z3_abs(x):
-                        return If(x >= 0, x, -x)
-
-                    first = z3_abs(first)
-                    second = z3_abs(second)
-                    computed = sign * (first / second)
-                    solver.pop()
-                solver.pop()
-            solver.pop()
-        computed = simplify(computed) if is_expr(computed) else computed
+            computed = to_symbolic(value) >> to_symbolic(shift)
+        computed = self.simplify(computed)
         var_to_source[defs[0]] = computed
 
-    elif opcode == "SELFBALANCE":
-        # address(this).balance
-        var_to_source[defs[0]] = global_state["currentSelfBalance"]
-
-    elif opcode == "CHAINID":
-        # chain_id = {  1 // mainnet
-        #    {  2 // Morden testnet (disused)
-        #    {  2 // Expanse mainnet
-        #    {  3 // Ropsten testnet
-        #    {  4 // Rinkeby testnet
-        #    {  5 // Goerli testnet
-        #    { 42 // Kovan testnet
-        #    { ...
-        var_to_source[defs[0]] = global_state["currentChainId"]
-
-    elif opcode == "BASEFEE":
-        var_to_source[defs[0]] = global_state["currentBaseFee"]
-
-    elif opcode == "CALLPRIVATE":
+    @opcode_handler("CALLPRIVATE")
+    def exec_callprivate(self, params, block, statement, defs, uses):
+        var_to_source = params.var_to_source
+        privatefun_defs = params.privatefun_defs
         # todomark start block, find its func, when executing returnprivate in this func, find the return target
-        private_fun_start_block = blocks[hex(uses[0])]
+        private_fun_start_block = self.blocks[hex(uses[0])]
         # print(private_fun_start_block.ident)
-        target_private_fun = tac_block_function[private_fun_start_block.ident]
-        functions[target_private_fun].return_defs = defs
-        functions[target_private_fun].caller_block = block
+        target_private_fun = self.tac_block_function[private_fun_start_block.ident]
+        self.functions[target_private_fun].return_defs = defs
+        self.functions[target_private_fun].caller_block = block
+        # the return site belongs to the path, other paths may call the function meanwhile
+        params.private_calls = ((block, defs), params.private_calls)
         block.private_call_target = private_fun_start_block
         block.private_call_target.private_call_from = block
         for i in range(1, len(uses)):
-            if uses[i] in var_to_source.keys():
-                uses[i] = var_to_source[uses[i]]
+            # uses are shared by all executions of the statement, do not overwrite
+            arg = resolve(var_to_source, uses[i])
             # elif isinstance(uses[i], str):
             #     uses[i] = BitVec(uses[i], 256)
-            var_to_source[hex(uses[0]).replace("0x", "v") + "arg" + str(i - 1)] = uses[
-                i
-            ]
-        privatefun_defs[target_private_fun] = []
+            var_to_source[hex(uses[0]).replace("0x", "v") + "arg" + str(i - 1)] = arg
+        privatefun_defs[target_private_fun] = PersistentList()
 
-    elif opcode == "RETURNPRIVATE":
+    @opcode_handler("RETURNPRIVATE")
+    def exec_returnprivate(self, params, block, statement, defs, uses):
+        var_to_source = params.var_to_source
+        privatefun_defs = params.privatefun_defs
         # should not use the return arg as the return target
         # should use the successor of the caller function
-        return_defs = functions[tac_block_function[block.ident]].return_defs
+        if params.private_calls is not None:
+            (caller_block, return_defs), params.private_calls = params.private_calls
+        else:
+            caller_block = self.functions[
+                self.tac_block_function[block.ident]
+            ].caller_block
+            return_defs = self.functions[
+                self.tac_block_function[block.ident]
+            ].return_defs
         # print(return_defs)
-        log.debug(return_defs)
-        block.return_private_target = functions[
-            tac_block_function[block.ident]
-        ].caller_block.successors[0]
+        self.trace("call", "return to %s", return_defs)
+        block.return_private_target = caller_block.successors[0]
         # print(block.return_private_target.ident)
         block.return_private_target.return_private_from = block
         for i in range(1, len(uses)):
@@ -2132,38 +2588,170 @@ def sym_exec_ins(params, block, statement, func_call, current_func_name):
                 var_to_source[return_defs[i - 1]] = uses[i]
             else:
                 var_to_source[return_defs[i - 1]] = var_to_source[uses[i]]
-            log.debug(var_to_source[return_defs[i - 1]])
-        if functions[tac_block_function[block.ident]].ident in privatefun_defs.keys():
-            for i in privatefun_defs[functions[tac_block_function[block.ident]].ident]:
+            self.trace(
+                "call", "%s = %s", return_defs[i - 1], var_to_source[return_defs[i - 1]]
+            )
+        if (
+            self.functions[self.tac_block_function[block.ident]].ident
+            in privatefun_defs.keys()
+        ):
+            for i in privatefun_defs[
+                self.functions[self.tac_block_function[block.ident]].ident
+            ]:
                 if i in var_to_source.keys():
                     var_to_source.pop(i)
-        privatefun_defs[functions[tac_block_function[block.ident]].ident] = []
-    elif opcode == "THROW":
-        pass
-    else:
-        log.debug("UNKNOWN INSTRUCTION: " + opcode)
-    # print(var_to_source)
-    # print(mem)
-
+        privatefun_defs[self.functions[self.tac_block_function[block.ident]].ident] = (
+            PersistentList()
+        )
 
-def analyze(target_params):
-    run_build_cfg_and_analyze(target_params)
+    def analyze(self, target_params):
+        self.run_build_cfg_and_analyze(target_params)
 
+    def run(self):
+        log.info("============ Begin SE ===========")
+        start = time.time()
+        workers = min(global_params.SE_WORKERS, len(self.funcs_to_be_checked))
+        self.budget = TimeBudget(
+            global_params.GLOBAL_TIMEOUT, len(self.funcs_to_be_checked), max(workers, 1)
+        )
+        # findings-complete mode skips the detectors decided by the functions
+        # analyzed before, on the shared result
+        if workers > 1 or (
+            self.result_cache is not None and not global_params.FINDINGS_COMPLETE
+        ):
+            self.analyze_apart(workers)
+        else:
+            for funcSign in self.funcs_to_be_checked:
+                self.analyze_function(funcSign)
+        log.info("====================== SE END =====================")
+        if self.result_cache is not None:
+            log.info("Result cache: " + str(self.result_cache.stats()))
+        if self.function_index is not None:
+            log.info("Function index: " + str(self.function_index.stats()))
+        if self.query_cache is not None:
+            log.info("Solver query cache: " + str(self.query_cache.stats()))
+        if self.portfolio is not None:
+            log.info("Solver portfolio: " + str(self.portfolio.stats()))
+        if self.simplify_cache is not None:
+            log.info("Simplify cache: " + str(self.simplify_cache.stats()))
+        if self.function_summaries is not None:
+            log.info("Function summaries: " + str(self.function_summaries.stats()))
+        if self.merge_regions is not None:
+            log.info("State merging: " + str(self.merge_regions.stats()))
+        if self.fingerprints is not None:
+            log.info("State fingerprints: " + str(self.fingerprints.stats()))
+        if self.profiler is not None:
+            self.result["profile"] = self.profiler.report()
+            self.result["profile"]["time"] = round(time.time() - start, 6)
+        return self.result, 0
+
+    def analyze_function(self, funcSign):
+        target_params = TargetedParameters(
+            path=self.path,
+            funcSign=funcSign,
+            fund_transfer_info=self.fund_transfer_graph,
+            target_block=self.functions[self.func_map[funcSign]].head_block,
+            state_dependency_info=self.state_dependency_graph,
+        )
+        log.info("============ Begin SE on function: " + funcSign + " ===========")
+        if global_params.FINDINGS_COMPLETE:
+            if (
+                not self.focus(funcSign)
+                or target_params.target_block.ident not in self.target_distances
+            ):
+                log.info("Findings decided, skipping function: " + funcSign)
+                return
+        start = time.time()
+        self.analyze(target_params)
+        if self.profiler is not None:
+            self.profiler.function(funcSign, time.time() - start)
+        if self.cut_short:
+            self.result["timeout_funcs"].append(funcSign)
+        log.info("============ End SE on function: " + funcSign + " ===========")
 
-def run(inputs, state):
-    global result
-    global funcs_to_be_checked
-    global blocks
-    global functions
-    global tac_block_function
-    global fund_transfer_graph
-    global state_dependency_graph
-    global func_map
-    global path
-    global state_extractor
-    global g_disasm_file
-
-    result = {
+    def analyze_alone(self, funcSign):
+        # the findings of a function on a fresh result, which do not depend on the
+        # other functions, and the nodes of its fee amounts
+        result = self.result
+        self.result = new_result(self.inputs)
+        try:
+            self.analyze_function(funcSign)
+            partial = self.result
+        finally:
+            self.result = result
+        return plain_result(partial), self.detectors.rate_nodes(partial)
+
+    def analyze_apart(self, workers):
+        # the functions analyzed on fresh results, in workers, or read from the
+        # result cache, merged in the order of funcs_to_be_checked
+        partials = {}
+        code_hash = self.inputs.get("code_hash")
+        if self.result_cache is not None:
+            for funcSign in self.funcs_to_be_checked:
+                entry = None
+                if code_hash:
+                    entry = self.result_cache.load("findings", code_hash, funcSign)
+                if entry is None and self.function_index is not None:
+                    entry = self.function_index.load(
+                        self.result_cache, funcSign, self.head_block(funcSign)
+                    )
+                if entry is not None:
+                    partials[funcSign] = entry
+        missing = [f for f in self.funcs_to_be_checked if f not in partials]
+        if workers > 1 and len(missing) > 1:
+            computed = self.run_parallel(min(workers, len(missing)), missing)
+        else:
+            computed = [self.analyze_alone(funcSign) for funcSign in missing]
+        for funcSign, (partial, rate_nodes) in zip(missing, computed):
+            if self.result_cache is None or funcSign in partial["timeout_funcs"]:
+                continue
+            cached = cached_result(partial)
+            if code_hash:
+                self.result_cache.store(
+                    (cached, rate_nodes), "findings", code_hash, funcSign
+                )
+            if self.function_index is not None:
+                self.function_index.store(
+                    self.result_cache,
+                    funcSign,
+                    self.head_block(funcSign),
+                    cached,
+                    rate_nodes,
+                )
+        computed = dict(zip(missing, computed))
+        for funcSign in self.funcs_to_be_checked:
+            if funcSign in computed:
+                merge_result(self.result, computed[funcSign][0])
+            else:
+                # the fee rates are read from the chain of this contract
+                partial, rate_nodes = partials[funcSign]
+                merge_result(self.result, partial)
+                self.detectors.resolve_rates(self.result, rate_nodes)
+
+    def head_block(self, funcSign):
+        return self.functions[self.func_map[funcSign]].head_block
+
+    def run_parallel(self, workers, funcs):
+        # one function per task, the workers are forked so they inherit the cfg,
+        # (result, fee amount nodes) of the functions
+        global worker_engine
+        worker_engine = self
+        try:
+            with multiprocessing.get_context("fork").Pool(workers) as pool:
+                outputs = pool.map(analyze_in_worker, funcs, chunksize=1)
+        finally:
+            worker_engine = None
+        caches = self.caches()
+        for _, cache_counters, profile in outputs:
+            if profile is not None:
+                self.profiler.add_report(profile)
+            for name, counters in cache_counters.items():
+                caches[name].add_counters(counters)
+        return [partial for partial, _, _ in outputs]
+
+
+def new_result(inputs):
+    return {
         "dapp_name": "",
         "total_func": inputs["total_func"],
         "analyzed_func": inputs["analyzed_func"],
@@ -2176,30 +2764,63 @@ def run(inputs, state):
         "lock": False,
         "clear": {"warning": False},
         "pause": False,
+        # functions whose exploration was cut short by the time budget
+        "timeout_funcs": [],
         "metadata": "",
     }
-    blocks = inputs["blocks"]
-    functions = inputs["functions"]
-    tac_block_function = inputs["tac_block_function"]
-    funcs_to_be_checked = inputs["funcs_to_be_checked"]
-    fund_transfer_graph = inputs["fund_transfer_graph"]
-    state_dependency_graph = inputs["state_dependency_graph"]
-    func_map = inputs["func_map"]
-    path = inputs["path"]
-    state_extractor = state
-    g_disasm_file = inputs["dasm_path"]
-
-    log.info("============ Begin SE ===========")
-    for funcSign in funcs_to_be_checked:
-        target_params = TargetedParameters(
-            path=path,
-            funcSign=funcSign,
-            fund_transfer_info=fund_transfer_graph,
-            target_block=functions[func_map[funcSign]].head_block,
-            state_dependency_info=state_dependency_graph,
-        )
-        log.info("============ Begin SE on function: " + funcSign + " ===========")
-        analyze(target_params)
-        log.info("============ End SE on function: " + funcSign + " ===========")
-    log.info("====================== SE END =====================")
-    return result, 0
+
+
+def plain_result(value):
+    # z3 values cannot leave a worker process, they are written as strings to the json anyway
+    if isinstance(value, dict):
+        return {key: plain_result(item) for key, item in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [plain_result(item) for item in value]
+    if value is None or isinstance(value, (bool, int, float, str)):
+        return value
+    return str(value)
+
+
+def cached_result(partial):
+    # a result without the fee rates, computed again with the chain values of
+    # the contract reading it
+    cached = dict(partial)
+    cached["fee"] = dict(partial["fee"], warning=False, rate=[])
+    return cached
+
+
+def merge_result(merged, partial):
+    for key, value in partial.items():
+        if key not in merged:
+            merged[key] = value
+        elif isinstance(value, dict) and isinstance(merged[key], dict):
+            merge_result(merged[key], value)
+        elif isinstance(value, bool):
+            merged[key] = merged[key] or value
+        elif isinstance(value, list):
+            seen = {finding_key(item) for item in merged[key]}
+            for item in value:
+                if finding_key(item) not in seen:
+                    seen.add(finding_key(item))
+                    merged[key].append(item)
+
+
+def analyze_in_worker(funcSign):
+    engine = worker_engine
+    if engine.profiler is not None:
+        engine.profiler = Profiler()
+    caches = engine.caches()
+    before = {name: cache.counters() for name, cache in caches.items()}
+    partial = engine.analyze_alone(funcSign)
+    counters = {
+        name: {
+            key: value - before[name][key] for key, value in cache.counters().items()
+        }
+        for name, cache in caches.items()
+    }
+    profile = engine.profiler.report() if engine.profiler is not None else None
+    return partial, counters, profile
+
+
+def run(inputs, state):
+    return SEEngine(inputs, state).run()
@@ -0,0 +1,88 @@
+import os
+from collections import namedtuple
+
+from symbolic_execution.ir_basic_blocks import load_csv
+
+# a structured loop of the gigahorse loop analysis (clientlib/loops.dl),
+# exported by the Hyperion_Loop* relations of clients/hyperion.dl
+# - blocks: idents of the blocks of the loop, the head included
+# - exits: idents of the blocks outside the loop its blocks jump to
+# - breaks: whether blocks other than the head jump out of the loop
+# - widened: variables given a fresh value when the loop is widened, the defs of
+#   the PHIs of the head, the induction variables and the values used after the loop
+# - writes: (opcode, address operand, varying) of the SSTORE, MSTORE and MSTORE8 of
+#   the loop, the address is varying when it is defined in the loop
+Loop = namedtuple("Loop", ["head", "blocks", "exits", "breaks", "widened", "writes"])
+
+# opcodes writing the storage or the memory
+WRITE_OPCODES = {"SSTORE", "MSTORE", "MSTORE8"}
+
+
+def load_facts(path, name):
+    # relations of an older decompilation may be missing, the loops are then unrolled
+    if not os.path.exists(path + name):
+        return []
+    return load_csv(path + name)
+
+
+def ir_var(var):
+    # the name of a variable in the var_to_source of the symbolic execution
+    return f"v{var.replace('0x', '')}"
+
+
+def load_loops(path, blocks):
+    # loop head ident -> Loop
+    heads = [head for (head,) in load_facts(path, "Hyperion_LoopHead.csv")]
+    loop_blocks = {head: {head} for head in heads}
+    for block, head in load_facts(path, "Hyperion_BlockInLoop.csv"):
+        loop_blocks.setdefault(head, {head}).add(block)
+    exits = {head: set() for head in heads}
+    breaks = set()
+    for head, source, target in load_facts(path, "Hyperion_LoopExit.csv"):
+        exits.setdefault(head, set()).add(target)
+        if source != head:
+            breaks.add(head)
+    widened = {head: set() for head in heads}
+    for head in heads:
+        if head in blocks:
+            for statement in blocks[head].statements:
+                if statement.opcode == "PHI":
+                    widened[head].update(statement.def_vals)
+    for name in (
+        "Hyperion_InductionVariable.csv",
+        "Hyperion_LoopVariableUsedAfter.csv",
+    ):
+        for var, head in load_facts(path, name):
+            widened.setdefault(head, set()).add(ir_var(var))
+    return {
+        head: Loop(
+            head,
+            frozenset(loop_blocks[head]),
+            frozenset(exits[head]),
+            head in breaks,
+            widened[head],
+            loop_writes(loop_blocks[head], blocks),
+        )
+        for head in heads
+        if head in blocks
+    }
+
+
+def loop_writes(loop_blocks, blocks):
+    statements = [
+        statement
+        for block in sorted(loop_blocks)
+        if block in blocks
+        for statement in blocks[block].statements
+    ]
+    # the variables of the loop, another value at every iteration
+    defined = {var for statement in statements for var in statement.def_vals}
+    return tuple(
+        (
+            statement.opcode,
+            statement.use_vals[0],
+            isinstance(statement.use_vals[0], str) and statement.use_vals[0] in defined,
+        )
+        for statement in statements
+        if statement.opcode in WRITE_OPCODES and statement.use_vals
+    )
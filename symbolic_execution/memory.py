@@ -0,0 +1,205 @@
+UNSIGNED_BOUND_NUMBER = 2**256 - 1
+
+# bytes per page, the unit of copy-on-write between the forks of a path
+PAGE_SIZE = 1024
+# ranges larger than this (in bytes) are not tracked byte by byte
+RANGE_LIMIT = 1 << 16
+
+# state of every byte
+UNWRITTEN = 0
+CONCRETE = 1
+# covered by a symbolic word of the overlay
+SYMBOLIC = 2
+# content not modeled, e.g. copied from calldata
+UNKNOWN = 3
+
+_CONCRETE_WORD = bytes([CONCRETE]) * 32
+_SYMBOLIC_WORD = bytes([SYMBOLIC]) * 32
+
+
+class EVMMemory:
+    """Byte addressed memory of a path.
+
+    Concrete bytes live in pages of a sparse bytearray, shared between the forks
+    until one of them writes the page. Words with a symbolic value are kept in an
+    overlay by their concrete address, the stores to a symbolic address in another
+    overlay keyed by the address expression.
+    """
+
+    __slots__ = ("_pages", "_owned", "_base", "_words", "_symbolic")
+
+    def __init__(self):
+        # page number -> (data, byte states)
+        self._pages = {}
+        # pages this fork may write in place
+        self._owned = set()
+        # state of the bytes in the pages never written
+        self._base = UNWRITTEN
+        # concrete address -> symbolic word
+        self._words = {}
+        # str(symbolic address) -> word
+        self._symbolic = {}
+
+    def fork(self):
+        self._owned = set()
+        forked = EVMMemory()
+        forked._pages = dict(self._pages)
+        forked._base = self._base
+        forked._words = dict(self._words)
+        forked._symbolic = dict(self._symbolic)
+        return forked
+
+    def _page(self, number):
+        page = self._pages.get(number)
+        if page is None:
+            page = (bytearray(PAGE_SIZE), bytearray([self._base]) * PAGE_SIZE)
+        elif number not in self._owned:
+            page = (bytearray(page[0]), bytearray(page[1]))
+        else:
+            return page
+        self._pages[number] = page
+        self._owned.add(number)
+        return page
+
+    def _write(self, address, data, state):
+        end = address + len(data)
+        while address < end:
+            number, offset = divmod(address, PAGE_SIZE)
+            size = min(PAGE_SIZE - offset, end - address)
+            page_data, page_states = self._page(number)
+            start = len(data) - (end - address)
+            page_data[offset : offset + size] = data[start : start + size]
+            page_states[offset : offset + size] = bytes([state]) * size
+            address += size
+
+    def _read(self, address, size):
+        data = bytearray()
+        states = bytearray()
+        end = address + size
+        while address < end:
+            number, offset = divmod(address, PAGE_SIZE)
+            chunk = min(PAGE_SIZE - offset, end - address)
+            page = self._pages.get(number)
+            if page is None:
+                data += bytes(chunk)
+                states += bytes([self._base]) * chunk
+            else:
+                data += page[0][offset : offset + chunk]
+                states += page[1][offset : offset + chunk]
+            address += chunk
+        return data, states
+
+    def _drop_words(self, address, size):
+        # the symbolic words overlapping [address, address + size)
+        if self._words:
+            for start in [a for a in self._words if address - 32 < a < address + size]:
+                del self._words[start]
+        # a concrete write may alias any symbolic address
+        self._symbolic = {}
+
+    def load(self, address):
+        """the word at address, None when it is not known"""
+        if not isinstance(address, int):
+            return self._symbolic.get(str(address))
+        data, states = self._read(address, 32)
+        if states == _CONCRETE_WORD:
+            return int.from_bytes(data, "big")
+        if states == _SYMBOLIC_WORD:
+            return self._words.get(address)
+        return None
+
+    def store(self, address, value):
+        """MSTORE"""
+        if not isinstance(address, int):
+            # may alias any byte, very conservative
+            self.clobber()
+            self._symbolic[str(address)] = value
+            return
+        self._drop_words(address, 32)
+        if isinstance(value, int):
+            data = (value & UNSIGNED_BOUND_NUMBER).to_bytes(32, "big")
+            self._write(address, data, CONCRETE)
+        else:
+            self._words[address] = value
+            self._write(address, bytes(32), SYMBOLIC)
+
+    def store8(self, address, value):
+        """MSTORE8"""
+        if not isinstance(address, int):
+            self.clobber()
+            return
+        self._drop_words(address, 1)
+        if isinstance(value, int):
+            self._write(address, bytes([value & 0xFF]), CONCRETE)
+        else:
+            self._write(address, bytes(1), UNKNOWN)
+
+    def store_bytes(self, address, data, size):
+        """size concrete bytes of a copy, zero padded past data, e.g. CODECOPY"""
+        if size > RANGE_LIMIT:
+            self.forget(address, size)
+            return
+        data = bytes(data[:size]) + bytes(max(size - len(data), 0))
+        self._drop_words(address, size)
+        self._write(address, data, CONCRETE)
+
+    def forget(self, address, size):
+        """a range with unknown content, e.g. CALLDATACOPY"""
+        if not isinstance(address, int) or not isinstance(size, int):
+            self.clobber()
+        elif size > RANGE_LIMIT:
+            self.clobber()
+        elif size > 0:
+            self._drop_words(address, size)
+            self._write(address, bytes(size), UNKNOWN)
+
+    def clobber(self):
+        """nothing is known about the memory anymore"""
+        self._pages = {}
+        self._owned = set()
+        self._base = UNKNOWN
+        self._words = {}
+        self._symbolic = {}
+
+    def sha3_key(self, address, size):
+        """a key of the hashed content, None when it is not fully known"""
+        if size > RANGE_LIMIT:
+            return None
+        data, states = self._read(address, size)
+        if UNKNOWN in states:
+            return None
+        if SYMBOLIC not in states:
+            return data.hex()
+        parts = []
+        i = 0
+        while i < size:
+            if states[i] != SYMBOLIC:
+                parts.append(data[i : i + 1].hex())
+                i += 1
+                continue
+            word = self._words.get(address + i)
+            if word is None or i + 32 > size:
+                return None
+            parts.append("(" + str(word) + ")")
+            i += 32
+        return "".join(parts)
+
+    def content(self):
+        """(base state, pages, symbolic words, words at symbolic addresses), sorted"""
+        pages = tuple(
+            (number, bytes(data), bytes(states))
+            for number, (data, states) in sorted(self._pages.items())
+        )
+        return (
+            self._base,
+            pages,
+            sorted(self._words.items()),
+            sorted(self._symbolic.items()),
+        )
+
+    def __repr__(self):
+        return "EVMMemory(pages=%d, words=%r, symbolic=%r)" % (
+            len(self._pages),
+            self._words,
+            self._symbolic,
+        )
@@ -0,0 +1,248 @@
+from z3 import If, eq, is_bv, is_expr, is_true
+
+from symbolic_execution.persistent import fork
+from symbolic_execution.summary import EFFECT_OPCODES
+from symbolic_execution.utils import isReal, to_symbolic
+
+# opcodes writing the memory, the merged paths keep the memory of one of them
+MEMORY_OPCODES = {
+    "MSTORE",
+    "MSTORE8",
+    "CALLDATACOPY",
+    "CODECOPY",
+    "EXTCODECOPY",
+    "RETURNDATACOPY",
+}
+
+# blocks between a branch and its join point
+REGION_LIMIT = 16
+# paths of a region reaching the join point
+PATH_LIMIT = 8
+# values selected by an If in the merged path, more would only move the
+# path explosion into the solver queries
+ITE_LIMIT = 8
+
+# virtual exit of the post-dominator tree, after every block without successors
+EXIT = "exit"
+
+
+def immediate_post_dominators(func_blocks):
+    # block ident -> ident of its immediate post-dominator in the local CFG,
+    # None for the blocks only post-dominated by the exit (Cooper, Harvey, Kennedy)
+    idents = {block.ident for block in func_blocks}
+    successors = {
+        block.ident: [s.ident for s in block.successors if s.ident in idents]
+        for block in func_blocks
+    }
+    predecessors = {ident: [] for ident in idents}
+    predecessors[EXIT] = []
+    for ident, succs in successors.items():
+        for succ in succs or [EXIT]:
+            predecessors[succ].append(ident)
+    # postorder of the reverse CFG from the exit
+    order = []
+    seen = {EXIT}
+    stack = [(EXIT, iter(predecessors[EXIT]))]
+    while stack:
+        node, children = stack[-1]
+        child = next(children, None)
+        if child is None:
+            stack.pop()
+            order.append(node)
+        elif child not in seen:
+            seen.add(child)
+            stack.append((child, iter(predecessors[child])))
+    index = {node: i for i, node in enumerate(order)}
+    ipdom = {EXIT: EXIT}
+
+    def intersect(a, b):
+        while a != b:
+            while index[a] < index[b]:
+                a = ipdom[a]
+            while index[b] < index[a]:
+                b = ipdom[b]
+        return a
+
+    changed = True
+    while changed:
+        changed = False
+        for node in reversed(order[:-1]):
+            new = None
+            for succ in successors[node] or [EXIT]:
+                if succ in ipdom:
+                    new = succ if new is None else intersect(succ, new)
+            if ipdom.get(node) != new:
+                ipdom[node] = new
+                changed = True
+    return {node: ipdom[node] for node in order[:-1] if ipdom[node] != EXIT}
+
+
+class MergeRegions:
+    """Join points where both sides of a conditional jump are merged into one path.
+
+    The join point of a branch is its immediate post-dominator in the local CFG
+    of the function. Only the branches whose blocks up to the join point are
+    few, acyclic and without effect are merged, both sides are then executed
+    ahead to the join point (veritesting).
+    """
+
+    def __init__(self, blocks, tac_block_function, loops):
+        self.blocks = blocks
+        self.tac_block_function = tac_block_function
+        self.loops = loops
+        # function -> block ident -> immediate post-dominator ident
+        self.post_dominators = {}
+        # branch block ident -> join block, None when the branch is not merged
+        self.joins = {}
+        self.merged = 0
+        self.declined = 0
+
+    def join(self, block):
+        if block.ident not in self.joins:
+            self.joins[block.ident] = self.find_join(block)
+        return self.joins[block.ident]
+
+    def find_join(self, block):
+        func = self.tac_block_function[block.ident]
+        if func not in self.post_dominators:
+            func_blocks = [
+                b
+                for b in self.blocks.values()
+                if self.tac_block_function[b.ident] == func
+            ]
+            self.post_dominators[func] = immediate_post_dominators(func_blocks)
+        join = self.post_dominators[func].get(block.ident)
+        if join is None:
+            return None
+        # the blocks between the branch and the join point, acyclic
+        region = set()
+        on_path = set()
+
+        def visit(current):
+            if current.ident == join:
+                return True
+            if current.ident in on_path or current.ident in self.loops:
+                return False
+            if current.ident in region:
+                return True
+            if (
+                current.private_call_target is not None
+                or current.return_private_target is not None
+                or any(
+                    s.opcode in EFFECT_OPCODES or s.opcode in MEMORY_OPCODES
+                    for s in current.statements
+                )
+            ):
+                return False
+            region.add(current.ident)
+            if len(region) > REGION_LIMIT:
+                return False
+            on_path.add(current.ident)
+            mergeable = all(visit(succ) for succ in current.successors)
+            on_path.discard(current.ident)
+            return mergeable
+
+        if all(visit(succ) for succ in block.successors):
+            return self.blocks[join]
+        return None
+
+    def counters(self):
+        return {"merged": self.merged, "declined": self.declined}
+
+    def add_counters(self, counters):
+        # counters of the same contract computed in another process
+        for key, value in counters.items():
+            setattr(self, key, getattr(self, key) + value)
+
+    def stats(self):
+        return self.counters()
+
+
+def same(a, b):
+    if a is b:
+        return True
+    if not is_expr(a) or not is_expr(b):
+        # ints, or the names of unknown values
+        return type(a) is type(b) and a == b
+    return eq(a, b)
+
+
+def select(guards, values):
+    # If chain of the values of the paths, None when they are not 256 bit words
+    if not all(isReal(v) or (is_bv(v) and v.size() == 256) for v in values):
+        return None
+    selected = to_symbolic(values[-1])
+    for guard, value in zip(reversed(guards[:-1]), reversed(values[:-1])):
+        selected = If(guard, to_symbolic(value), selected)
+    return selected
+
+
+_MISSING = object()
+
+
+def merge_entries(dicts, ancestor, guards, skip=()):
+    # merge the entries written in dicts since their fork from ancestor into the
+    # first dict, returns the number of values selected by an If, None if not mergeable
+    written = set()
+    for entries in dicts:
+        keys = entries.written_since(ancestor)
+        if keys is None:
+            return None
+        written |= keys
+    ites = 0
+    merged = dicts[0]
+    for key in written:
+        if key in skip:
+            continue
+        present = [
+            (guard, value)
+            for guard, value in zip(guards, (d.get(key, _MISSING) for d in dicts))
+            if value is not _MISSING
+        ]
+        if not present:
+            continue
+        values = [value for _, value in present]
+        if all(same(values[0], value) for value in values[1:]):
+            # also a value defined on a single path, e.g. in one side of the branch
+            merged[key] = values[0]
+            continue
+        selected = select([guard for guard, _ in present], values)
+        if selected is None:
+            return None
+        merged[key] = selected
+        ites += 1
+    return ites
+
+
+def merge_paths(ancestor, paths, guards, condition):
+    # merge the params of the paths forked from ancestor into the first one,
+    # condition (one of the guards holds) replaces their path conditions,
+    # None when some value cannot be merged or too many values differ
+    merged = paths[0]
+    ites = 0
+    for get, skip in (
+        (lambda p: p.var_to_source, ()),
+        (lambda p: p.sha3_list, ()),
+        (lambda p: p.global_state, ("Ia", "balance")),
+        (lambda p: p.global_state["Ia"], ()),
+        (lambda p: p.global_state["balance"], ()),
+        (lambda p: p.path_conditions_and_vars, ("path_condition",)),
+    ):
+        count = merge_entries([get(p) for p in paths], get(ancestor), guards, skip)
+        if count is None:
+            return None
+        ites += count
+        if ites > ITE_LIMIT:
+            return None
+    for func_id, defs in merged.privatefun_defs.items():
+        known = set(defs)
+        for params in paths[1:]:
+            for var in params.privatefun_defs.get(func_id, ()):
+                if var not in known:
+                    defs.append(var)
+                    known.add(var)
+    path_condition = fork(ancestor.path_conditions_and_vars["path_condition"])
+    if not is_true(condition):
+        path_condition.append(condition)
+    merged.path_conditions_and_vars["path_condition"] = path_condition
+    return merged
@@ -0,0 +1,226 @@
+from collections.abc import MutableMapping, MutableSequence
+
+import global_params
+from symbolic_execution.memory import EVMMemory
+
+# Containers for the symbolic state of a path.
+# Forking a path (Parameter.copy) only shares the current content with the
+# new path instead of deep copying it, every path then records its own deltas.
+
+_MISSING = object()
+# marks a key deleted on top of a shared layer
+_DELETED = object()
+
+
+class _Layer:
+    """Frozen entries of a PersistentDict, shared by all the forks"""
+
+    __slots__ = ("entries", "parent", "depth")
+
+    def __init__(self, entries, parent):
+        self.entries = entries
+        self.parent = parent
+        self.depth = parent.depth + 1 if parent is not None else 1
+
+
+class PersistentDict(MutableMapping):
+    """dict with O(1) fork, writes go to a local layer on top of shared frozen layers"""
+
+    __slots__ = ("_local", "_parent")
+
+    def __init__(self, entries=None):
+        self._local = dict(entries) if entries else {}
+        self._parent = None
+
+    def _lookup(self, key):
+        value = self._local.get(key, _MISSING)
+        layer = self._parent
+        while value is _MISSING and layer is not None:
+            value = layer.entries.get(key, _MISSING)
+            layer = layer.parent
+        return value
+
+    def _flatten(self):
+        layers = [self._local]
+        layer = self._parent
+        while layer is not None:
+            layers.append(layer.entries)
+            layer = layer.parent
+        flat = {}
+        for entries in reversed(layers):
+            flat.update(entries)
+        return {key: value for key, value in flat.items() if value is not _DELETED}
+
+    def fork(self):
+        if self._local:
+            if self._parent is not None and (
+                self._parent.depth >= global_params.STATE_LAYER_LIMIT
+            ):
+                # bound the lookup chain, the flattening is amortized over the forks
+                self._parent = _Layer(self._flatten(), None)
+            else:
+                self._parent = _Layer(self._local, self._parent)
+            self._local = {}
+        forked = PersistentDict()
+        forked._parent = self._parent
+        return forked
+
+    def written_since(self, ancestor):
+        # keys written since this dict was forked from ancestor,
+        # None when the shared layers were flattened in between
+        keys = set(self._local)
+        layer = self._parent
+        while layer is not ancestor._parent:
+            if layer is None:
+                return None
+            keys.update(layer.entries)
+            layer = layer.parent
+        return keys
+
+    def __getitem__(self, key):
+        value = self._lookup(key)
+        if value is _MISSING or value is _DELETED:
+            raise KeyError(key)
+        return value
+
+    def __setitem__(self, key, value):
+        self._local[key] = value
+
+    def __delitem__(self, key):
+        if key not in self:
+            raise KeyError(key)
+        if self._parent is None:
+            del self._local[key]
+        else:
+            self._local[key] = _DELETED
+
+    def __contains__(self, key):
+        value = self._lookup(key)
+        return value is not _MISSING and value is not _DELETED
+
+    def get(self, key, default=None):
+        value = self._lookup(key)
+        if value is _MISSING or value is _DELETED:
+            return default
+        return value
+
+    def clear(self):
+        self._local = {}
+        self._parent = None
+
+    def __iter__(self):
+        return iter(self._flatten())
+
+    def __len__(self):
+        return len(self._flatten())
+
+    def __repr__(self):
+        return repr(self._flatten())
+
+
+class PersistentList:
+    """append-only list with O(1) fork, e.g. visited blocks and path conditions"""
+
+    __slots__ = ("_tail", "_len")
+
+    def __init__(self, items=()):
+        # cons cells (value, previous cell), shared between the forks
+        self._tail = None
+        self._len = 0
+        for item in items:
+            self.append(item)
+
+    def append(self, value):
+        self._tail = (value, self._tail)
+        self._len += 1
+
+    def fork(self):
+        forked = PersistentList()
+        forked._tail = self._tail
+        forked._len = self._len
+        return forked
+
+    def _items(self):
+        items = []
+        cell = self._tail
+        while cell is not None:
+            items.append(cell[0])
+            cell = cell[1]
+        items.reverse()
+        return items
+
+    def __getitem__(self, index):
+        if index == -1 and self._tail is not None:
+            return self._tail[0]
+        return self._items()[index]
+
+    def __iter__(self):
+        return iter(self._items())
+
+    def __len__(self):
+        return self._len
+
+    def __repr__(self):
+        return repr(self._items())
+
+
+class CowList(MutableSequence):
+    """list copied on the first write after a fork, e.g. the byte memory"""
+
+    __slots__ = ("_items", "_owned")
+
+    def __init__(self, items=()):
+        self._items = list(items)
+        self._owned = True
+
+    def fork(self):
+        self._owned = False
+        forked = CowList()
+        forked._items = self._items
+        forked._owned = False
+        return forked
+
+    def _own(self):
+        if not self._owned:
+            self._items = list(self._items)
+            self._owned = True
+
+    def __getitem__(self, index):
+        return self._items[index]
+
+    def __setitem__(self, index, value):
+        self._own()
+        self._items[index] = value
+
+    def __delitem__(self, index):
+        self._own()
+        del self._items[index]
+
+    def insert(self, index, value):
+        self._own()
+        self._items.insert(index, value)
+
+    def append(self, value):
+        self._own()
+        self._items.append(value)
+
+    def extend(self, values):
+        self._own()
+        self._items.extend(values)
+
+    def __len__(self):
+        return len(self._items)
+
+    def __repr__(self):
+        return repr(self._items)
+
+
+def fork(value):
+    # share what can be shared, copy the plain containers like custom_deepcopy
+    if isinstance(value, (PersistentDict, PersistentList, CowList, EVMMemory)):
+        return value.fork()
+    if isinstance(value, dict):
+        return {key: fork(item) for key, item in value.items()}
+    if isinstance(value, list):
+        return list(value)
+    return value
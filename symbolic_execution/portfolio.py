@@ -0,0 +1,238 @@
+import os
+import queue
+import threading
+
+from z3 import (
+    Context,
+    OrElse,
+    ParThen,
+    Solver,
+    Then,
+    Z3_OP_BMUL,
+    Z3_OP_BSDIV,
+    Z3_OP_BSDIV_I,
+    Z3_OP_BSMOD,
+    Z3_OP_BSMOD_I,
+    Z3_OP_BSREM,
+    Z3_OP_BSREM_I,
+    Z3_OP_BUDIV,
+    Z3_OP_BUDIV_I,
+    Z3_OP_BUREM,
+    Z3_OP_BUREM_I,
+    is_app,
+    is_bv_value,
+    main_ctx,
+    sat,
+    unknown,
+    unsat,
+)
+
+# solver configurations raced on a hard query
+# - smt: the default z3 solver
+# - bitblast: bit-blasting to the SAT solver
+# - qfbv: the QF_BV tactic after propagating the values and solving the equations
+# - tactic: the parallel tactic of the path solver (CustomSolver with PARALLEL=1)
+CONFIGURATIONS = ("smt", "bitblast", "qfbv", "tactic")
+
+# kinds of queries whose winners are counted apart, a query is nonlinear when
+# it multiplies or divides two symbolic values (e.g. MULMOD, ADDMOD, SDIV)
+KINDS = ("linear", "nonlinear")
+
+NONLINEAR_OPS = {
+    Z3_OP_BMUL,
+    Z3_OP_BUDIV,
+    Z3_OP_BUDIV_I,
+    Z3_OP_BSDIV,
+    Z3_OP_BSDIV_I,
+    Z3_OP_BUREM,
+    Z3_OP_BUREM_I,
+    Z3_OP_BSREM,
+    Z3_OP_BSREM_I,
+    Z3_OP_BSMOD,
+    Z3_OP_BSMOD_I,
+}
+
+# expressions whose kind is memoized, the memo is dropped when it is full
+KIND_CACHE_LIMIT = 1 << 16
+
+
+def new_solver(configuration, timeout, ctx=None):
+    if ctx is None:
+        ctx = main_ctx()
+    if configuration == "smt":
+        solver = Solver(ctx=ctx)
+    elif configuration == "bitblast":
+        solver = Then("simplify", "bit-blast", "sat", ctx=ctx).solver()
+    elif configuration == "qfbv":
+        solver = Then(
+            "simplify", "propagate-values", "solve-eqs", "qfbv", ctx=ctx
+        ).solver()
+    elif configuration == "tactic":
+        t2 = Then("simplify", "solve-eqs", "smt", ctx=ctx)
+        t1 = ParThen(Then("tseitin-cnf-core", "split-clause", ctx=ctx), t2, ctx=ctx)
+        solver = OrElse(t1, t2, ctx=ctx).solver()
+    else:
+        raise ValueError("Unknown solver configuration: " + configuration)
+    solver.set("timeout", timeout)
+    return solver
+
+
+def run_configuration(configuration, ctx, constraints, timeout, results):
+    # check the constraints of ctx in a thread, z3 releases the GIL meanwhile
+    ret, model = unknown, None
+    try:
+        solver = new_solver(configuration, timeout, ctx)
+        solver.add(constraints)
+        ret = solver.check()
+        if ret == sat:
+            model = solver.model()
+    except Exception:
+        # e.g. a tactic failing on the query, or the race interrupting it
+        ret, model = unknown, None
+    finally:
+        results.put((configuration, ret, model))
+
+
+class Portfolio:
+    """Solver configurations raced on the queries the path solver left unknown.
+
+    Each configuration checks the query in its own z3 context and thread, the
+    first definitive answer wins and the others are interrupted. The wins are
+    counted per kind of query, the configuration winning most often on a kind
+    is tried first on the next unknown queries of that kind, before a race,
+    and the races of a kind start with its winners when there are fewer CPUs
+    than configurations.
+    """
+
+    def __init__(self, timeout, configurations=CONFIGURATIONS, width=None):
+        self.timeout = timeout
+        self.configurations = configurations
+        # configurations run at once
+        self.width = max(1, min(len(configurations), width or os.cpu_count() or 1))
+        # (kind, configuration) -> races won
+        self.wins = {
+            (kind, configuration): 0
+            for kind in KINDS
+            for configuration in configurations
+        }
+        # AST id -> (expression, whether it is nonlinear)
+        self.kind_cache = {}
+        self.races = 0
+        self.unknowns = 0
+        self.preferred_hits = 0
+
+    def nonlinear(self, expr):
+        entry = self.kind_cache.get(expr.get_id())
+        if entry is not None:
+            return entry[1]
+        if len(self.kind_cache) > KIND_CACHE_LIMIT:
+            self.kind_cache = {}
+        stack = [(expr, False)]
+        while stack:
+            current, expanded = stack.pop()
+            key = current.get_id()
+            if key in self.kind_cache:
+                continue
+            if not is_app(current) or current.num_args() == 0:
+                value = False
+            elif not expanded:
+                stack.append((current, True))
+                stack.extend((child, False) for child in current.children())
+                continue
+            else:
+                children = current.children()
+                value = any(self.kind_cache[c.get_id()][1] for c in children)
+                if not value and current.decl().kind() in NONLINEAR_OPS:
+                    # a product of a constant, or a division by one, stays linear
+                    value = sum(not is_bv_value(c) for c in children) > 1 or (
+                        current.decl().kind() != Z3_OP_BMUL
+                        and not is_bv_value(children[-1])
+                    )
+            self.kind_cache[key] = (current, value)
+        return self.kind_cache[expr.get_id()][1]
+
+    def kind(self, constraints):
+        if any(self.nonlinear(constraint) for constraint in constraints):
+            return "nonlinear"
+        return "linear"
+
+    def ranking(self, kind):
+        # the configurations by their wins on kind, in their order on a tie
+        return sorted(
+            self.configurations,
+            key=lambda configuration: -self.wins[(kind, configuration)],
+        )
+
+    def preferred(self, constraints):
+        # configuration to check an unknown query with before a race, None for none
+        if not self.races:
+            return None
+        kind = self.kind(constraints)
+        configuration = self.ranking(kind)[0]
+        return configuration if self.wins[(kind, configuration)] else None
+
+    def race(self, constraints, timeout=None):
+        # (result, model) of the first configuration deciding the constraints,
+        # each one checking them for at most timeout ms
+        if timeout is None:
+            timeout = self.timeout
+        self.races += 1
+        kind = self.kind(constraints)
+        results = queue.Queue()
+        runs = []
+        for configuration in self.ranking(kind)[: self.width]:
+            ctx = Context()
+            # translated here, the main context is only used by this thread
+            translated = [constraint.translate(ctx) for constraint in constraints]
+            thread = threading.Thread(
+                target=run_configuration,
+                args=(configuration, ctx, translated, timeout, results),
+                daemon=True,
+            )
+            runs.append((ctx, thread))
+        winner, ret, model = None, unknown, None
+        try:
+            for _, thread in runs:
+                thread.start()
+            for _ in runs:
+                configuration, result, found = results.get()
+                if result == sat or result == unsat:
+                    winner, ret, model = configuration, result, found
+                    break
+        finally:
+            for ctx, _ in runs:
+                ctx.interrupt()
+            for _, thread in runs:
+                if thread.is_alive():
+                    thread.join()
+        if winner is None:
+            self.unknowns += 1
+            return unknown, None
+        self.wins[(kind, winner)] += 1
+        # the results of the other contexts are compared by their value only
+        ret = sat if ret == sat else unsat
+        if model is not None:
+            model = model.translate(main_ctx())
+        return ret, model
+
+    def counters(self):
+        counters = {
+            "races": self.races,
+            "unknowns": self.unknowns,
+            "preferred_hits": self.preferred_hits,
+        }
+        for (kind, configuration), wins in self.wins.items():
+            counters["%s_%s_wins" % (kind, configuration)] = wins
+        return counters
+
+    def add_counters(self, counters):
+        # counters of the same contract computed in another process
+        counters = dict(counters)
+        for kind, configuration in self.wins:
+            key = "%s_%s_wins" % (kind, configuration)
+            self.wins[(kind, configuration)] += counters.pop(key, 0)
+        for key, value in counters.items():
+            setattr(self, key, getattr(self, key) + value)
+
+    def stats(self):
+        return self.counters()
@@ -0,0 +1,106 @@
+# upper bounds (in seconds) of the buckets of the solver latency histogram,
+# the last bucket holds the slower checks
+LATENCY_BUCKETS = (0.001, 0.01, 0.1, 1.0, 10.0)
+
+
+def bucket_label(index):
+    if index < len(LATENCY_BUCKETS):
+        return "<%gs" % LATENCY_BUCKETS[index]
+    return ">=%gs" % LATENCY_BUCKETS[-1]
+
+
+def new_check_entry():
+    # [checks, seconds, checks per latency bucket]
+    return [0, 0.0, [0] * (len(LATENCY_BUCKETS) + 1)]
+
+
+class Profiler:
+    """Where the symbolic execution of a contract spends its time.
+
+    The opcode times include the solver checks and the nested statements run
+    by the handler (e.g. the merged regions of a JUMPI), the solver checks
+    are the ones reaching z3, not the ones answered by the query cache.
+    """
+
+    def __init__(self):
+        # opcode -> [executions, seconds]
+        self.opcodes = {}
+        # "sat", "unsat" or "unknown" -> entry of new_check_entry
+        self.checks = {}
+        # successor paths beyond the first of an executed block
+        self.forks = 0
+        self.max_depth = 0
+        # funcSign -> wall time in seconds
+        self.functions = {}
+
+    def opcode(self, opcode, seconds):
+        entry = self.opcodes.get(opcode)
+        if entry is None:
+            entry = self.opcodes[opcode] = [0, 0.0]
+        entry[0] += 1
+        entry[1] += seconds
+
+    def check(self, result, seconds):
+        entry = self.checks.get(str(result))
+        if entry is None:
+            entry = self.checks[str(result)] = new_check_entry()
+        entry[0] += 1
+        entry[1] += seconds
+        bucket = 0
+        while bucket < len(LATENCY_BUCKETS) and seconds >= LATENCY_BUCKETS[bucket]:
+            bucket += 1
+        entry[2][bucket] += 1
+
+    def paths(self, states):
+        # the successor paths of an executed block
+        if len(states) > 1:
+            self.forks += len(states) - 1
+        for state in states:
+            if state.depth > self.max_depth:
+                self.max_depth = state.depth
+
+    def function(self, funcSign, seconds):
+        self.functions[funcSign] = self.functions.get(funcSign, 0.0) + seconds
+
+    def report(self):
+        return {
+            "opcodes": {
+                opcode: {"count": count, "time": round(seconds, 6)}
+                for opcode, (count, seconds) in sorted(
+                    self.opcodes.items(), key=lambda item: -item[1][1]
+                )
+            },
+            "solver": {
+                result: {
+                    "count": count,
+                    "time": round(seconds, 6),
+                    "latency": {
+                        bucket_label(i): checks for i, checks in enumerate(histogram)
+                    },
+                }
+                for result, (count, seconds, histogram) in sorted(self.checks.items())
+            },
+            "forks": self.forks,
+            "max_depth": self.max_depth,
+            "functions": {
+                funcSign: round(seconds, 6)
+                for funcSign, seconds in self.functions.items()
+            },
+        }
+
+    def add_report(self, report):
+        # report of the same contract computed in another process
+        for opcode, entry in report["opcodes"].items():
+            current = self.opcodes.setdefault(opcode, [0, 0.0])
+            current[0] += entry["count"]
+            current[1] += entry["time"]
+        for result, entry in report["solver"].items():
+            current = self.checks.setdefault(result, new_check_entry())
+            current[0] += entry["count"]
+            current[1] += entry["time"]
+            for i, checks in enumerate(entry["latency"].values()):
+                current[2][i] += checks
+        self.forks += report["forks"]
+        self.max_depth = max(self.max_depth, report["max_depth"])
+        for funcSign, seconds in report["functions"].items():
+            self.function(funcSign, seconds)
@@ -0,0 +1,109 @@
+from collections import OrderedDict, deque
+
+from z3 import is_true, sat, unsat
+
+# number of recent satisfying models tried on a cache miss
+MODEL_LIMIT = 8
+
+
+class QueryCache:
+    """Solver results of a contract by their set of constraints, bounded LRU.
+
+    A key is the frozenset of the z3 AST ids of the constraints. Z3 hash-conses
+    its ASTs, so the same constraint built twice has the same id. The constraints
+    are kept alive by the entry, otherwise an id could be reused by a new AST.
+    """
+
+    def __init__(self, limit):
+        self.limit = limit
+        # key -> (result, model, constraints)
+        self.results = OrderedDict()
+        # one member id of every unsat key -> the unsat keys
+        self.unsat_index = {}
+        self.models = deque(maxlen=MODEL_LIMIT)
+        self.hits = 0
+        self.subset_hits = 0
+        self.model_hits = 0
+        self.misses = 0
+        self.unknowns = 0
+        self.solver_time = 0.0
+
+    def lookup(self, key, constraints):
+        entry = self.results.get(key)
+        if entry is not None:
+            self.hits += 1
+            self.results.move_to_end(key)
+            return entry[:2]
+        # an unsat subset makes the query unsat
+        for ident in key:
+            for unsat_key in self.unsat_index.get(ident, ()):
+                if unsat_key <= key:
+                    self.subset_hits += 1
+                    self.results.move_to_end(unsat_key)
+                    return unsat, None
+        # a model of another query (e.g. of a superset) satisfying all the constraints
+        # the latest constraints are the ones most likely to be violated
+        for model in reversed(self.models):
+            if all(
+                is_true(model.eval(constraint, model_completion=True))
+                for constraint in reversed(constraints)
+            ):
+                self.model_hits += 1
+                return sat, model
+        return None
+
+    def store(self, key, constraints, result, model, elapsed):
+        self.misses += 1
+        self.solver_time += elapsed
+        if result == sat:
+            if model is not None:
+                self.models.append(model)
+        elif result == unsat:
+            if key:
+                self.unsat_index.setdefault(min(key), []).append(key)
+        else:
+            self.unknowns += 1
+            # unknown depends on the timeout, ask the solver again next time
+            return
+        self.results[key] = (result, model, constraints)
+        while len(self.results) > self.limit:
+            evicted, (evicted_result, _, _) = self.results.popitem(last=False)
+            if evicted_result == unsat and evicted:
+                unsat_keys = self.unsat_index[min(evicted)]
+                unsat_keys.remove(evicted)
+                if not unsat_keys:
+                    del self.unsat_index[min(evicted)]
+
+    def counters(self):
+        return {
+            "hits": self.hits,
+            "subset_hits": self.subset_hits,
+            "model_hits": self.model_hits,
+            "misses": self.misses,
+            "unknowns": self.unknowns,
+            "solver_time": self.solver_time,
+        }
+
+    def add_counters(self, counters):
+        # counters of the same contract computed in another process
+        for key, value in counters.items():
+            setattr(self, key, getattr(self, key) + value)
+
+    def saved_time(self):
+        if not self.misses:
+            return 0.0
+        return self.solver_time / self.misses * self.total_hits()
+
+    def total_hits(self):
+        return self.hits + self.subset_hits + self.model_hits
+
+    def stats(self):
+        return {
+            "hits": self.hits,
+            "subset_hits": self.subset_hits,
+            "model_hits": self.model_hits,
+            "misses": self.misses,
+            "unknowns": self.unknowns,
+            "solver_time": round(self.solver_time, 3),
+            "saved_time": round(self.saved_time(), 3),
+        }
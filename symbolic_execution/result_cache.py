@@ -0,0 +1,133 @@
+import hashlib
+import logging
+import os
+import pickle
+
+import global_params
+
+log = logging.getLogger(__name__)
+
+# bumped when the stored entries change meaning
+RESULT_CACHE_VERSION = 1
+
+# the settings changing the findings of a function
+RESULT_PARAMS = (
+    "TIMEOUT",
+    "PARALLEL",
+    "PORTFOLIO",
+    "PORTFOLIO_TIMEOUT",
+    "CONSTRAINT_SLICING",
+    "FUNCTION_SUMMARIES",
+    "DEPTH_LIMIT",
+    "LOOP_LIMIT",
+    "LOOP_UNROLL",
+    "GAS_LIMIT",
+    "SEARCH_STRATEGY",
+    "SEARCH_SEED",
+    "STATE_MERGING",
+    "STATE_PRUNING",
+    "PRUNE_PATHS",
+    "FINDINGS_COMPLETE",
+)
+
+# the packages whose code computes the findings
+SOURCE_PACKAGES = ("symbolic_execution", "semantic_parser")
+# the decompilation clients computing the facts, and the library they include
+CLIENT_SOURCES = ("gigahorse-toolchain/clients", "gigahorse-toolchain/clientlib")
+
+_source_hash = None
+
+
+def source_hash():
+    global _source_hash
+    if _source_hash is None:
+        digest = hashlib.sha256()
+        root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+        for package in SOURCE_PACKAGES:
+            directory = os.path.join(root, package)
+            for name in sorted(os.listdir(directory)):
+                if name.endswith(".py"):
+                    with open(os.path.join(directory, name), "rb") as f:
+                        digest.update(name.encode())
+                        digest.update(f.read())
+        for sources in CLIENT_SOURCES:
+            for directory, dirs, names in os.walk(os.path.join(root, sources)):
+                dirs.sort()
+                for name in sorted(names):
+                    if name.endswith(".dl"):
+                        path = os.path.join(directory, name)
+                        with open(path, "rb") as f:
+                            digest.update(os.path.relpath(path, root).encode())
+                            digest.update(f.read())
+        _source_hash = digest.hexdigest()
+    return _source_hash
+
+
+def config_hash():
+    # hash of the version, the settings and the sources of the analysis,
+    # an entry stored by another version or configuration is never read
+    digest = hashlib.sha256()
+    digest.update(("%d;%s;" % (RESULT_CACHE_VERSION, source_hash())).encode())
+    for name in RESULT_PARAMS:
+        digest.update(("%s=%r;" % (name, getattr(global_params, name))).encode())
+    return digest.hexdigest()
+
+
+def code_hash(code):
+    # content hash of the runtime bytecode, equal for the clones of a contract
+    code = code.strip().lower()
+    if code.startswith("0x"):
+        code = code[2:]
+    return hashlib.sha256(code.encode()).hexdigest()
+
+
+class ResultCache:
+    """Persistent store of the analysis results, shared by all the contracts.
+
+    An entry is a pickle file named by the hash of its key, which includes the
+    config_hash. The entries are written atomically, so concurrent analyses
+    can share the directory, and a missing or unreadable entry is a miss.
+    """
+
+    def __init__(self, directory):
+        self.directory = directory
+        self.hits = 0
+        self.misses = 0
+        self.stores = 0
+
+    def path(self, *key):
+        name = hashlib.sha256(
+            "\0".join((config_hash(),) + tuple(map(str, key))).encode()
+        ).hexdigest()
+        return os.path.join(self.directory, name[:2], name + ".pickle")
+
+    def load(self, *key):
+        path = self.path(*key)
+        try:
+            with open(path, "rb") as f:
+                value = pickle.load(f)
+        except FileNotFoundError:
+            self.misses += 1
+            return None
+        except Exception:
+            log.debug("Cannot read the cached result " + path, exc_info=True)
+            self.misses += 1
+            return None
+        self.hits += 1
+        return value
+
+    def store(self, value, *key):
+        path = self.path(*key)
+        temp = "%s.%d.tmp" % (path, os.getpid())
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            with open(temp, "wb") as f:
+                pickle.dump(value, f, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(temp, path)
+        except Exception:
+            log.debug("Cannot write the cached result " + path, exc_info=True)
+            return
+        self.stores += 1
+
+    def stats(self):
+        return {"hits": self.hits, "misses": self.misses, "stores": self.stores}
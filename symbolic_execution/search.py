@@ -0,0 +1,156 @@
+import heapq
+import random
+from collections import deque
+
+import global_params
+from symbolic_execution.detectors import DETECTORS, trigger_blocks
+
+# Worklists of the path explorer in ir_se, one per search strategy.
+# Every worklist takes the successors of an executed block with extend()
+# in their CFG order (jump target before fall through) and hands out the next path with pop().
+
+# distance of the blocks which cannot reach any target
+UNREACHABLE = float("inf")
+
+
+class DFSWorklist:
+    """depth first, the same order as the former recursive sym_exec_block"""
+
+    def __init__(self):
+        self.states = []
+
+    def extend(self, states):
+        self.states.extend(reversed(states))
+
+    def pop(self):
+        return self.states.pop()
+
+    def __len__(self):
+        return len(self.states)
+
+
+class BFSWorklist:
+    """breadth first, short paths first"""
+
+    def __init__(self):
+        self.states = deque()
+
+    def extend(self, states):
+        self.states.extend(states)
+
+    def pop(self):
+        return self.states.popleft()
+
+    def __len__(self):
+        return len(self.states)
+
+
+class RandomWorklist:
+    """a random pending path each time"""
+
+    def __init__(self, seed=None):
+        self.states = []
+        self.random = random.Random(seed)
+
+    def extend(self, states):
+        self.states.extend(states)
+
+    def pop(self):
+        index = self.random.randrange(len(self.states))
+        self.states[index], self.states[-1] = self.states[-1], self.states[index]
+        return self.states.pop()
+
+    def __len__(self):
+        return len(self.states)
+
+
+class DistanceWorklist:
+    """the path closest to a target block first, newer paths first on ties"""
+
+    def __init__(self, distances):
+        self.distances = distances
+        self.heap = []
+        self.count = 0
+
+    def extend(self, states):
+        for state in states:
+            self.count += 1
+            distance = self.distances.get(state.block.ident, UNREACHABLE)
+            heapq.heappush(self.heap, (distance, -self.count, state))
+
+    def pop(self):
+        return heapq.heappop(self.heap)[2]
+
+    def __len__(self):
+        return len(self.heap)
+
+
+STRATEGIES = ["dfs", "bfs", "random", "distance"]
+
+
+def new_worklist(strategy, distances=None):
+    if strategy == "dfs":
+        return DFSWorklist()
+    if strategy == "bfs":
+        return BFSWorklist()
+    if strategy == "random":
+        return RandomWorklist(global_params.SEARCH_SEED)
+    if strategy == "distance":
+        return DistanceWorklist(distances or {})
+    raise ValueError("Unknown search strategy: " + str(strategy))
+
+
+def interprocedural_successors(blocks, tac_block_function):
+    # the CFG edges plus the private call and return edges,
+    # which sym_exec_block only learns while executing CALLPRIVATE/RETURNPRIVATE
+    successors = {
+        ident: [b.ident for b in block.successors] for ident, block in blocks.items()
+    }
+    call_sites = {}
+    for ident, block in blocks.items():
+        for statement in block.statements:
+            if statement.opcode != "CALLPRIVATE" or not isinstance(
+                statement.use_vals[0], int
+            ):
+                continue
+            callee = hex(statement.use_vals[0])
+            if callee not in blocks:
+                continue
+            successors[ident] = [callee]
+            if block.successors:
+                call_sites.setdefault(tac_block_function[callee], []).append(
+                    block.successors[0].ident
+                )
+    for ident, block in blocks.items():
+        for statement in block.statements:
+            if statement.opcode == "RETURNPRIVATE":
+                successors[ident] = call_sites.get(tac_block_function[ident], [])
+    return successors
+
+
+def compute_target_distances(
+    blocks,
+    tac_block_function,
+    fund_transfer_info,
+    state_dependency_info,
+    detectors=DETECTORS,
+):
+    # number of blocks to the nearest target, by a backward BFS from the targets,
+    # the blocks with the CALL/SSTORE statements checked by the detectors
+    successors = interprocedural_successors(blocks, tac_block_function)
+    predecessors = {ident: [] for ident in blocks}
+    for ident, succs in successors.items():
+        for succ in succs:
+            predecessors.setdefault(succ, []).append(ident)
+    targets = trigger_blocks(
+        blocks, detectors, fund_transfer_info, state_dependency_info
+    )
+    distances = {ident: 0 for ident in targets}
+    queue = deque(targets)
+    while queue:
+        ident = queue.popleft()
+        for pred in predecessors.get(ident, ()):
+            if pred not in distances:
+                distances[pred] = distances[ident] + 1
+                queue.append(pred)
+    return distances
@@ -0,0 +1,82 @@
+import time
+from collections import OrderedDict
+
+from z3 import is_bv_value, is_expr, simplify
+
+from symbolic_execution.utils import to_concrete
+
+
+class SimplifyCache:
+    """Memoized z3 simplify of the arithmetic handlers, bounded LRU.
+
+    Keyed by the z3 AST id, z3 hash-conses its ASTs so an expression built again
+    on a sibling path has the same id. The entry keeps the expression alive,
+    otherwise its id could be reused by a new AST.
+    """
+
+    def __init__(self, limit):
+        self.limit = limit
+        # AST id -> (expression, simplified expression)
+        self.entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.skips = 0
+        self.simplify_time = 0.0
+
+    def simplify(self, expr):
+        # concrete operands are computed as python ints, nothing to simplify
+        if not is_expr(expr):
+            self.skips += 1
+            return expr
+        if is_bv_value(expr):
+            self.skips += 1
+            return expr.as_long()
+        key = expr.get_id()
+        entry = self.entries.get(key)
+        if entry is not None:
+            self.hits += 1
+            self.entries.move_to_end(key)
+            return entry[1]
+        self.misses += 1
+        start = time.time()
+        simplified = to_concrete(simplify(expr))
+        self.simplify_time += time.time() - start
+        self.entries[key] = (expr, simplified)
+        if is_expr(simplified):
+            # simplify is idempotent, the result is found again when it is reused as is
+            self.entries.setdefault(simplified.get_id(), (simplified, simplified))
+        while len(self.entries) > self.limit:
+            self.entries.popitem(last=False)
+        return simplified
+
+    def counters(self):
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "skips": self.skips,
+            "simplify_time": self.simplify_time,
+        }
+
+    def add_counters(self, counters):
+        # counters of the same contract computed in another process
+        for key, value in counters.items():
+            setattr(self, key, getattr(self, key) + value)
+
+    def hit_rate(self):
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
+
+    def saved_time(self):
+        if not self.misses:
+            return 0.0
+        return self.simplify_time / self.misses * self.hits
+
+    def stats(self):
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "skips": self.skips,
+            "hit_rate": round(self.hit_rate(), 3),
+            "simplify_time": round(self.simplify_time, 3),
+            "saved_time": round(self.saved_time(), 3),
+        }
@@ -0,0 +1,138 @@
+from collections import namedtuple
+
+# opcodes whose handlers compute their defs from their uses only,
+# without the solver, fresh variables or the storage/memory of the path
+PURE_OPCODES = {
+    "ADD",
+    "MUL",
+    "SUB",
+    "DIV",
+    "LT",
+    "GT",
+    "SLT",
+    "SGT",
+    "EQ",
+    "ISZERO",
+    "AND",
+    "OR",
+    "XOR",
+    "NOT",
+    "SHL",
+    "SHR",
+    "SAR",
+    "PHI",
+    "CONST",
+    "JUMP",
+    "JUMPI",
+    "JUMPDEST",
+    "POP",
+    "RETURNPRIVATE",
+}
+
+# opcodes checked by the detectors or with unknown effects, not even allowed
+# on the paths of a summarized function which never return (e.g. reverts)
+EFFECT_OPCODES = {
+    "CALL",
+    "CALLCODE",
+    "DELEGATECALL",
+    "STATICCALL",
+    "SSTORE",
+    "SELFDESTRUCT",
+    "SUICIDE",
+    "CREATE",
+    "CREATE2",
+    "CALLPRIVATE",
+}
+
+# blocks executed to summarize a function before giving up
+BLOCK_LIMIT = 256
+
+# input -> output relation of a private function with a single returning path,
+# args are the fresh variables standing for the actual arguments
+Summary = namedtuple("Summary", ["args", "conditions", "returns"])
+
+
+def summarizable_functions(blocks, tac_block_function):
+    # function -> its blocks reaching a RETURNPRIVATE, for the functions whose
+    # returning blocks are pure and other blocks have no effect
+    function_blocks = {}
+    for ident, block in blocks.items():
+        function_blocks.setdefault(tac_block_function[ident], []).append(block)
+    summarizable = {}
+    for func, func_blocks in function_blocks.items():
+        returning = {
+            block.ident
+            for block in func_blocks
+            if any(s.opcode == "RETURNPRIVATE" for s in block.statements)
+        }
+        if not returning:
+            continue
+        # backward over the local edges of the function
+        changed = True
+        while changed:
+            changed = False
+            for block in func_blocks:
+                if block.ident not in returning and any(
+                    succ.ident in returning for succ in block.successors
+                ):
+                    returning.add(block.ident)
+                    changed = True
+        if all(
+            (
+                s.opcode in PURE_OPCODES
+                if block.ident in returning
+                else s.opcode not in EFFECT_OPCODES
+            )
+            for block in func_blocks
+            for s in block.statements
+        ):
+            summarizable[func] = returning
+    return summarizable
+
+
+class FunctionSummaries:
+    """Summaries of the pure private functions of a contract.
+
+    Computed once per (function, number of arguments) and reused by every call
+    site of every analyzed public function. None marks a function that cannot be
+    summarized precisely, it is then executed at its call sites as before.
+    """
+
+    def __init__(self, returning_blocks):
+        # summarizable function -> its returning blocks
+        self.returning_blocks = returning_blocks
+        self.summaries = {}
+        self.hits = 0
+        self.computed = 0
+        self.imprecise = 0
+
+    def __contains__(self, key):
+        return key in self.summaries
+
+    def get(self, key):
+        summary = self.summaries[key]
+        if summary is not None:
+            self.hits += 1
+        return summary
+
+    def store(self, key, summary):
+        self.summaries[key] = summary
+        if summary is None:
+            self.imprecise += 1
+        else:
+            self.computed += 1
+
+    def counters(self):
+        return {
+            "hits": self.hits,
+            "computed": self.computed,
+            "imprecise": self.imprecise,
+        }
+
+    def add_counters(self, counters):
+        # counters of the same contract computed in another process
+        for key, value in counters.items():
+            setattr(self, key, getattr(self, key) + value)
+
+    def stats(self):
+        return self.counters()
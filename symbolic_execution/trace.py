@@ -0,0 +1,60 @@
+import logging
+from collections import deque
+
+log = logging.getLogger(__name__)
+
+# categories of the trace of the executor
+# - block: the executed blocks
+# - path: the paths terminated by a limit or an explored state
+# - branch: the branch conditions and the infeasible sides
+# - exec: the executed statements and the values they compute
+# - storage: the SSTOREs
+# - call: the CALLs and the private returns
+CATEGORIES = ("block", "path", "branch", "exec", "storage", "call")
+
+
+class Tracer:
+    """Trace of the executor, formatted only when it is read.
+
+    The records of the enabled categories go to the log at the debug level,
+    the last records of every category are kept in a ring buffer, dumped to
+    the log when a path fails or on demand. When neither is on, a trace call
+    returns right away and its arguments are never formatted.
+    """
+
+    def __init__(self, categories="", size=0):
+        if categories == "all":
+            categories = CATEGORIES
+        elif isinstance(categories, str):
+            categories = [c for c in categories.split(",") if c]
+        unknown = set(categories) - set(CATEGORIES)
+        if unknown:
+            raise ValueError("Unknown trace categories: " + ", ".join(sorted(unknown)))
+        self.enabled = frozenset(categories)
+        # (category, message, args) of the last records
+        self.buffer = deque(maxlen=size) if size else None
+        self.active = bool(self.enabled) or self.buffer is not None
+
+    def __call__(self, category, message, *args):
+        # message is a %-format of args, like the logging calls
+        if not self.active:
+            return
+        if self.buffer is not None:
+            self.buffer.append((category, message, args))
+        if category in self.enabled:
+            log.debug("[" + category + "] " + message, *args)
+
+    def dump(self, reason):
+        # write the buffered records to the log, oldest first
+        if not self.buffer:
+            return
+        lines = []
+        for category, message, args in self.buffer:
+            try:
+                lines.append("[%s] %s" % (category, message % args))
+            except Exception as e:
+                lines.append("[%s] %s %r (%s)" % (category, message, args, e))
+        self.buffer.clear()
+        log.warning(
+            "Last %d trace records, %s:\n%s" % (len(lines), reason, "\n".join(lines))
+        )
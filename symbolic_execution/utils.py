@@ -28,6 +28,13 @@ def to_symbolic(number):
     return number
 
 
+def to_concrete(value):
+    # z3 numerals back to native ints, z3 is only needed for symbolic values
+    if is_bv_value(value):
+        return value.as_long()
+    return value
+
+
 def to_unsigned(number):
     if number < 0:
         return number + 2**256
@@ -35,20 +42,17 @@ def to_unsigned(number):
 
 
 def to_signed(number):
-    if number > 2 ** (256 - 1):
+    if number >= 2 ** (256 - 1):
         return (2 ** (256) - number) * (-1)
     else:
         return number
 
 
 def check_sat(solver, pop_if_exception=True):
+    # an unknown result leaves the scope to the caller, popping it here made
+    # the caller's own pop drop a frame of the enclosing path
     try:
         ret = solver.check()
-        if ret == unknown:
-            # pop unknown
-            solver.pop()
-            return ret
-            # raise Z3Exception(solver.reason_unknown())
     except Exception as e:
         if pop_if_exception:
             solver.pop()